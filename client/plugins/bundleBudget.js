@@ -0,0 +1,47 @@
+import { gzipSync } from 'node:zlib'
+
+const kB = (bytes) => `${(bytes / 1024).toFixed(1)} kB`
+
+// Fails the build when the JavaScript loaded before first paint, or any one
+// lazily loaded chunk, grows past its gzipped budget, so a stray static
+// import of a heavy page or library is caught before it reaches the kiosks.
+export default function bundleBudget({ initialKb = 100, chunkKb = 75, strict = true } = {}) {
+  return {
+    name: 'bundle-budget',
+    apply: 'build',
+    generateBundle(_, bundle) {
+      const chunks = Object.values(bundle).filter((file) => file.type === 'chunk')
+      const gzipped = Object.fromEntries(chunks.map((chunk) => [chunk.fileName, gzipSync(chunk.code).length]))
+
+      // The entry and everything it imports statically load together; dynamic imports come later
+      const initial = new Set()
+      const visit = (fileName) => {
+        if (initial.has(fileName)) return
+        initial.add(fileName)
+        bundle[fileName].imports.forEach(visit)
+      }
+      chunks.filter((chunk) => chunk.isEntry).forEach((chunk) => visit(chunk.fileName))
+      const initialBytes = [...initial].reduce((total, fileName) => total + gzipped[fileName], 0)
+
+      const problems = []
+      if (initialBytes > initialKb * 1024) {
+        problems.push(`initial JavaScript is ${kB(initialBytes)} gzipped, budget ${initialKb} kB (${[...initial].join(', ')})`)
+      }
+      for (const chunk of chunks) {
+        if (!initial.has(chunk.fileName) && gzipped[chunk.fileName] > chunkKb * 1024) {
+          problems.push(`${chunk.fileName} is ${kB(gzipped[chunk.fileName])} gzipped, budget ${chunkKb} kB`)
+        }
+      }
+
+      console.log(`\nbundle budget: initial ${kB(initialBytes)} / ${initialKb} kB gzipped`)
+      for (const chunk of chunks.filter((chunk) => !initial.has(chunk.fileName))) {
+        console.log(`  lazy ${chunk.fileName.padEnd(40)} ${kB(gzipped[chunk.fileName])}`)
+      }
+      if (problems.length) {
+        const message = `Bundle over budget:\n  ${problems.join('\n  ')}`
+        if (strict) this.error(message)
+        else this.warn(message)
+      }
+    },
+  }
+}
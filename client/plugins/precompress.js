@@ -0,0 +1,41 @@
+import { readFile, writeFile } from 'node:fs/promises'
+import { join } from 'node:path'
+import { promisify } from 'node:util'
+import { brotliCompress, constants, gzip } from 'node:zlib'
+
+const gzipAsync = promisify(gzip)
+const brotliAsync = promisify(brotliCompress)
+
+// Writes name.gz and name.br next to every text asset of the build, at the
+// highest levels since this happens once per build rather than per request.
+// A server with gzip_static / brotli_static (nginx) or equivalent then sends
+// them as they are, without compressing on the fly.
+export default function precompress({ extensions = /\.(js|css|html|svg|json)$/, minBytes = 1024 } = {}) {
+  return {
+    name: 'precompress',
+    apply: 'build',
+    async writeBundle(options, bundle) {
+      const files = Object.keys(bundle).filter((fileName) => extensions.test(fileName))
+      await Promise.all(files.map(async (fileName) => {
+        const path = join(options.dir, fileName)
+        const data = await readFile(path)
+        if (data.length < minBytes) return
+        const [gz, br] = await Promise.all([
+          gzipAsync(data, { level: 9 }),
+          brotliAsync(data, {
+            params: {
+              [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY,
+              [constants.BROTLI_PARAM_MODE]: constants.BROTLI_MODE_TEXT,
+              [constants.BROTLI_PARAM_SIZE_HINT]: data.length,
+            },
+          }),
+        ])
+        // Not worth a second copy if it barely shrinks
+        await Promise.all([
+          gz.length < data.length * 0.9 && writeFile(`${path}.gz`, gz),
+          br.length < data.length * 0.9 && writeFile(`${path}.br`, br),
+        ])
+      }))
+    },
+  }
+}
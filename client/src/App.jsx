@@ -1,31 +1,39 @@
-import { useState } from 'react';
+import { lazy, Suspense, useEffect, useState } from 'react';
 import { Toaster } from 'react-hot-toast'; // <-- import Toaster
 import Sidebar from './components/Sidebar';
-import Home from './pages/Home';
-import Control from './pages/Control';
-import Settings from './pages/Settings';
-import Tutorial from './pages/Tutorial';
+
+// Each page is its own chunk, fetched the first time it is opened
+const loaders = {
+  home: () => import('./pages/Home'),
+  control: () => import('./pages/Control'),
+  settings: () => import('./pages/Settings'),
+  'user guide': () => import('./pages/Tutorial'),
+};
+const pages = Object.fromEntries(Object.entries(loaders).map(([name, load]) => [name, lazy(load)]));
+
+// Starts downloading a page before it is clicked; the browser keeps the module, so lazy() finds it ready
+const prefetchPage = (label) => loaders[label.toLowerCase()]?.();
 
 function App() {
   const [activePage, setActivePage] = useState('Home');
 
-  const renderContent = () => {
-    switch(activePage.toLowerCase()) {
-      case 'home': return <Home />;
-      case 'control': return <Control />;
-      case 'settings': return <Settings />;
-      case 'user guide': return <Tutorial />;
-      default: return <Home />;
-    }
-  };
+  // Control is where operators go next, so fetch it once the first page has settled
+  useEffect(() => {
+    const idle = window.requestIdleCallback || ((callback) => setTimeout(callback, 1000));
+    idle(() => prefetchPage('Control'));
+  }, []);
+
+  const Page = pages[activePage.toLowerCase()] || pages.home;
 
   return (
     <div className="min-h-screen bg-gray-900 text-gray-100 font-sans flex flex-col md:flex-row">
-      <Sidebar activePage={activePage} setActivePage={setActivePage} />
+      <Sidebar activePage={activePage} setActivePage={setActivePage} onHover={prefetchPage} />
 
       {/* Main content area */}
       <main className="flex-1 p-6 overflow-auto">
-        {renderContent()}
+        <Suspense fallback={<div className="text-center text-gray-400 py-8">Loading…</div>}>
+          <Page />
+        </Suspense>
       </main>
 
       {/* Toast notifications */}
@@ -1,6 +1,9 @@
 const BASE_URL = import.meta.env.VITE_API_URL || '/api';
+// Mount state reads can be served by read_worker.py processes instead of the control server
+const READ_URL = import.meta.env.VITE_READ_API_URL || BASE_URL;
 
 export async function slewToCoordinates(ra, dec, objectName) {
+  setTelemetryActivity('slewing');
   const response = await fetch(`${BASE_URL}/slew`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
@@ -124,7 +127,7 @@ export async function setTime(time, offset) {
 }
 
 export async function getTelescopeCoordinates() {
-  const res = await fetch(`${BASE_URL}/coordinates`, {
+  const res = await fetch(`${READ_URL}/coordinates`, {
     method: 'GET',
     headers: { 'Content-Type': 'application/json' }
   });
@@ -132,7 +135,114 @@ export async function getTelescopeCoordinates() {
   return data;
 }
 
+// Shared telemetry store: every component that shows the mount position subscribes
+// here instead of polling /coordinates itself, so a tab keeps at most one request
+// in flight and polls only as fast as the mount's current activity needs.
+const TELEMETRY_INTERVALS = {
+  idle: 2000,     // tracking or parked: RA/Dec barely change
+  slewing: 500,   // GOTO in progress
+  jogging: 250,   // manual motion: altitude limits need fresh data
+};
+const SLEW_DETECT_DEG_PER_SEC = 0.05;  // sidereal tracking holds RA/Dec still, so faster means slewing
+const SETTLE_SAMPLES = 3;              // still samples before dropping back to idle
+
+const telemetry = {
+  data: null,
+  listeners: new Set(),
+  inFlight: null,
+  timer: null,
+  activity: 'idle',
+  stillSamples: 0,
+  lastSampleAt: 0,
+};
+
+function angularSpeed(previous, current, seconds) {
+  if (!previous?.position || !current?.position || seconds <= 0) return 0;
+  const dRa = (((current.position.ra - previous.position.ra) * 15 + 540) % 360) - 180;
+  const dDec = current.position.dec - previous.position.dec;
+  const cosDec = Math.cos((current.position.dec * Math.PI) / 180);
+  return Math.hypot(dRa * cosDec, dDec) / seconds;
+}
+
+function updateActivity(previous, current, seconds) {
+  if (telemetry.activity === 'jogging') return;
+  if (angularSpeed(previous, current, seconds) > SLEW_DETECT_DEG_PER_SEC) {
+    telemetry.activity = 'slewing';
+    telemetry.stillSamples = 0;
+  } else if (telemetry.activity === 'slewing' && ++telemetry.stillSamples >= SETTLE_SAMPLES) {
+    telemetry.activity = 'idle';
+  }
+}
+
+function scheduleTelemetry(delay) {
+  clearTimeout(telemetry.timer);
+  telemetry.timer = null;
+  if (telemetry.listeners.size === 0 || document.hidden) return;
+  telemetry.timer = setTimeout(pollTelemetry, delay ?? TELEMETRY_INTERVALS[telemetry.activity]);
+}
+
+async function pollTelemetry() {
+  if (telemetry.inFlight) return telemetry.inFlight;
+  clearTimeout(telemetry.timer);
+
+  telemetry.inFlight = (async () => {
+    try {
+      const data = await getTelescopeCoordinates();
+      const now = performance.now();
+      if (data.status === 'success') {
+        updateActivity(telemetry.data, data, (now - telemetry.lastSampleAt) / 1000);
+        telemetry.data = data;
+        telemetry.lastSampleAt = now;
+        telemetry.listeners.forEach((listener) => listener(data));
+      }
+      return data;
+    } catch (error) {
+      console.error('Telemetry poll failed:', error);
+      return telemetry.data;
+    } finally {
+      telemetry.inFlight = null;
+      scheduleTelemetry();
+    }
+  })();
+  return telemetry.inFlight;
+}
+
+if (typeof document !== 'undefined') {
+  document.addEventListener('visibilitychange', () => {
+    // Hidden tabs stop polling entirely and catch up as soon as they are shown again
+    if (!document.hidden && telemetry.listeners.size > 0) pollTelemetry();
+    else scheduleTelemetry();
+  });
+}
+
+export function subscribeTelemetry(listener) {
+  telemetry.listeners.add(listener);
+  if (telemetry.data) listener(telemetry.data);
+  if (!telemetry.inFlight && !telemetry.timer) pollTelemetry();
+  return () => {
+    telemetry.listeners.delete(listener);
+    if (telemetry.listeners.size === 0) scheduleTelemetry();
+  };
+}
+
+// Latest sample if it is recent enough, otherwise joins (or starts) the shared request
+export function refreshTelemetry(maxAgeMs = 0) {
+  if (telemetry.data && performance.now() - telemetry.lastSampleAt <= maxAgeMs) {
+    return Promise.resolve(telemetry.data);
+  }
+  return pollTelemetry();
+}
+
+export function setTelemetryActivity(activity) {
+  if (!(activity in TELEMETRY_INTERVALS) || activity === telemetry.activity) return;
+  const speedingUp = TELEMETRY_INTERVALS[activity] < TELEMETRY_INTERVALS[telemetry.activity];
+  telemetry.activity = activity;
+  telemetry.stillSamples = 0;
+  if (speedingUp && !telemetry.inFlight) scheduleTelemetry(0);
+}
+
 export async function abortMotion() {
+  setTelemetryActivity('slewing');
   const res = await fetch(`${BASE_URL}/abort`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' }
@@ -166,7 +276,7 @@ export async function unparkTelescope() {
 }
 
 export async function getTelescopeParkingStatus() {
-  const res = await fetch(`${BASE_URL}/parking-status`, {
+  const res = await fetch(`${READ_URL}/parking-status`, {
     method: 'GET',
     headers: { 'Content-Type': 'application/json' }
   });
@@ -178,7 +288,7 @@ export async function getTelescopeParkingStatus() {
 }
 
 export async function getParkPosition() {
-  const res = await fetch(`${BASE_URL}/park-position`, {
+  const res = await fetch(`${READ_URL}/park-position`, {
     method: 'GET',
     headers: { 'Content-Type': 'application/json' }
   });
@@ -207,6 +317,7 @@ export async function setParkOption(option) {
 }
 
 export async function moveTelescope(direction) {
+  setTelemetryActivity(direction === 'stop' ? 'slewing' : 'jogging');  // 'slewing' until the mount settles
   const res = await fetch(`${BASE_URL}/move`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
@@ -219,7 +330,7 @@ export async function moveTelescope(direction) {
 }
 
 export async function getTrackingState() {
-  const res = await fetch(`${BASE_URL}/track-state`, {
+  const res = await fetch(`${READ_URL}/track-state`, {
     method: 'GET',
     headers: { 'Content-Type': 'application/json' }
   });
@@ -243,7 +354,7 @@ export async function setTrackingState(state) {
 }
 
 export async function getSlewRate() {
-  const res = await fetch(`${BASE_URL}/slew-rate`, {
+  const res = await fetch(`${READ_URL}/slew-rate`, {
     method: "GET",
     headers: { "Content-Type": "application/json" },
   });
@@ -262,7 +373,7 @@ export async function setSlewRate(rateName) {
 }
 
 export async function getSiteInfo() {
-  const res = await fetch(`${BASE_URL}/site`, {
+  const res = await fetch(`${READ_URL}/site`, {
     method: 'GET',
     headers: { 'Content-Type': 'application/json' }
   });
@@ -287,7 +398,7 @@ export async function loadSavedConfig() {
 }
 
 export async function getFocuserSpeed() {
-  const res = await fetch(`${BASE_URL}/focuser/speed`, {
+  const res = await fetch(`${READ_URL}/focuser/speed`, {
     method: 'GET',
     headers: { 'Content-Type': 'application/json' }
   });
@@ -306,7 +417,7 @@ export async function setFocuserSpeed(speed) {
 }
 
 export async function getFocuserTimer() {
-  const res = await fetch(`${BASE_URL}/focuser/timer`, {
+  const res = await fetch(`${READ_URL}/focuser/timer`, {
     method: 'GET',
     headers: { 'Content-Type': 'application/json' }
   });
@@ -343,3 +454,56 @@ export async function abortFocuserMotion(abort) {
   if (!res.ok) throw new Error('Failed to abort focuser motion');
   return res.json();
 }
+
+// Focus sweep run by the server (see server/focus_sweep.py): the steps are timed there, not here
+export async function startFocusSweep(spec) {
+  const res = await fetch(`${BASE_URL}/focuser/sweep`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(spec),
+  });
+  const data = await res.json();
+  if (!res.ok) throw new Error(data.message || 'Failed to start focus sweep');
+  return data;
+}
+
+export async function stopFocusSweep() {
+  const res = await fetch(`${BASE_URL}/focuser/sweep`, { method: 'DELETE' });
+  if (!res.ok) throw new Error('Failed to stop focus sweep');
+  return res.json();
+}
+
+// Calls onEvent with each progress event of the current sweep; returns the unsubscribe function
+export function subscribeFocusSweep(onEvent) {
+  const source = new EventSource(`${BASE_URL}/focuser/sweep/events`);
+  for (const type of ['started', 'step', 'completed', 'aborted', 'failed']) {
+    source.addEventListener(type, (e) => {
+      onEvent(JSON.parse(e.data));
+      // The stream ends with the sweep; closing stops EventSource from reconnecting and replaying it
+      if (type !== 'started' && type !== 'step') source.close();
+    });
+  }
+  return () => source.close();
+}
+
+// All-sky Alt/Az grid for the current minute (see server/skymap.py for the layout).
+// The browser handles gzip and the ETag, so re-fetching within the minute is cheap.
+export async function getSkyMap() {
+  const res = await fetch(`${BASE_URL}/skymap`);
+  if (!res.ok) throw new Error('Failed to fetch sky map');
+  const buffer = await res.arrayBuffer();
+  const view = new DataView(buffer);
+  const headerLength = view.getUint32(4, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+  const offset = 8 + headerLength;
+  const alt = new Int16Array(buffer, offset, header.points);
+  const az = new Uint16Array(buffer, offset + 2 * header.points, header.points);
+  const point = (i) => ({ alt: alt[i] * header.scale, az: az[i] * header.scale });
+
+  const objects = header.objects.map((object, i) => ({ ...object, ...point(i) }));
+  let next = objects.length;
+  const line = (count) => Array.from({ length: count }, () => point(next++));
+  const raLines = header.raLines.map((ra) => ({ ra, points: line(header.raLinePoints) }));
+  const decLines = header.decLines.map((dec) => ({ dec, points: line(header.decLinePoints) }));
+  return { ...header, objects, raLines, decLines };
+}
@@ -1,7 +1,7 @@
 import { useState, useRef } from 'react';
 import toast from 'react-hot-toast';
 import CurrentTelescopePosition from './CurrentTelescopePosition';
-import { getTelescopeCoordinates, slewToCoordinates, syncToCoordinates, resolveObject } from '../api/telescopeAPI';
+import { refreshTelemetry, slewToCoordinates, syncToCoordinates, resolveObject } from '../api/telescopeAPI';
 import TooltipWrapper from "./TooltipWrapper";
 
 export default function CoordinateSlew() {
@@ -243,7 +243,7 @@ export default function CoordinateSlew() {
 
   const handleFillInCurrentPosition = async () => {
     try {
-      const { position } = await getTelescopeCoordinates();
+      const { position } = await refreshTelemetry();
       parseAndSetRA(formatRA(position.ra));
       parseAndSetDec(formatDEC(position.dec));
       toast.success('Current telescope position loaded');
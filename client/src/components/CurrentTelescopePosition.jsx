@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
-import { getTelescopeCoordinates } from '../api/telescopeAPI';
+import { subscribeTelemetry } from '../api/telescopeAPI';
 import TooltipWrapper from './TooltipWrapper';
 
 export default function CurrentTelescopePosition() {
@@ -9,16 +9,11 @@ export default function CurrentTelescopePosition() {
   const [currentAlt, setCurrentAlt] = useState(0);
   const [currentAz, setCurrentAz] = useState(0);
 
-  const fetchCurrentPosition = async () => {
-    try {
-      const data = await getTelescopeCoordinates();
-      setCurrentRa(data.position.ra);
-      setCurrentDec(data.position.dec);
-      setCurrentAlt(data.alt);
-      setCurrentAz(data.az);
-    } catch (error) {
-      console.error('Error fetching current position:', error);
-    }
+  const updateCurrentPosition = (data) => {
+    setCurrentRa(data.position.ra);
+    setCurrentDec(data.position.dec);
+    setCurrentAlt(data.alt);
+    setCurrentAz(data.az);
   };
 
   const rawRAtoHMS = (rawRA) => {
@@ -46,11 +41,7 @@ export default function CurrentTelescopePosition() {
     return `${az.toFixed(2)}°`;
   };
 
-  useEffect(() => {
-    fetchCurrentPosition();
-    const interval = setInterval(fetchCurrentPosition, 1000);
-    return () => clearInterval(interval);
-  }, []);
+  useEffect(() => subscribeTelemetry(updateCurrentPosition), []);
 
   // Small animation props used repeatedly
   const animateProps = {
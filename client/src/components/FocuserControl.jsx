@@ -1,11 +1,14 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { 
   getFocuserSpeed, 
   getFocuserTimer, 
   setFocuserSpeed, 
   setFocuserTimer, 
   setFocuserMotion, 
-  abortFocuserMotion 
+  abortFocuserMotion,
+  startFocusSweep,
+  stopFocusSweep,
+  subscribeFocusSweep
 } from '../api/telescopeAPI';
 import { toast } from 'react-hot-toast';
 
@@ -14,6 +17,12 @@ export default function FocuserControl() {
   const [speed, setSpeed] = useState('');
   const [timer, setTimer] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  const [sweepCount, setSweepCount] = useState(10);
+  const [sweepSettle, setSweepSettle] = useState(2);
+  const [sweep, setSweep] = useState(null); // latest progress event of the running sweep
+  const unsubscribeSweep = useRef(null);
+
+  useEffect(() => () => unsubscribeSweep.current?.(), []);
 
   // Fetch current settings on mount
   useEffect(() => {
@@ -82,6 +91,43 @@ export default function FocuserControl() {
     }
   };
 
+  // Sweep: the server times every step, so they come out the same length whatever the network does
+  const handleSweep = async () => {
+    if (!direction || !speed || !timer) {
+      toast.error('Please select direction, speed, and duration');
+      return;
+    }
+    try {
+      unsubscribeSweep.current?.();
+      await startFocusSweep({
+        direction,
+        speed: parseFloat(speed),
+        duration: parseFloat(timer),
+        count: parseInt(sweepCount, 10),
+        settle: parseFloat(sweepSettle),
+      });
+      unsubscribeSweep.current = subscribeFocusSweep((event) => {
+        setSweep(event);
+        if (event.type === 'completed') toast.success('Focus sweep completed');
+        if (event.type === 'failed') toast.error(`Focus sweep failed: ${event.message}`);
+      });
+    } catch (err) {
+      console.error(err);
+      toast.error(err.message);
+    }
+  };
+
+  const handleSweepStop = async () => {
+    try {
+      await stopFocusSweep();
+    } catch (err) {
+      console.error(err);
+      toast.error('Failed to stop focus sweep');
+    }
+  };
+
+  const sweepRunning = sweep && (sweep.type === 'started' || sweep.type === 'step');
+
   // Hold mode start
   const handleHoldStart = async () => {
     if (!direction || !speed) {
@@ -161,6 +207,47 @@ export default function FocuserControl() {
           </button>
         </div>
       </div>
+
+      <div className="grid grid-cols-2 xl:grid-cols-3 gap-4 mt-6">
+        <div>
+          <label htmlFor="sweep-count" className="text-sm font-medium mb-1 block">Sweep Steps</label>
+          <input
+            type="number"
+            id="sweep-count"
+            min="1"
+            value={sweepCount}
+            onChange={(e) => setSweepCount(e.target.value)}
+            className="border rounded-lg px-3 py-2 text-sm w-full"
+          />
+        </div>
+        <div>
+          <label htmlFor="sweep-settle" className="text-sm font-medium mb-1 block">Settle (s)</label>
+          <input
+            type="number"
+            id="sweep-settle"
+            min="0"
+            step="0.5"
+            value={sweepSettle}
+            onChange={(e) => setSweepSettle(e.target.value)}
+            className="border rounded-lg px-3 py-2 text-sm w-full"
+          />
+        </div>
+        <div className="col-span-2 xl:col-span-1 flex items-end">
+          <button
+            onClick={sweepRunning ? handleSweepStop : handleSweep}
+            className={`w-full ${sweepRunning ? 'bg-red-600 hover:bg-red-700' : 'bg-blue-600 hover:bg-blue-700'} text-white font-semibold rounded py-2 px-4 transition`}
+          >
+            {sweepRunning ? 'Stop Sweep' : 'Run Sweep'}
+          </button>
+        </div>
+      </div>
+      {sweep && (
+        <p className="text-sm text-gray-400 mt-2 text-center">
+          {sweep.type === 'step'
+            ? `Step ${sweep.step} of ${sweep.of}: moved ${sweep.movedMs.toFixed(1)} ms (started ${sweep.startJitterMs.toFixed(1)} ms late)`
+            : `Sweep ${sweep.type}`}
+        </p>
+      )}
     </section>
   );
 }
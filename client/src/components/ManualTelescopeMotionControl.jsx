@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from "react";
-import { moveTelescope, getTelescopeCoordinates } from "../api/telescopeAPI";
+import { moveTelescope, subscribeTelemetry } from "../api/telescopeAPI";
 import { toast } from "react-hot-toast";
 import Compass from "./Compass";
 import TooltipWrapper from "./TooltipWrapper";
@@ -44,27 +44,16 @@ export default function ManualTelescopeMotionControl() {
   const [isNorthDisabled, setIsNorthDisabled] = useState(false);
   const [isSouthDisabled, setIsSouthDisabled] = useState(false);
 
-  const fetchAltitude = async () => {
-    try {
-      const data = await getTelescopeCoordinates();
-      if (data.status === "success") {
-        const alt = data.alt;
-        setCurrentAltitude(alt);
+  const updateAltitude = (data) => {
+    const alt = data.alt;
+    setCurrentAltitude(alt);
 
-        setIsNorthDisabled(alt >= MAX_ALTITUDE);
-        setIsSouthDisabled(alt <= MIN_ALTITUDE);
-      }
-    } catch (e) {
-      console.error("Failed to fetch altitude", e);
-    }
+    setIsNorthDisabled(alt >= MAX_ALTITUDE);
+    setIsSouthDisabled(alt <= MIN_ALTITUDE);
   };
 
-  // Poll telescope altitude
-  useEffect(() => {
-    fetchAltitude();
-    const pollInterval = setInterval(fetchAltitude, 200);
-    return () => clearInterval(pollInterval);
-  }, []);
+  // Telescope altitude from the shared telemetry store (polled faster while jogging)
+  useEffect(() => subscribeTelemetry(updateAltitude), []);
 
   const activateDirection = (dir) => {
     if (dir === "stop") {
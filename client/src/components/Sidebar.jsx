@@ -1,7 +1,7 @@
 import React, { useState } from 'react';
 import { Home, Settings, Menu, Telescope, GraduationCap } from 'lucide-react';
 
-export default function Sidebar({ activePage, setActivePage }) {
+export default function Sidebar({ activePage, setActivePage, onHover }) {
   const [sidebarOpen, setSidebarOpen] = useState(false);
 
   const menuItems = [
@@ -50,6 +50,7 @@ export default function Sidebar({ activePage, setActivePage }) {
               className={`flex items-center cursor-pointer pl-4 py-3 hover:bg-gray-800 ${
                 activePage === label ? "bg-gray-800 font-semibold" : ""
               }`}
+              onMouseEnter={() => onHover?.(label)}
               onClick={() => {
                 setActivePage(label);
                 setSidebarOpen(false); // close sidebar on mobile after click
@@ -1,4 +1,9 @@
-import { ArchitectureFlow } from "../components/ArchitectureFlow";
+import { lazy, Suspense } from "react";
+
+// The diagram brings framer-motion with it; the rest of the page need not wait for it
+const ArchitectureFlow = lazy(() =>
+  import("../components/ArchitectureFlow").then((module) => ({ default: module.ArchitectureFlow }))
+);
 
 export default function Home() {
   return (
@@ -19,7 +24,9 @@ export default function Home() {
         <Feature icon="🔒" label="Park the Telescope" />
       </div>
 
-      <ArchitectureFlow />
+      <Suspense fallback={null}>
+        <ArchitectureFlow />
+      </Suspense>
 
       <div className="p-4 rounded-md text-sm text-center text-gray-400">
         Developed by Igor Vasconcelos • Universidade da Madeira • 2025
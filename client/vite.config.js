@@ -1,8 +1,18 @@
 import { defineConfig } from 'vite'
 import react from '@vitejs/plugin-react'
 import tailwindcss from '@tailwindcss/vite'
+import bundleBudget from './plugins/bundleBudget'
+import precompress from './plugins/precompress'
 
 // https://vite.dev/config/
 export default defineConfig({
-  plugins: [react(), tailwindcss()],
+  plugins: [react(), tailwindcss(), bundleBudget({ initialKb: 100, chunkKb: 75 }), precompress()],
+  build: {
+    rollupOptions: {
+      output: {
+        // React changes less often than the app, so browsers keep it cached across deploys
+        manualChunks: { react: ['react', 'react-dom'] },
+      },
+    },
+  },
 })
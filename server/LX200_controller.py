@@ -1,86 +1,516 @@
-from base_telescope import BaseTelescopeController
-from telescope import Telescope
+from base_controller import BaseTelescopeController, TelescopeDisconnectedError
+from datetime import datetime, timedelta
+import asyncio
+import logging
 import re
+import threading
+import time
 
-ra_pattern = r'^([01]\d|2[0-3]):[0-5]\d:[0-5]\d$'
-dec_pattern = r'^[+-]\d{2}\*\d{2}:\d{2}$'
+COMMAND_TIMEOUT = 2.0           # seconds to wait for a reply
+COORDINATE_CACHE_SECONDS = 0.5  # position reads within this window are served from cache
+TIME_CACHE_SECONDS = 60         # mount clock is re-read after this, extrapolated in between
+SLEW_POLL_SECONDS = 0.5
+SLEW_TIMEOUT = 180
 
-movement = {'movenorth': 'Mn', 'movesouth': 'Ms', 'moveeast': 'Me', 'movewest': 'Mw', 'stopMovement': 'Q'}
-alignment = {'Polar': 'AP', 'Land': 'AL', 'AltAz': 'AA'}
-information = {
-            'Altitude': 'GA', 'Calendar_format': 'Gc', 'Declination': 'GD', 'Current_object_declination': 'Gd',
-            'Offset': 'GG', 'Site_longitude': 'Gg', 'Right_ascension': 'GR', 'Firmware': 'GVN',
-            'dateView': 'GC', 'timeView': 'GL', 'Deep_sky_object': 'Gy'
-        }
-date = {'hour': 'SL', 'date': 'SC'}
-coordinates = {'RA': 'Sr', 'DEC': 'Sd', 'MOVE': 'MS'}
+movement = {'north': 'Mn', 'south': 'Ms', 'east': 'Me', 'west': 'Mw'}
+slew_rates = {'RATE_GUIDE': 'RG', 'RATE_CENTERING': 'RC', 'RATE_FIND': 'RM', 'RATE_MAX': 'RS'}
+track_modes = {'TRACK_SIDEREAL': 'TQ', 'TRACK_LUNAR': 'TL', 'TRACK_SOLAR': 'TS'}
+focuser_motions = {'FOCUS_INWARD': 'F+', 'FOCUS_OUTWARD': 'F-'}
+# Cache entries that are persistent settings (base_controller.SETTINGS); site and elevation are combined
+_SETTING_KEYS = {'slew_rate': 'slewRate', 'track_mode': 'trackMode', 'park_position': 'parkPosition',
+                 'focus_speed': 'focuserSpeed', 'focus_timer': 'focuserTimer'}
+
+_number = re.compile(r"([+-]?)(\d+)\D+(\d+(?:\.\d+)?)(?:\D+(\d+(?:\.\d+)?))?")
+
+
+class TelescopeConnectionError(TelescopeDisconnectedError):
+    """The link failed mid-command; routes answer it with a 503 like any other disconnect."""
+
+
+def _parse_sexagesimal(text):
+    """Parses LX200 'HH:MM:SS', 'sDD*MM:SS', 'sDD*MM' or 'HH:MM.T' replies."""
+    match = _number.search(text)
+    if not match:
+        raise ValueError(f"Unparseable LX200 value: {text!r}")
+    sign, whole, minutes, seconds = match.groups()
+    value = int(whole) + float(minutes) / 60 + float(seconds or 0) / 3600
+    return -value if sign == '-' else value
+
+
+def _format_ra(hours):
+    total = round((hours % 24) * 3600) % 86400
+    return f"{total // 3600:02d}:{total // 60 % 60:02d}:{total % 60:02d}"
+
+
+def _format_dec(degrees):
+    sign = '-' if degrees < 0 else '+'
+    total = round(abs(degrees) * 3600)
+    return f"{sign}{total // 3600:02d}*{total // 60 % 60:02d}:{total % 60:02d}"
+
+
+async def _read_char(reader):
+    return (await reader.readexactly(1)).decode('latin-1')
+
+
+async def _read_string(reader):
+    return (await reader.readuntil(b'#'))[:-1].decode('latin-1')
+
+
+async def _read_goto(reader):
+    """:MS# answers '0' on success, or '1'/'2' followed by a '#'-terminated message."""
+    status = await _read_char(reader)
+    if status == '0':
+        return status
+    return status + await _read_string(reader)
+
+
+async def _read_set_date(reader):
+    """:SC# answers '1' followed by two '#'-terminated status strings, or '0'."""
+    status = await _read_char(reader)
+    if status == '1':
+        await _read_string(reader)
+        await _read_string(reader)
+    return status
+
+
+class LX200Connection:
+    """A persistent TCP link to an LX200 mount driven by asyncio streams.
+
+    The event loop runs on its own thread; callers on request threads submit
+    commands and block on the result. Commands are serialized so replies can
+    never interleave, and the link is re-opened on the next command after
+    any I/O error.
+    """
+
+    def __init__(self, host, port, timeout=COMMAND_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.logger = logging.getLogger('LX200Connection')
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="lx200-io", daemon=True)
+        self._thread.start()
+        self._reader = None
+        self._writer = None
+        self._lock = None
+        self.on_error = None  # called with the exception whenever the link fails
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(self.timeout * 3)
+
+    def is_open(self):
+        return self._writer is not None and not self._writer.is_closing()
 
+    async def _open(self):
+        if not self.is_open():
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout)
+            self.logger.info(f"Connected to LX200 mount at {self.host}:{self.port}")
+
+    async def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _exchange(self, command, read_reply, probe=False):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            try:
+                await self._open()
+                self._writer.write(f":{command}#".encode('ascii'))
+                await self._writer.drain()
+                if read_reply is None:
+                    return None
+                try:
+                    return await asyncio.wait_for(read_reply(self._reader), self.timeout)
+                except asyncio.TimeoutError:
+                    if not probe:
+                        raise
+                    await self._close()  # a late reply must not be read as the next command's
+                    return None
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+                await self._close()
+                self._failed(command, e)
+
+    def _failed(self, command, error):
+        error = TelescopeConnectionError(f"Connection error on :{command}#: {error!r}")
+        if self.on_error is not None:
+            self.on_error(error)
+        raise error
+
+    def open(self):
+        self.run(self._open())
+
+    def close(self):
+        self.run(self._close())
+
+    async def _write_now(self, command):
+        try:
+            await self._open()
+            self._writer.write(f":{command}#".encode('ascii'))
+            await self._writer.drain()
+        except OSError as e:
+            await self._close()
+            self._failed(command, e)
+
+    def send(self, command):
+        """Sends a command that has no reply."""
+        self.run(self._exchange(command, None))
+
+    def send_urgent(self, command):
+        """Sends a no-reply command without queueing behind an exchange in progress.
+
+        Only safe for commands the mount never answers (stops, park), since
+        the bytes may land between another command and its reply.
+        """
+        self.run(self._write_now(command))
+
+    def query(self, command):
+        """Sends a command answered by a '#'-terminated string."""
+        return self.run(self._exchange(command, _read_string))
+
+    def query_char(self, command):
+        """Sends a command answered by a single character."""
+        return self.run(self._exchange(command, _read_char))
+
+    def query_with(self, command, read_reply):
+        return self.run(self._exchange(command, read_reply))
+
+    def probe(self, command):
+        """Like query, for commands some models ignore: None if no reply comes, without failing the link."""
+        return self.run(self._exchange(command, _read_string, probe=True))
 
-class TelescopeConnectionError(Exception):
-    pass
 
 class LX200Controller(BaseTelescopeController):
-    def __init__(self):
-        self.telescope = Telescope()
+    """Talks LX200 directly over TCP, skipping indiserver and the INDI driver.
+
+    The last known state is cached: positions for COORDINATE_CACHE_SECONDS,
+    the mount clock (extrapolated) for TIME_CACHE_SECONDS, and values the
+    protocol cannot read back (elevation, park position, slew rate, focuser
+    settings) for as long as the process runs.
+    """
+
+    def __init__(self, host='10.0.0.1', port=4030):
+        super().__init__()
+        self.connection = LX200Connection(host, port)
+        self.connection.on_error = lambda e: self.mark_disconnected(str(e))
+        self.logger = logging.getLogger('LX200Controller')
+        self._lock = threading.Lock()
+        self._focus_stop = None
+        self.state = {
+            "position": None,
+            "position_time": 0.0,
+            "site": None,
+            "elevation": 0.0,
+            "utc": None,
+            "utc_time": 0.0,
+            "offset": None,
+            "tracking": None,
+            "track_mode": "TRACK_SIDEREAL",
+            "slew_rate": None,
+            "parking": "Unknown",
+            "park_position": {"ra": 0.0, "dec": 0.0},
+            "focus_speed": 1.0,
+            "focus_timer": 0.0,
+        }
+
+    def _remember(self, **values):
+        with self._lock:
+            self.state.update(values)
+            site = self.state["site"] and {**self.state["site"], "elevation": self.state["elevation"]}
+        # The cache only changes once the mount has accepted a command, so it doubles as the confirmation
+        for name, value in values.items():
+            if name in _SETTING_KEYS:
+                self._state_changed(_SETTING_KEYS[name], value)
+        if "site" in values or "elevation" in values:
+            self._state_changed("site", site)
+
+    def connect(self):
+        self.connection.open()
+
+        # Switch to high precision coordinates if the mount answers HH:MM.T
+        if '.' in self.connection.query('GR'):
+            self.connection.send('U')
+        self._read_site()
+        self.logger.info("LX200 mount connected")
+
+    def disconnect(self):
+        self.connection.close()
+        self.logger.info("Disconnected from LX200 mount")
+
+    def is_connected(self):
+        return self.connection.is_open()
+
+    def health_check(self):
+        if not self.connection.is_open():
+            return False
+        try:
+            self.connection.query('GR')
+            return True
+        except Exception:
+            return False
+
+    def get_coordinates(self):
+        with self._lock:
+            if self.state["position"] and time.monotonic() - self.state["position_time"] < COORDINATE_CACHE_SECONDS:
+                return dict(self.state["position"])
 
-    def _check_response(self, response: str) -> str:
-        if response.startswith("Connection error:"):
-            raise TelescopeConnectionError(response)
-        return response
+        position = {
+            "ra": _parse_sexagesimal(self.connection.query('GR')),
+            "dec": _parse_sexagesimal(self.connection.query('GD')),
+        }
+        self._remember(position=position, position_time=time.monotonic())
+        return dict(position)
+
+    def _set_target(self, ra, dec):
+        if self.connection.query_char('Sr' + _format_ra(ra)) != '1':
+            raise ValueError(f"Mount rejected RA {ra}")
+        if self.connection.query_char('Sd' + _format_dec(dec)) != '1':
+            raise ValueError(f"Mount rejected DEC {dec}")
+
+    def slew_to(self, ra, dec, wait=True):
+        self.logger.debug(f"[SLEW] Slewing to RA={ra}, DEC={dec}")
+        self._set_target(ra, dec)
+
+        reply = self.connection.query_with('MS', _read_goto)
+        if reply != '0':
+            raise RuntimeError(f"Slew refused: {reply[1:] or reply}")
+        self._remember(position_time=0.0, parking="Unparked")
+
+        if wait:
+            # :D# answers a bar of characters while slewing and an empty string when done
+            if not self._poll_until(lambda: not self.connection.query('D').strip(), SLEW_POLL_SECONDS, SLEW_TIMEOUT):
+                self.logger.debug("[SLEW] Deadline reached, mount still slewing")
+                return {"status": "Slewing to coordinates", "ra": ra, "dec": dec, "partial": True}
+            self.logger.debug("[SLEW] Slew completed")
+
+        return {"status": "Slewing to coordinates", "ra": ra, "dec": dec}
+
+    def sync_to(self, ra, dec):
+        self.logger.debug(f"[SYNC] Syncing to RA={ra}, DEC={dec}")
+        self._set_target(ra, dec)
+        self.connection.query('CM')
+        self._remember(position={"ra": ra, "dec": dec}, position_time=time.monotonic())
+        return {"status": "success", "ra": ra, "dec": dec}
+
+    def abort_motion(self):
+        self.connection.send_urgent('Q')
+        self._remember(position_time=0.0)
+
+    def park(self):
+        self.connection.send_urgent('hP')
+        self._remember(parking="Parked", position_time=0.0)
+
+    def unpark(self):
+        # Autostar II / LX200GPS wake-up; classic LX200 mounts have no park state
+        self.connection.send('hW')
+        self._remember(parking="Unparked")
+
+    def get_parking_status(self):
+        with self._lock:
+            return self.state["parking"]
+
+    def get_park_position(self):
+        with self._lock:
+            return dict(self.state["park_position"])
+
+    def set_park_position(self, ra, dec, ha=None):
+        self._remember(park_position={"ra": ra, "dec": dec})
+
+    def set_park_option(self, option):
+        if option == "PARK_CURRENT":
+            pos = self.get_coordinates()
+            self.set_park_position(pos["ra"], pos["dec"])
+        elif option == "PARK_DEFAULT":
+            self.set_park_position(0, 0)
+        else:
+            raise ValueError(f"Option '{option}' not supported")
+
+    def move(self, direction: str):
+        """Moves telescope in a specified direction."""
+        direction = direction.lower()
+
+        if direction == "stop":
+            self.abort_motion()
+            return {"status": "Telescope motion stopped"}
 
-    def move(self, direction: str) -> str:
         command = movement.get(direction)
         if not command:
-            raise ValueError(f"Invalid movement direction: {direction}")
-        response = self.telescope.send_command(command)
-        return self._check_response(response)
+            raise ValueError(f"Invalid direction: {direction}")
+
+        self.connection.send(command)
+        self._remember(position_time=0.0)
+        return {"status": f"Telescope moving {direction}"}
+
+    def _read_clock(self):
+        """Returns the mount's UTC time and UTC offset (hours east), cached and extrapolated."""
+        with self._lock:
+            if self.state["utc"] and time.monotonic() - self.state["utc_time"] < TIME_CACHE_SECONDS:
+                elapsed = time.monotonic() - self.state["utc_time"]
+                return self.state["utc"] + timedelta(seconds=elapsed), self.state["offset"]
+
+        local_time = self.connection.query('GL')
+        local_date = self.connection.query('GC')
+        # :GG# is the number of hours to add to local time to get UTC
+        offset = -float(self.connection.query('GG')) or 0.0
+        local = datetime.strptime(f"{local_date} {local_time}", "%m/%d/%y %H:%M:%S")
+        utc = local - timedelta(hours=offset)
+        self._remember(utc=utc, utc_time=time.monotonic(), offset=offset)
+        return utc, offset
+
+    def get_utc_time(self):
+        utc, offset = self._read_clock()
+        return utc.strftime("%Y-%m-%d"), utc.strftime("%H:%M:%S"), f"{offset:.2f}"
+
+    def set_utc_time(self, date, time_str, offset):
+        """Sets the UTC time and offset; LX200 mounts keep local time, so both are converted."""
+        offset = float(offset)
+        utc = datetime.strptime(f"{date}T{time_str}", "%Y-%m-%dT%H:%M:%S")
+        local = utc + timedelta(hours=offset)
+
+        if self.connection.query_char(f"SG{-offset:+05.1f}") != '1':
+            raise RuntimeError("Mount rejected UTC offset")
+        if self.connection.query_char('SL' + local.strftime("%H:%M:%S")) != '1':
+            raise RuntimeError("Mount rejected local time")
+        if self.connection.query_with('SC' + local.strftime("%m/%d/%y"), _read_set_date) != '1':
+            raise RuntimeError("Mount rejected date")
+        self._remember(utc=utc, utc_time=time.monotonic(), offset=offset)
+
+    def get_time(self):
+        _, utc_time, offset = self.get_utc_time()
+        return utc_time, offset
+
+    def set_time(self, new_time, new_offset):
+        date, _, _ = self.get_utc_time()
+        self.set_utc_time(date, new_time.strftime('%H:%M:%S'), new_offset)
 
-    def align(self, mode: str) -> str:
-        command = alignment.get(mode)
+    def get_date(self):
+        date, _, _ = self.get_utc_time()
+        return date
+
+    def set_date(self, new_date):
+        _, utc_time, offset = self.get_utc_time()
+        self.set_utc_time(new_date.strftime('%Y-%m-%d'), utc_time, offset)
+
+    def get_tracking_state(self):
+        with self._lock:
+            tracking = self.state["tracking"]
+        if tracking is None:
+            # Autostar II :GW# answers e.g. 'PT1' (mount, Tracking/No tracking, alignment);
+            # older models never answer it and are taken to be tracking
+            status = self.connection.probe('GW')
+            tracking = status is None or status[1:2] == 'T'
+            self._remember(tracking=tracking)
+        return tracking
+
+    def set_tracking_state(self, state):
+        # Polar mode tracks, land mode stops the drives
+        self.connection.send('AP' if state else 'AL')
+        self._remember(tracking=bool(state))
+        return {"status": "Tracking state set", "state": "on" if state else "off"}
+
+    def get_track_mode(self):
+        with self._lock:
+            return self.state["track_mode"]
+
+    def set_track_mode(self, mode):
+        command = track_modes.get(mode)
         if not command:
-            raise ValueError(f"Invalid alignment mode: {mode}")
-        response = self.telescope.send_command(command)
-        return self._check_response(response)
+            raise RuntimeError(f"Track mode {mode} not supported")
+        self.connection.send(command)
+        self._remember(track_mode=mode)
+
+    def get_slew_rate(self):
+        with self._lock:
+            return {"rates": list(slew_rates), "current": self.state["slew_rate"]}
 
-    def get_info(self, info_type: str) -> str:
-        command = information.get(info_type)
+    def set_slew_rate(self, rate_name):
+        command = slew_rates.get(rate_name)
         if not command:
-            raise ValueError(f"Invalid info request: {info_type}")
-        response = self.telescope.send_command_receive(command)
-        return self._check_response(response)
-
-    def set_time(self, type_: str, value: str) -> str:
-        command_prefix = date.get(type_)
-        if not command_prefix:
-            raise ValueError(f"Invalid time command: {type_}")
-        response = self.telescope.send_command_receive(command_prefix + value)
-        return self._check_response(response)
-
-    def convert_dec(self, dec: str) -> str:
-        if '*' in dec:
-            return dec
-        parts = dec.split(':', 1)
-        return parts[0] + '*' + parts[1] if len(parts) == 2 else dec
-
-    def slew_to(self, ra: str, dec: str) -> str:
-        lx200_dec = self.convert_dec(dec)
-
-        if not re.match(ra_pattern, ra):
-            raise ValueError(f"Invalid RA format: {ra}")
-        if not re.match(dec_pattern, lx200_dec):
-            raise ValueError(f"Invalid DEC format: {dec}")
-
-        resp1 = self.telescope.send_command_receive(coordinates['RA'] + ra)
-        resp2 = self.telescope.send_command_receive(coordinates['DEC'] + lx200_dec)
-        resp3 = self.telescope.send_command_receive(coordinates['MOVE'])
-
-        self._check_response(resp1)
-        self._check_response(resp2)
-        return self._check_response(resp3)
-
-    def get_current_position(self) -> dict:
-        ra = self.telescope.send_command_receive('GR')
-        dec = self.telescope.send_command_receive('GD')
-        ra = self._check_response(ra).strip()
-        dec = self._check_response(dec).strip()
-        return {"ra": ra, "dec": dec}
+            raise ValueError(f"Invalid slew rate: {rate_name}")
+        self.connection.send(command)
+        self._remember(slew_rate=rate_name)
+
+    def _read_site(self):
+        latitude = _parse_sexagesimal(self.connection.query('Gt'))
+        # LX200 longitudes are positive westwards; INDI uses 0-360 eastwards
+        longitude = (-_parse_sexagesimal(self.connection.query('Gg'))) % 360
+        site = {"latitude": latitude, "longitude": longitude}
+        self._remember(site=site)
+        return site
+
+    def get_site_coords(self):
+        with self._lock:
+            site = self.state["site"]
+            elevation = self.state["elevation"]
+        if site is None:
+            site = self._read_site()
+        return {**site, "elevation": elevation}
+
+    def set_site_coords(self, latitude, longitude, elevation):
+        self.logger.info(f"[LX200 CONTROLLER] Setting site coordinates: LAT={latitude}, LONG={longitude}, ELEV={elevation}")
+        latitude, longitude = float(latitude), float(longitude)
+
+        sign = '-' if latitude < 0 else '+'
+        lat_minutes = round(abs(latitude) * 60)
+        if self.connection.query_char(f"St{sign}{lat_minutes // 60:02d}*{lat_minutes % 60:02d}") != '1':
+            raise RuntimeError("Mount rejected latitude")
+
+        west_minutes = round(((-longitude) % 360) * 60) % (360 * 60)
+        if self.connection.query_char(f"Sg{west_minutes // 60:03d}*{west_minutes % 60:02d}") != '1':
+            raise RuntimeError("Mount rejected longitude")
+
+        # Elevation has no LX200 command: it only lives in the cache
+        self._remember(site={"latitude": latitude, "longitude": longitude % 360}, elevation=float(elevation))
+        return {"status": "Site coordinates set", "latitude": latitude, "longitude": longitude, "elevation": elevation}
+
+    def load_config(self):
+        """LX200 mounts keep their own settings: re-read them into the cache."""
+        self._remember(site=None, utc=None, tracking=None, position_time=0.0)
+        self.get_site_coords()
+        self._read_clock()
+        return {"status": "success"}
+
+    def set_focuser_motion(self, direction):
+        command = focuser_motions.get(direction)
+        if not command:
+            raise ValueError(f"Invalid focuser direction: {direction}")
+
+        with self._lock:
+            duration = self.state["focus_timer"]
+
+        self.connection.send(command)
+        self.connection.loop.call_soon_threadsafe(self._schedule_focus_stop, duration)
+
+    def _schedule_focus_stop(self, duration):
+        """Runs on the I/O loop: LX200 focusers have no timer, so stop after FOCUS_TIMER ms."""
+        if self._focus_stop is not None:
+            self._focus_stop.cancel()
+            self._focus_stop = None
+        if duration > 0:
+            self._focus_stop = self.connection.loop.call_later(
+                duration / 1000.0, lambda: self.connection.loop.create_task(self.connection._exchange('FQ', None)))
+
+    def set_focuser_speed(self, speed):
+        speed = int(round(float(speed)))
+        if not 1 <= speed <= 4:
+            raise ValueError("Focuser speed must be between 1 and 4")
+        self.connection.send(f"F{speed}")
+        self._remember(focus_speed=float(speed))
+
+    def get_focuser_speed(self):
+        with self._lock:
+            return {"speed": self.state["focus_speed"]}
+
+    def set_focuser_timer(self, duration):
+        self._remember(focus_timer=float(duration))
+
+    def get_focuser_timer(self):
+        with self._lock:
+            return {"timer": self.state["focus_timer"]}
+
+    def set_focuser_abort_motion(self, abort):
+        if abort:
+            self.connection.loop.call_soon_threadsafe(self._schedule_focus_stop, 0)
+            self.connection.send('FQ')
@@ -1,14 +1,371 @@
 from abc import ABC, abstractmethod
+import functools
+import logging
+import threading
+import time
+
+import deadline
+import tracing
+
+
+class CommandCancelled(Exception):
+    """Raised inside a command whose wait was preempted by an emergency command."""
+
+
+class TelescopeDisconnectedError(RuntimeError):
+    """Raised at once by controller calls while the link to the mount is down."""
+
+
+class TrackRateUnsupportedError(RuntimeError):
+    """Raised by set_track_rate when the mount has no custom tracking rates."""
+
+
+# Controller methods that must keep working while the link is down: connecting,
+# health checks and the command/link bookkeeping below
+_LINK_FREE_METHODS = {
+    "connect", "disconnect", "is_connected", "health_check", "link_status", "add_link_listener",
+    "mark_connected", "mark_disconnected", "begin_command", "end_command", "cancel_waits", "notify_update",
+    "add_state_listener",
+}
+
+# Settings worth keeping across restarts (see state_store.py): key -> (read, apply)
+SETTINGS = {
+    "site": (lambda c: c.get_site_coords(),
+             lambda c, v: c.set_site_coords(v["latitude"], v["longitude"], v["elevation"])),
+    "slewRate": (lambda c: c.get_slew_rate()["current"], lambda c, v: c.set_slew_rate(v)),
+    "trackMode": (lambda c: c.get_track_mode(), lambda c, v: c.set_track_mode(v)),
+    # Mounts parked by hour angle keep that instead of an RA that drifts with the sidereal time
+    "parkPosition": (lambda c: _park_setting(c.get_park_position()),
+                     lambda c, v: c.set_park_position(v.get("ra"), v["dec"], ha=v.get("ha"))),
+    "focuserSpeed": (lambda c: c.get_focuser_speed()["speed"], lambda c, v: c.set_focuser_speed(v)),
+    "focuserTimer": (lambda c: c.get_focuser_timer()["timer"], lambda c, v: c.set_focuser_timer(v)),
+}
+
+# Values that belong to a running task rather than to the mount's setup, and are never saved:
+# the non-sidereal tracker switches to TRACK_CUSTOM only while it runs
+UNSAVED_VALUES = {
+    "trackMode": ("TRACK_CUSTOM",),
+}
+
+
+def _park_setting(position):
+    if position.get("ha") is None:
+        return position
+    return {"ha": position["ha"], "dec": position["dec"]}
+
+
+def _requires_link(method):
+    @functools.wraps(method)
+    def guarded(self, *args, **kwargs):
+        if self._link_error is not None:
+            raise TelescopeDisconnectedError(f"Telescope disconnected: {self._link_error}")
+        return method(self, *args, **kwargs)
+    return guarded
+
+
+def _tracks_link(method):
+    """Wraps connect() so a successful call marks the link up and a failed one marks it down."""
+    @functools.wraps(method)
+    def connect(self, *args, **kwargs):
+        try:
+            result = method(self, *args, **kwargs)
+        except Exception as e:
+            self.mark_disconnected(f"connect failed: {e}")
+            raise
+        self.mark_connected()
+        return result
+    return connect
+
+
+def _marks_down(method):
+    @functools.wraps(method)
+    def disconnect(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            if self._link_error is None:  # keep the original reason if the link was already down
+                self.mark_disconnected("disconnected")
+    return disconnect
+
 
 class BaseTelescopeController(ABC):
+    def __init__(self):
+        self._wait_condition = threading.Condition()
+        self._cancel_generation = 0
+        self._update_generation = 0
+        self._command_local = threading.local()
+        self._link_error = "not connected yet"
+        self._link_changed = time.time()
+        self._link_listeners = []
+        self._state_listeners = []
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in BaseTelescopeController._guarded_methods:
+            if name in cls.__dict__:
+                setattr(cls, name, _requires_link(cls.__dict__[name]))
+        if "connect" in cls.__dict__:
+            cls.connect = _tracks_link(cls.__dict__["connect"])
+        if "disconnect" in cls.__dict__:
+            cls.disconnect = _marks_down(cls.__dict__["disconnect"])
+
+    # --- link state ---
+
+    def health_check(self):
+        """True if the link to the mount is usable; backends probe more deeply."""
+        return self.is_connected()
+
+    def link_status(self):
+        return {
+            "connected": self._link_error is None,
+            "error": self._link_error,
+            "since": self._link_changed,
+        }
+
+    def add_link_listener(self, listener):
+        """listener(connected: bool, reason) is called on every link state change."""
+        self._link_listeners.append(listener)
+
+    def add_state_listener(self, listener):
+        """listener(key, value) is called when the mount confirms a change to one of SETTINGS."""
+        self._state_listeners.append(listener)
+
+    def _state_changed(self, key, value):
+        if value is None:
+            return
+        for listener in self._state_listeners:
+            listener(key, value)
+
+    def read_setting(self, key):
+        return SETTINGS[key][0](self)
+
+    def apply_setting(self, key, value):
+        return SETTINGS[key][1](self, value)
+
+    def mark_connected(self):
+        if self._link_error is None:
+            return
+        self._link_error = None
+        self._link_changed = time.time()
+        logging.getLogger('BaseTelescopeController').info("Telescope link up")
+        for listener in self._link_listeners:
+            listener(True, None)
+
+    def mark_disconnected(self, reason):
+        """Fails every later call fast and wakes any command waiting on the mount."""
+        first = self._link_error is None
+        self._link_error = reason or "link lost"
+        if first:
+            self._link_changed = time.time()
+            logging.getLogger('BaseTelescopeController').warning(f"Telescope link down: {self._link_error}")
+        with self._wait_condition:
+            self._wait_condition.notify_all()
+        if first:
+            for listener in self._link_listeners:
+                listener(False, self._link_error)
+
+    def begin_command(self):
+        """Marks the start of a command on this thread; later cancellations preempt it."""
+        with self._wait_condition:
+            self._command_local.generation = self._cancel_generation
+
+    def end_command(self):
+        self._command_local.generation = None
+
+    def cancel_waits(self):
+        """Wakes every in-flight wait and makes the commands owning them raise CommandCancelled."""
+        with self._wait_condition:
+            self._cancel_generation += 1
+            self._wait_condition.notify_all()
+
+    def notify_update(self):
+        """Wakes waits polling the mount so they re-check it now (the INDI client calls this on property updates)."""
+        with self._wait_condition:
+            self._update_generation += 1
+            self._wait_condition.notify_all()
+
+    def _wait(self, seconds, wake_on_update=False):
+        """Sleeps like time.sleep, but raises as soon as waits are cancelled or the link drops.
+
+        The sleep never runs past the request deadline, and with wake_on_update
+        it also ends at the next notify_update().
+        """
+        remaining = deadline.remaining()
+        if remaining is not None:
+            seconds = min(seconds, remaining)
+        with self._wait_condition:
+            start = getattr(self._command_local, "generation", None)
+            if start is None:
+                start = self._cancel_generation
+            update = self._update_generation
+            self._wait_condition.wait_for(
+                lambda: self._cancel_generation != start or self._link_error is not None
+                or (wake_on_update and self._update_generation != update), timeout=seconds)
+            if self._link_error is not None:
+                raise TelescopeDisconnectedError(f"Telescope disconnected: {self._link_error}")
+            if self._cancel_generation != start:
+                raise CommandCancelled("Preempted by an emergency command")
+
+    def _poll_until(self, condition, interval, timeout):
+        """Waits until condition() is true, re-checking on every update and at least every interval.
+
+        Returns False if timeout or the request deadline passes first.
+        """
+        end = time.monotonic() + timeout
+        with tracing.span("controller.poll_until", timeout=timeout) as span:
+            polls = 0
+            while not condition():
+                left = min(end - time.monotonic(), deadline.remaining(default=interval))
+                if left <= 0:
+                    span.set(polls=polls, met=False)
+                    return False
+                self._wait(min(interval, left), wake_on_update=True)
+                polls += 1
+            span.set(polls=polls, met=True)
+        return True
+
+    @abstractmethod
+    def connect(self):
+        pass
+
+    @abstractmethod
+    def disconnect(self):
+        pass
+
+    @abstractmethod
+    def is_connected(self):
+        pass
+
+    @abstractmethod
+    def get_coordinates(self):
+        pass
+
+    @abstractmethod
+    def slew_to(self, ra, dec, wait=True):
+        pass
+
+    @abstractmethod
+    def sync_to(self, ra, dec):
+        pass
+
+    @abstractmethod
+    def abort_motion(self):
+        pass
+
+    @abstractmethod
+    def park(self):
+        pass
+
     @abstractmethod
-    def move(self, direction: str) -> str:
+    def unpark(self):
         pass
 
     @abstractmethod
-    def set_time(self, type_: str, value: str) -> str:
+    def get_parking_status(self):
         pass
 
     @abstractmethod
-    def slew_to(self, ra: str, dec: str) -> str:
+    def get_park_position(self):
         pass
+
+    @abstractmethod
+    def set_park_position(self, ra, dec, ha=None):
+        pass
+
+    @abstractmethod
+    def set_park_option(self, option):
+        pass
+
+    @abstractmethod
+    def move(self, direction: str):
+        pass
+
+    @abstractmethod
+    def get_utc_time(self):
+        pass
+
+    @abstractmethod
+    def set_utc_time(self, date, time, offset):
+        pass
+
+    @abstractmethod
+    def get_time(self):
+        pass
+
+    @abstractmethod
+    def set_time(self, new_time, new_offset):
+        pass
+
+    @abstractmethod
+    def get_date(self):
+        pass
+
+    @abstractmethod
+    def set_date(self, new_date):
+        pass
+
+    @abstractmethod
+    def get_tracking_state(self):
+        pass
+
+    @abstractmethod
+    def set_tracking_state(self, state):
+        pass
+
+    @abstractmethod
+    def set_track_mode(self, mode):
+        pass
+
+    @abstractmethod
+    def get_slew_rate(self):
+        pass
+
+    @abstractmethod
+    def set_slew_rate(self, rate_name):
+        pass
+
+    @abstractmethod
+    def get_site_coords(self):
+        pass
+
+    @abstractmethod
+    def set_site_coords(self, latitude, longitude, elevation):
+        pass
+
+    @abstractmethod
+    def load_config(self):
+        pass
+
+    # Optional capabilities: backends override what their hardware supports
+
+    def get_track_mode(self):
+        raise RuntimeError("Track mode not available")
+
+    def set_track_rate(self, ra_rate, dec_rate):
+        raise TrackRateUnsupportedError("Custom track rates not supported")
+
+    def set_focuser_motion(self, direction):
+        raise RuntimeError("Focuser not supported")
+
+    def set_focuser_speed(self, speed):
+        raise RuntimeError("Focuser not supported")
+
+    def get_focuser_speed(self):
+        raise RuntimeError("Focuser not supported")
+
+    def set_focuser_timer(self, duration):
+        raise RuntimeError("Focuser not supported")
+
+    def get_focuser_timer(self):
+        raise RuntimeError("Focuser not supported")
+
+    def set_focuser_abort_motion(self, abort):
+        raise RuntimeError("Focuser not supported")
+
+
+
+# Every public operation of the interface is guarded, including ones added later
+BaseTelescopeController._guarded_methods = frozenset(
+    name for name, value in vars(BaseTelescopeController).items()
+    if callable(value) and not name.startswith("_")
+) - _LINK_FREE_METHODS
@@ -0,0 +1,104 @@
+"""Abort latency under concurrent load, with and without command lanes.
+
+A number of load threads keep the controller busy with slews (which block
+polling for completion), site writes and position reads, while the main
+thread fires aborts. Latency is measured from the abort call until ':Q#'
+reaches the fake mount.
+
+    python benchmarks/bench_abort_latency.py --load 16 --iterations 200
+
+The "shared pool" run sends every command, aborts included, through one
+worker pool of the same size, which is how requests compete without lanes.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fake_lx200 import FakeLX200  # noqa: E402
+
+
+def load_worker(run, controller, stop):
+    # Short hops of a few degrees: each slew blocks its worker for one to two seconds
+    calls = [
+        lambda: run("interactive", controller.slew_to, random.uniform(0, 0.5), random.uniform(0, 6)),
+        lambda: run("background", controller.set_site_coords, 38.7, 350.9, 100.0),
+        lambda: run("interactive", controller.get_coordinates),
+    ]
+    while not stop.is_set():
+        try:
+            random.choice(calls)()
+        except Exception:
+            pass  # cancelled by the abort, which is the point
+
+
+def measure(run, controller, mount, load, iterations):
+    stop = threading.Event()
+    threads = [threading.Thread(target=load_worker, args=(run, controller, stop), daemon=True) for _ in range(load)]
+    for t in threads:
+        t.start()
+    time.sleep(0.5)
+
+    samples = []
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            run("emergency", controller.abort_motion)
+            samples.append((mount.wait_for("Q", start, timeout=30.0) - start) * 1000.0)
+            time.sleep(random.uniform(0.01, 0.05))
+    finally:
+        stop.set()
+        controller.cancel_waits()
+        for t in threads:
+            t.join(5)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    pct = lambda p: samples[min(len(samples) - 1, int(p / 100 * len(samples)))]
+    print(f"  {label:<14} {statistics.median(samples):8.2f} {pct(95):8.2f} {pct(99):8.2f} {samples[-1]:8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--load", type=int, default=16, help="concurrent load threads")
+    parser.add_argument("--workers", type=int, default=4, help="interactive workers (and shared pool size)")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    from LX200_controller import LX200Controller
+    from command_scheduler import CommandScheduler
+
+    mount = FakeLX200()
+    mount.start()
+    controller = LX200Controller(host="127.0.0.1", port=mount.port)
+    controller.connect()
+    print(f"{args.load} load threads, {args.workers} workers, {args.iterations} aborts")
+    print(f"  {'':<14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+
+    shared = ThreadPoolExecutor(args.workers)
+    report("shared pool", measure(lambda lane, fn, *a: shared.submit(fn, *a).result(),
+                                  controller, mount, args.load, args.iterations))
+    shared.shutdown(wait=False, cancel_futures=True)
+
+    scheduler = CommandScheduler(controller, interactive_workers=args.workers, background_workers=1,
+                                 emergency_budget_ms=args.budget_ms)
+    samples = measure(scheduler.run, controller, mount, args.load, args.iterations)
+    report("command lanes", samples)
+    over = sum(s > args.budget_ms for s in samples)
+    print(f"\n{over} of {len(samples)} aborts over the {args.budget_ms:.0f} ms budget")
+
+    scheduler.shutdown()
+    controller.disconnect()
+
+
+if __name__ == "__main__":
+    main()
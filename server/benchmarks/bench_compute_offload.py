@@ -0,0 +1,121 @@
+"""Control-command latency while heavy catalog jobs run, inline and in the compute pool.
+
+A synthetic minor-body catalog is propagated over and over (with the
+position cache cleared each time) by a few request-like threads,
+while the main thread jogs a fake LX200 mount through the command
+scheduler. Latency is measured from the move call until ':Mn#' or ':Ms#'
+reaches the mount, first with the catalog computed on the calling thread,
+then with the work sent to the compute pool.
+
+    python benchmarks/bench_compute_offload.py --bodies 1000000 --heavy 2
+
+Run it from the server directory, where de421.bsp is.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from compute_pool import ComputePool  # noqa: E402
+
+
+def synthetic_catalog(ephemeris, ts, bodies, seed=1):
+    from minor_bodies import MinorBodyCatalog, _orientation
+
+    rng = np.random.default_rng(seed)
+    a = rng.uniform(1.8, 3.5, bodies)
+    e = rng.uniform(0.0, 0.3, bodies)
+    p, qv = _orientation(rng.uniform(0, 360, bodies), rng.uniform(0, 360, bodies), rng.uniform(0, 30, bodies))
+    catalog = MinorBodyCatalog(ephemeris, ts)
+    catalog._append([(f"synthetic {i}", []) for i in range(bodies)], a * (1 - e), e,
+                    2460000.0 + rng.uniform(0, 2000, bodies), p, qv)
+    return catalog
+
+
+def heavy_worker(catalog, unix_time, stop, done):
+    while not stop.is_set():
+        catalog._cache.clear()
+        catalog.positions(unix_time)
+        done.append(time.perf_counter())
+
+
+def measure(run, controller, mount, catalog, heavy, duration, unix_time):
+    stop = threading.Event()
+    done = []
+    threads = [threading.Thread(target=heavy_worker, args=(catalog, unix_time, stop, done), daemon=True)
+               for _ in range(heavy)]
+    for t in threads:
+        t.start()
+    time.sleep(0.5)
+
+    samples = []
+    end = time.perf_counter() + duration
+    directions = (("north", "Mn"), ("south", "Ms"))
+    while time.perf_counter() < end:
+        direction, command = directions[len(samples) % 2]
+        start = time.perf_counter()
+        run("interactive", controller.move, direction)
+        samples.append((mount.wait_for(command, start, timeout=30.0) - start) * 1000.0)
+        time.sleep(0.02)
+    stop.set()
+    jobs_per_second = len(done) / duration
+    for t in threads:
+        t.join()
+    return samples, jobs_per_second
+
+
+def report(label, samples, jobs_per_second):
+    samples = sorted(samples)
+    pct = lambda p: samples[min(len(samples) - 1, int(p / 100 * len(samples)))]
+    print(f"  {label:<14} {statistics.median(samples):8.2f} {pct(95):8.2f} {pct(99):8.2f} {samples[-1]:8.2f}"
+          f" {jobs_per_second:9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bodies", type=int, default=1000000)
+    parser.add_argument("--heavy", type=int, default=2, help="threads issuing catalog jobs")
+    parser.add_argument("--workers", type=int, default=2, help="compute pool processes")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per configuration")
+    parser.add_argument("--ephemeris", default="de421.bsp")
+    parser.add_argument("--time", type=float, default=None, help="unix time to propagate to (default now)")
+    args = parser.parse_args()
+
+    # Fork the workers before anything below starts a thread
+    pool = ComputePool(args.workers)
+    pool.start()
+
+    from skyfield.api import load
+    from fake_lx200 import FakeLX200
+    from LX200_controller import LX200Controller
+    from command_scheduler import CommandScheduler
+
+    mount = FakeLX200()
+    mount.start()
+    controller = LX200Controller(host="127.0.0.1", port=mount.port)
+    controller.connect()
+    scheduler = CommandScheduler(controller)
+
+    catalog = synthetic_catalog(load(args.ephemeris), load.timescale(), args.bodies)
+    unix_time = time.time() if args.time is None else args.time
+    print(f"{args.bodies} bodies, {args.heavy} heavy threads, {args.workers} workers, {args.duration:.0f} s each")
+    print(f"  {'':<14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'jobs/s':>9}")
+
+    report("no load", *measure(scheduler.run, controller, mount, catalog, 0, args.duration, unix_time))
+    report("inline", *measure(scheduler.run, controller, mount, catalog, args.heavy, args.duration, unix_time))
+    catalog.pool = pool
+    report("compute pool", *measure(scheduler.run, controller, mount, catalog, args.heavy, args.duration, unix_time))
+
+    scheduler.shutdown()
+    controller.disconnect()
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
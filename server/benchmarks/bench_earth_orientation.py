@@ -0,0 +1,81 @@
+"""Earth orientation from the bundled table against astropy's and Skyfield's own data: cost and agreement.
+
+Times the sidereal clock's Earth-rotation snapshot with astropy's IERS
+tables and with the table, and a UT1 - UTC lookup for one time and for an
+array. Then compares Delta T from Skyfield with UT1 from astropy over the
+coming year, before and after the table is installed in both, and the
+sidereal time from the two snapshot paths.
+
+    python benchmarks/bench_earth_orientation.py --table earth_orientation.npz --times 100000
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from astropy.time import Time  # noqa: E402
+from astropy.utils import iers  # noqa: E402
+from skyfield.api import load  # noqa: E402
+
+import earth_orientation  # noqa: E402
+import sidereal  # noqa: E402
+
+
+def per_call(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def delta_t_gap(ts, days):
+    """Largest |Skyfield Delta T - astropy TT - UT1| in ms over days from now."""
+    unix = time.time() + days * 86400.0
+    t = Time(unix, format="unix")
+    astropy_delta_t = ((t.tt.jd1 - t.ut1.jd1) + (t.tt.jd2 - t.ut1.jd2)) * 86400.0
+    return float(np.max(np.abs(ts.from_astropy(t).delta_t - astropy_delta_t))) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--table", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                                                        "earth_orientation.npz"))
+    parser.add_argument("--times", type=int, default=100000, help="unix times in the array lookup")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+    iers.conf.auto_download = False
+    iers.conf.auto_max_age = None
+
+    now = time.time()
+    days = np.linspace(0, 365, 366)
+    clock = sidereal.SiderealClock()
+    before = clock._compute_anchor(now)
+    astropy_anchor = per_call(lambda: clock._compute_anchor(now), 200)
+    gap_before = delta_t_gap(load.timescale(), days)
+
+    table = earth_orientation.install(args.table)
+    after = clock._compute_anchor(now)
+    table_anchor = per_call(lambda: clock._compute_anchor(now), 200)
+    scalar = per_call(lambda: table.ut1_utc(now), 10000)
+    unix = now + np.random.default_rng(1).uniform(-5, 5, args.times) * 365 * 86400
+    array = per_call(lambda: table.ut1_utc(unix), 20)
+    gap_after = delta_t_gap(table.timescale(), days)
+
+    status = table.status()
+    print(f"table {status['start']} to {status['end']}, predicted from {status['predictedFrom']}")
+    print(f"Earth-rotation snapshot: astropy {astropy_anchor * 1e3:.2f} ms, table {table_anchor * 1e6:.0f} us")
+    print(f"UT1 - UTC lookup: {scalar * 1e6:.1f} us for one time, {array / args.times * 1e9:.0f} ns per time "
+          f"for {args.times}")
+    print(f"Skyfield Delta T vs astropy UT1 over the next year: {gap_before:.1f} ms apart with their own data, "
+          f"{gap_after:.3f} ms with the table")
+    print(f"sidereal time, astropy snapshot vs table snapshot: {abs(before.gast - after.gast) * 3.6e9:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
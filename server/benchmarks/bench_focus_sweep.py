@@ -0,0 +1,89 @@
+"""Step timing of the server-side focus sweep, idle and with busy threads alongside it.
+
+The sweep drives a stub focuser that records when each start and stop
+command arrives. Reported per run: how late starts and stops were against
+their deadlines, and how far each move's length was from the one asked for.
+Runs are repeated with --load threads spinning in Python (the GIL contention
+of a busy server), and with the final spin-wait turned off, to show what it
+buys.
+
+    python benchmarks/bench_focus_sweep.py --steps 50 --duration 100 --settle 0.05 --load 1
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import focus_sweep  # noqa: E402
+
+
+class RecordingFocuser:
+    def __init__(self):
+        self.starts, self.stops = [], []
+
+    def set_focuser_speed(self, speed):
+        pass
+
+    def set_focuser_timer(self, duration):
+        pass
+
+    def set_focuser_motion(self, direction):
+        self.starts.append(time.monotonic())
+
+    def set_focuser_abort_motion(self, abort):
+        if abort:
+            self.stops.append(time.monotonic())
+
+
+def busy(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def run(args, load, spin):
+    focus_sweep.SPIN_SECONDS = spin
+    stop = threading.Event()
+    threads = [threading.Thread(target=busy, args=(stop,), daemon=True) for _ in range(load)]
+    for thread in threads:
+        thread.start()
+    sweep = focus_sweep.FocusSweep(RecordingFocuser())
+    sweep.start("FOCUS_OUTWARD", [args.duration] * args.steps, args.settle)
+    events, sent, finished = [], 0, False
+    while not finished:
+        new, finished = sweep.events(sent, timeout=1)
+        events += new
+        sent += len(new)
+    stop.set()
+    steps = [event for event in events if event["type"] == "step"]
+    late = lambda key: np.abs([event[key] for event in steps])
+    length = np.abs(np.diff(np.array([sweep.controller.starts, sweep.controller.stops]), axis=0)[0] * 1000.0
+                    - args.duration)
+    return late("startJitterMs"), late("stopJitterMs"), length
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=100.0, help="ms per step")
+    parser.add_argument("--settle", type=float, default=0.05, help="seconds between steps")
+    parser.add_argument("--load", type=int, default=1, help="busy threads for the loaded runs")
+    args = parser.parse_args()
+
+    print(f"{args.steps} steps of {args.duration:.0f} ms, {os.cpu_count()} CPUs")
+    print(f"{'run':<28} {'start p50/max ms':>17} {'stop p50/max ms':>17} {'length err p50/max ms':>22}")
+    spin = focus_sweep.SPIN_SECONDS
+    runs = [("idle", 0, spin), (f"{args.load} busy threads", args.load, spin),
+            (f"{args.load} busy threads, no spin", args.load, 0.0)]
+    for name, load, spin in runs:
+        start, stop, length = run(args, load, spin)
+        cell = lambda a: f"{np.median(a):.2f} / {a.max():.2f}"
+        print(f"{name:<28} {cell(start):>17} {cell(stop):>17} {cell(length):>22}")
+
+
+if __name__ == "__main__":
+    main()
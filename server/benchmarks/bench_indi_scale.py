@@ -0,0 +1,162 @@
+"""INDI command throughput and latency as the number of simulated mounts grows.
+
+For each mount count, a FakeIndiServer is started and one client per mount
+connects the device, then issues a mix of the commands the platform sends
+(slews, tracking, slew rate, site, time, focuser) in a closed loop. Latency is
+measured from sending a new*Vector until the server's matching set*Vector
+arrives; throughput counts acknowledged commands and the position updates
+the simulator pushes to every client.
+
+    python benchmarks/bench_indi_scale.py --mounts 1,10,100,300 --duration 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import sys
+import time
+import xml.etree.ElementTree as ElementTree
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fake_indi import FakeIndiServer, NUMBER, SWITCH, TEXT  # noqa: E402
+
+
+def _vector(kind, device, name, values):
+    items = "".join(
+        f'<one{kind} name="{k}">{("On" if v else "Off") if kind == SWITCH else v}</one{kind}>'
+        for k, v in values.items())
+    return f'<new{kind}Vector device="{device}" name="{name}">{items}</new{kind}Vector>\n'.encode()
+
+
+def _commands(device):
+    rates = ["SLEW_GUIDE", "SLEW_CENTERING", "SLEW_FIND", "SLEW_MAX"]
+    rate = random.choice(rates)
+    return random.choice([
+        (NUMBER, "EQUATORIAL_EOD_COORD", {"RA": random.uniform(0, 24), "DEC": random.uniform(-30, 80)}),
+        (SWITCH, "TELESCOPE_TRACK_STATE", {"TRACK_ON": True, "TRACK_OFF": False}),
+        (SWITCH, "TELESCOPE_SLEW_RATE", {r: r == rate for r in rates}),
+        (NUMBER, "GEOGRAPHIC_COORD", {"LAT": 38.7, "LONG": 350.9, "ELEV": 100.0}),
+        (TEXT, "TIME_UTC", {"UTC": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()), "OFFSET": "0.00"}),
+        (NUMBER, "FOCUS_SPEED", {"FOCUS_SPEED_VALUE": random.randint(1, 4)}),
+    ])
+
+
+class Probe:
+    """A minimal INDI client for one device."""
+
+    def __init__(self, device):
+        self.device = device
+        self.waiting = {}   # property name -> future resolved by the next set/def vector
+        self.defined = set()
+        self.pushed = 0
+        self.reader = None
+        self.writer = None
+
+    async def connect(self, host, port):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self._task = asyncio.create_task(self._read())
+        self.writer.write(f'<getProperties version="1.7" device="{self.device}"/>\n'.encode())
+        defined = self._expect("EQUATORIAL_EOD_COORD")
+        self.writer.write(_vector(SWITCH, self.device, "CONNECTION", {"CONNECT": True, "DISCONNECT": False}))
+        await asyncio.wait_for(defined, 30)
+
+    def _expect(self, name):
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[name] = future
+        return future
+
+    async def _read(self):
+        parser = ElementTree.XMLPullParser(events=("start", "end"))
+        parser.feed(b"<indi>")
+        root, depth = None, 0
+        while True:
+            data = await self.reader.read(65536)
+            if not data:
+                return
+            parser.feed(data)
+            for event, element in parser.read_events():
+                if event == "start":
+                    depth += 1
+                    root = root if root is not None else element
+                    continue
+                depth -= 1
+                if depth != 1:
+                    continue
+                name = element.get("name")
+                if element.tag.startswith(("set", "def")):
+                    self.pushed += 1
+                    future = self.waiting.pop(name, None)
+                    if future is not None and not future.done():
+                        future.set_result(time.perf_counter())
+                root.remove(element)
+
+    async def command(self, kind, name, values):
+        reply = self._expect(name)
+        start = time.perf_counter()
+        self.writer.write(_vector(kind, self.device, name, values))
+        return (await asyncio.wait_for(reply, 10)) - start
+
+    def close(self):
+        self._task.cancel()
+        self.writer.close()
+
+
+async def drive(endpoints, host, duration, interval):
+    probes = [Probe(device) for port, devices in endpoints for device in devices]
+    ports = {device: port for port, devices in endpoints for device in devices}
+    start = time.perf_counter()
+    await asyncio.gather(*(p.connect(host, ports[p.device]) for p in probes))
+    connect_seconds = time.perf_counter() - start
+
+    latencies = []
+    stop = time.perf_counter() + duration
+
+    async def loop(probe):
+        await asyncio.sleep(random.uniform(0, interval))  # spread the first commands out
+        while time.perf_counter() < stop:
+            latencies.append(await probe.command(*_commands(probe.device)))
+            await asyncio.sleep(interval)
+
+    pushed_before = sum(p.pushed for p in probes)
+    started = time.perf_counter()
+    await asyncio.gather(*(loop(p) for p in probes))
+    elapsed = time.perf_counter() - started
+    pushed = sum(p.pushed for p in probes) - pushed_before
+    for p in probes:
+        p.close()
+    return connect_seconds, np.array(latencies) * 1000.0, elapsed, pushed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mounts", default="1,10,100,300", help="comma-separated mount counts")
+    parser.add_argument("--devices-per-port", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of load per mount count")
+    parser.add_argument("--interval", type=float, default=0.1, help="pause between a client's commands, seconds")
+    parser.add_argument("--poll", type=float, default=1.0, help="simulator position refresh, seconds")
+    args = parser.parse_args()
+
+    # Each mount costs up to three descriptors (listener, server side, client side)
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    print(f"{args.devices_per_port} device(s) per port, {args.interval * 1000:.0f} ms between commands, "
+          f"{args.poll:.1f} s position polls")
+    print(f"{'mounts':>7} {'connect s':>10} {'cmd/s':>9} {'push/s':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mounts in (int(m) for m in args.mounts.split(",")):
+        server = FakeIndiServer(mounts, args.devices_per_port, poll_seconds=args.poll)
+        endpoints = server.start()
+        connect, latencies, elapsed, pushed = asyncio.run(drive(endpoints, server.host, args.duration, args.interval))
+        server.stop()
+        print(f"{mounts:>7} {connect:>10.2f} {len(latencies) / elapsed:>9.0f} {pushed / elapsed:>9.0f} "
+              f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 95):>8.2f} "
+              f"{np.percentile(latencies, 99):>8.2f} {latencies.max():>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Command-to-mount latency of the direct LX200 backend vs. the INDI path.
+
+Both paths drive the same in-process fake LX200 mount, which timestamps
+every command it receives, so the measured latency is the time from the
+controller call until the bytes reach the mount.
+
+    python benchmarks/bench_lx200_latency.py               # direct LX200 only
+    python benchmarks/bench_lx200_latency.py --indi        # also via indiserver + indi_lx200autostar
+
+The INDI run needs PyIndi and the indiserver / indi_lx200autostar binaries.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fake_lx200 import FakeLX200  # noqa: E402
+
+COMMANDS = [
+    ("abort", lambda c: c.abort_motion(), "Q"),
+    ("move north", lambda c: c.move("north"), "Mn"),
+]
+
+
+def measure(controller, mount, iterations):
+    results = {}
+    for name, call, command in COMMANDS:
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            call(controller)
+            samples.append((mount.wait_for(command, start) - start) * 1000.0)
+            time.sleep(0.01)
+        results[name] = samples
+    return results
+
+
+def report(label, results):
+    print(f"\n{label}")
+    print(f"  {'command':<12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, samples in results.items():
+        samples = sorted(samples)
+        pct = lambda p: samples[min(len(samples) - 1, int(p / 100 * len(samples)))]
+        print(f"  {name:<12} {statistics.median(samples):8.2f} {pct(95):8.2f} {pct(99):8.2f} {samples[-1]:8.2f}")
+
+
+def run_direct(mount, iterations):
+    from LX200_controller import LX200Controller
+
+    controller = LX200Controller(host="127.0.0.1", port=mount.port)
+    controller.connect()
+    try:
+        return measure(controller, mount, iterations)
+    finally:
+        controller.disconnect()
+
+
+def run_indi(mount, iterations, indi_port, driver, device_name):
+    if not shutil.which("indiserver") or not shutil.which(driver):
+        print(f"\nSkipping INDI path: indiserver or {driver} not installed")
+        return None
+
+    from indi_controller import IndiTelescopeController
+
+    server = subprocess.Popen(["indiserver", "-p", str(indi_port), driver],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        time.sleep(1.0)
+        controller = IndiTelescopeController(host="localhost", port=indi_port, device_name=device_name,
+                                             device_address="127.0.0.1", device_port=mount.port)
+        controller.connect()
+        try:
+            return measure(controller, mount, iterations)
+        finally:
+            controller.disconnect()
+    finally:
+        server.terminate()
+        server.wait(5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--indi", action="store_true", help="also benchmark REST -> PyIndi -> indiserver -> driver")
+    parser.add_argument("--indi-port", type=int, default=7625)
+    parser.add_argument("--driver", default="indi_lx200autostar")
+    parser.add_argument("--device", default="LX200 Autostar")
+    args = parser.parse_args()
+
+    mount = FakeLX200()
+    mount.start()
+    print(f"Fake LX200 mount listening on 127.0.0.1:{mount.port}, {args.iterations} iterations per command")
+
+    report("Direct LX200 (asyncio streams)", run_direct(mount, args.iterations))
+    if args.indi:
+        results = run_indi(mount, args.iterations, args.indi_port, args.driver, args.device)
+        if results:
+            report(f"INDI ({args.driver} via indiserver)", results)
+
+
+if __name__ == "__main__":
+    main()
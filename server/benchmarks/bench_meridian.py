@@ -0,0 +1,58 @@
+"""Meridian flip planning for a queue of targets: one vectorized pass, per-target calls, and the cache.
+
+Plans random targets for one site three ways: all in one MeridianPlanner
+pass (what /api/target-lists/<name>/meridian does), the same plan again
+from the cache, and one call per target under its own cache key (what a
+loop over the queue would cost).
+
+    python benchmarks/bench_meridian.py --targets 100000 --loop 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import meridian  # noqa: E402
+from horizon import HorizonMask  # noqa: E402
+
+LATITUDE, LONGITUDE = 32.6656, -16.9241
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", type=int, default=100000)
+    parser.add_argument("--loop", type=int, default=2000, help="targets planned one call at a time")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    ra, dec = rng.uniform(0, 24, args.targets), rng.uniform(-60, 89, args.targets)
+    planner = meridian.MeridianPlanner(10, 0, HorizonMask(default_altitude=0).min_altitude, 58)
+    now = time.time()
+    planner.plan("warm-up", ra[:10], dec[:10], LATITUDE, LONGITUDE, now)
+
+    start = time.perf_counter()
+    plan = planner.plan("queue", ra, dec, LATITUDE, LONGITUDE, now)
+    vectorized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    planner.plan("queue", ra, dec, LATITUDE, LONGITUDE, now)
+    cached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(args.loop):
+        planner.plan(("target", i), ra[i], dec[i], LATITUDE, LONGITUDE, now)
+    loop = (time.perf_counter() - start) / args.loop
+
+    reasons, counts = np.unique(plan["reason"].astype(str), return_counts=True)
+    print(f"{args.targets} targets: vectorized {vectorized * 1000:.0f} ms ({vectorized / args.targets * 1e6:.2f} us per target)")
+    print(f"per-target calls: {loop * 1e6:.0f} us per target, {loop * args.targets:.1f} s for the queue")
+    print(f"cached: {cached * 1e6:.0f} us")
+    print("flip reasons: " + ", ".join(f"{r} {c}" for r, c in zip(reasons, counts)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Cost of a pointing model update per sync and of correcting a slew target, and how well it points.
+
+A mount with known systematic errors (the --error arcseconds spread over the
+model's terms, plus --noise of centring scatter) is synced on random stars
+above 20 degrees; after each sync the time to refit is measured, and at the
+end the corrected slews to random targets are compared with where the mount
+really points.
+
+    python benchmarks/bench_pointing_model.py --points 40 --targets 10000
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pointing_model  # noqa: E402
+import sidereal  # noqa: E402
+
+LATITUDE, LONGITUDE = 32.6656, -16.9241
+
+
+def sky(rng, count):
+    """Random hour angles (hours) and declinations (degrees) more than 20 degrees above the horizon."""
+    has, decs = [], []
+    while len(has) < count:
+        ha, dec = rng.uniform(-6, 6), rng.uniform(-30, 85)
+        h, d, p = math.radians(ha * 15), math.radians(dec), math.radians(LATITUDE)
+        if math.sin(p) * math.sin(d) + math.cos(p) * math.cos(d) * math.cos(h) > math.sin(math.radians(20)):
+            has.append(ha)
+            decs.append(dec)
+    return np.array(has), np.array(decs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=40, help="syncs")
+    parser.add_argument("--targets", type=int, default=10000, help="corrected slews to time and check")
+    parser.add_argument("--error", type=float, default=300.0, help="typical size of each term (arcsec)")
+    parser.add_argument("--noise", type=float, default=5.0, help="centring scatter per sync (arcsec)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    true_terms = rng.normal(0, args.error, len(pointing_model.TERMS))
+    unix = time.time()
+    zero = np.zeros(2)  # shift of the simulated mount's zero from the syncs so far
+
+    def reading(ra, dec, noise=0.0):
+        ha = sidereal.clock.hour_angle(ra, LONGITUDE, unix)
+        x, y = pointing_model.design(math.radians(ha * 15), math.radians(dec), math.radians(LATITUDE))[0] @ true_terms
+        d_ha = x / math.cos(math.radians(dec)) - zero[0] + rng.normal(0, noise)
+        d_dec = y - zero[1] + rng.normal(0, noise)
+        return (ra - d_ha / 54000.0) % 24.0, dec + d_dec / 3600.0
+
+    model = pointing_model.PointingModel(os.path.join(tempfile.mkdtemp(), "pointing_model.json"))
+    update_times = []
+    for ha, dec in zip(*sky(rng, args.points)):
+        ra = sidereal.clock.ra_from_hour_angle(ha, LONGITUDE, unix)
+        mount_ra, mount_dec = reading(ra, dec, args.noise)
+        start = time.perf_counter()
+        residual = model.add_point(ra, dec, mount_ra, mount_dec, LATITUDE, LONGITUDE, unix)
+        update_times.append(time.perf_counter() - start)
+        zero += (residual["ha"], residual["dec"])
+
+    targets = [(sidereal.clock.ra_from_hour_angle(ha, LONGITUDE, unix), dec) for ha, dec in zip(*sky(rng, args.targets))]
+    start = time.perf_counter()
+    corrected = [model.correct(ra, dec, LATITUDE, LONGITUDE, unix) for ra, dec in targets]
+    correct_us = (time.perf_counter() - start) / len(targets) * 1e6
+
+    errors, uncorrected = [], []
+    for (ra, dec), (mount_ra, mount_dec) in zip(targets, corrected):
+        expected_ra, expected_dec = reading(ra, dec)  # what the mount reads when really on the target
+        cos_dec = math.cos(math.radians(dec))
+        errors.append(math.hypot(((mount_ra - expected_ra + 12) % 24 - 12) * 54000 * cos_dec,
+                                 (mount_dec - expected_dec) * 3600))
+        uncorrected.append(math.hypot(((ra - expected_ra + 12) % 24 - 12) * 54000 * cos_dec, (dec - expected_dec) * 3600))
+
+    status = model.status()
+    print(f"{args.points} syncs: update {statistics.median(update_times) * 1e6:.0f} us median "
+          f"(includes saving the JSON), fit RMS {status['rms']:.1f}\"")
+    print(f"{'term':>5} {'true':>9} {'fitted':>9} {'sigma':>7}")
+    for name, value in zip(pointing_model.TERMS, true_terms):
+        term = status["terms"][name]
+        print(f"{name:>5} {value:>9.1f} {term['arcsec']:>9.1f} {term['sigma'] or float('nan'):>7.1f}")
+    print(f"correct(): {correct_us:.2f} us per target")
+    print(f"pointing error over {len(targets)} targets: median {np.median(errors):.1f}\", 95% {np.percentile(errors, 95):.1f}\" "
+          f"(without the model: median {np.median(uncorrected):.0f}\", 95% {np.percentile(uncorrected, 95):.0f}\")")
+
+
+if __name__ == "__main__":
+    main()
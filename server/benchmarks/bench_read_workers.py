@@ -0,0 +1,129 @@
+"""Read throughput of read_worker.py as workers are added, and what it costs the control process.
+
+This process stands in for the control server: a TelemetryPublisher mirrors
+stub read endpoints shaped like the real ones. For each worker count,
+read_worker.py is started on a scratch port and load processes poll
+/api/coordinates over keep-alive connections for a while. The report
+gives requests per second, latency percentiles, and the CPU time the
+publishing process used meanwhile, which should stay flat however hard
+the workers are hit.
+
+    python benchmarks/bench_read_workers.py --workers 1,2,4 --clients 8 --duration 5
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from flask import Flask, jsonify
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, SERVER_DIR)
+
+from telemetry import TelemetryPublisher  # noqa: E402
+
+
+def stub_app():
+    app = Flask(__name__)
+
+    @app.route("/api/coordinates")
+    def coordinates():
+        return jsonify({"status": "success", "position": {"ra": 5.5 + time.time() % 1e-3, "dec": -5.4},
+                        "alt": 41.2, "az": 172.9})
+
+    @app.route("/api/site")
+    def site():
+        return jsonify({"status": "success", "site": {"latitude": 38.7, "longitude": 350.9, "elevation": 50.0}})
+
+    @app.route("/api/track-state")
+    def track_state():
+        return jsonify({"status": "success", "isTracking": True})
+
+    return app
+
+
+def client(port, seconds, queue):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    latencies = []
+    errors = 0
+    stop = time.perf_counter() + seconds
+    while time.perf_counter() < stop:
+        start = time.perf_counter()
+        try:
+            connection.request("GET", "/api/coordinates")
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        latencies.append(time.perf_counter() - start)
+    queue.put((latencies, errors))
+
+
+def wait_for(port, seconds=10.0):
+    stop = time.monotonic() + seconds
+    while time.monotonic() < stop:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/api/coordinates")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("Read workers did not come up")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--clients", type=int, default=8, help="load-generating processes")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of load per worker count")
+    parser.add_argument("--port", type=int, default=7190)
+    args = parser.parse_args()
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "telemetry.sock")
+    publisher = TelemetryPublisher(stub_app(), {"/api/coordinates": 0.25, "/api/site": 5.0, "/api/track-state": 1.0},
+                                   socket_path, 0.25)
+    publisher.start()
+    env = dict(os.environ, TELEMETRY_SOCKET=socket_path)
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} client processes, {args.duration:.0f} s per run")
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'publisher CPU %':>16}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        process = subprocess.Popen([sys.executable, "read_worker.py", "--workers", str(workers),
+                                    "--host", "127.0.0.1", "--port", str(args.port)],
+                                   cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(args.port)
+            queue = multiprocessing.Queue()
+            clients = [multiprocessing.Process(target=client, args=(args.port, args.duration, queue))
+                       for _ in range(args.clients)]
+            cpu_before, wall_before = time.process_time(), time.perf_counter()
+            for c in clients:
+                c.start()
+            results = [queue.get() for _ in clients]
+            for c in clients:
+                c.join()
+            cpu = time.process_time() - cpu_before
+            wall = time.perf_counter() - wall_before
+        finally:
+            process.terminate()
+            process.wait()
+        latencies = np.concatenate([np.array(r[0]) for r in results]) * 1000.0
+        errors = sum(r[1] for r in results)
+        print(f"{workers:>7} {len(latencies) / args.duration:>9.0f} {np.percentile(latencies, 50):>8.2f} "
+              f"{np.percentile(latencies, 99):>8.2f} {errors:>7} {100.0 * cpu / wall:>16.2f}")
+        time.sleep(1.0)  # let the port and the old subscribers go
+
+
+if __name__ == "__main__":
+    main()
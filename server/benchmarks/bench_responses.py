@@ -0,0 +1,128 @@
+"""Serialization time and bytes on the wire for the bulk endpoints.
+
+Builds a target-list page and a mosaic plan the size of the largest the API
+returns, and serializes them the old way (per-element float()/int() and the
+stdlib encoder behind jsonify) and through responses.py: row objects from
+tolist()ed columns, and ?layout=columns with the NumPy arrays as they are.
+Each body is then sized raw, gzipped and brotli-compressed at the levels the
+server uses, plus as MessagePack. Encoders that are not installed are skipped.
+
+    python benchmarks/bench_responses.py --rows 10000 --pointings 20000
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import responses  # noqa: E402
+
+
+def synthetic(rows, pointings, seed=1):
+    rng = np.random.default_rng(seed)
+    target_page = {
+        "index": np.arange(rows),
+        "name": np.array([f"NGC {i}" for i in rng.integers(1, 7840, rows)], dtype=object),
+        "ra": rng.uniform(0, 24, rows),
+        "dec": rng.uniform(-30, 90, rows),
+        "alt": rng.uniform(-90, 90, rows),
+        "az": rng.uniform(0, 360, rows),
+        "culmination": rng.uniform(-30, 90, rows),
+        "visibility": rng.choice(np.array(["ok", "low", "belowHorizon", "neverRises"], dtype=object), rows),
+        "line": np.arange(2, rows + 2),
+    }
+    best = rng.uniform(1.76e9, 1.76e9 + 36000, pointings)
+    best[rng.random(pointings) < 0.1] = np.nan
+    mosaic = {
+        "index": np.arange(pointings),
+        "name": [f"Mosaic {r}-{c}" for r, c in zip(np.arange(pointings) // 200 + 1, np.arange(pointings) % 200 + 1)],
+        "ra": rng.uniform(0, 24, pointings),
+        "dec": rng.uniform(-30, 90, pointings),
+        "row": np.arange(pointings) // 200,
+        "column": np.arange(pointings) % 200,
+        "alt": rng.uniform(0, 90, pointings),
+        "az": rng.uniform(0, 360, pointings),
+        "observableMinutes": rng.choice(np.arange(0, 600, 10.0), pointings),
+        "bestTime": [None if t != t else time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t)) for t in best.tolist()],
+        "bestAltitude": np.where(np.isnan(best), np.nan, rng.uniform(20, 58, pointings)),
+    }
+    return {"target list page": target_page, "mosaic": mosaic}
+
+
+def old_rows(columns):
+    """The per-element conversion the routes used to do."""
+    keys = list(columns)
+    n = len(columns[keys[0]])
+    convert = {key: (float if isinstance(v, np.ndarray) and v.dtype.kind == "f" else
+                     int if isinstance(v, np.ndarray) and v.dtype.kind == "i" else
+                     (lambda x: x)) for key, v in columns.items()}
+    rows = []
+    for i in range(n):
+        row = {}
+        for key in keys:
+            value = columns[key][i]
+            row[key] = None if isinstance(value, float) and value != value else convert[key](value)
+        rows.append(row)
+    return rows
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        times.append(time.perf_counter() - start)
+    return body, statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="target-list page size (the API caps it at 10000)")
+    parser.add_argument("--pointings", type=int, default=20000, help="mosaic pointings")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    provider = responses.FastJSONProvider(app)
+    stdlib = lambda obj: json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()  # what jsonify did
+    print(f"orjson: {'yes' if responses.orjson else 'no'}, brotli: {'yes' if responses.brotli else 'no'}, "
+          f"msgpack: {'yes' if responses.msgpack else 'no'}")
+
+    for name, columns in synthetic(args.rows, args.pointings).items():
+        print(f"\n{name} ({len(columns['index'])} rows)")
+        print(f"  {'variant':<30} {'build+encode':>12} {'raw':>10} {'gzip':>10} {'brotli':>10} {'msgpack':>10}")
+        variants = {
+            "old: per-element, stdlib": lambda: stdlib({"status": "success", "rows": old_rows(columns)}),
+        }
+        new = lambda: provider.dumpb({"status": "success", "rows": responses.columns(**columns)})
+        variants["rows via tolist(), provider"] = new
+        variants["layout=columns, provider"] = new
+
+        for variant, build in variants.items():
+            context = app.test_request_context("/?layout=columns" if "layout" in variant else "/")
+            with context:
+                body, ms = timed(build, args.repeat)
+                gz, gz_ms = timed(lambda: gzip.compress(body, compresslevel=responses.GZIP_LEVEL, mtime=0), args.repeat)
+                br = br_ms = None
+                if responses.brotli:
+                    br, br_ms = timed(lambda: responses.brotli.compress(body, quality=responses.BROTLI_QUALITY),
+                                      args.repeat)
+                packed = None
+                if responses.msgpack:
+                    obj = {"status": "success", "rows": responses.columns(**columns) if "old" not in variant
+                           else old_rows(columns)}
+                    packed = responses.msgpack.packb(obj, default=responses._default)
+            size = lambda b, t=None: "-" if b is None else f"{len(b) / 1024:.0f} KB" + (f"/{t:.0f}ms" if t else "")
+            print(f"  {variant:<30} {ms:>10.1f}ms {size(body):>10} {size(gz, gz_ms):>10} "
+                  f"{size(br, br_ms):>10} {size(packed):>10}")
+
+
+if __name__ == "__main__":
+    main()
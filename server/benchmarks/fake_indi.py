@@ -0,0 +1,450 @@
+"""An in-process INDI server simulating many telescope mounts, for scale tests.
+
+Speaks the INDI XML protocol for the properties IndiTelescopeController
+uses: connection, EQUATORIAL_EOD_COORD with a Busy -> Ok slew model, park,
+motion, tracking, slew rate, time, site, config and focuser. Every mount is
+a few Python objects on one event loop, so hundreds fit in one process;
+devices are spread over as many listening sockets as asked for (one per
+mount, like one indiserver each, or several per port, like one indiserver
+with many drivers).
+
+    python benchmarks/fake_indi.py --mounts 200 --devices-per-port 200 --port 7624
+
+Devices are named "Mount Simulator 1", "Mount Simulator 2", ... and can be
+driven by IndiTelescopeController with INDI_DEVICE set to one of them.
+"""
+import argparse
+import asyncio
+import math
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import deque
+from xml.sax.saxutils import escape, quoteattr
+
+POLL_SECONDS = 1.0  # position refresh period, the Telescope Simulator's default POLLMS
+SLEW_SPEED = 4.0    # degrees per second on each axis
+MOTION_SPEEDS = {"SLEW_GUIDE": 0.004, "SLEW_CENTERING": 0.13, "SLEW_FIND": 1.0, "SLEW_MAX": 4.0}
+
+NUMBER, SWITCH, TEXT = "Number", "Switch", "Text"
+CONNECTION_PROPERTIES = ("CONNECTION", "CONNECTION_MODE", "DEVICE_ADDRESS")  # defined before connecting
+
+
+def _timestamp():
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime())
+
+
+def _format(kind, value):
+    if kind == SWITCH:
+        return "On" if value else "Off"
+    if kind == NUMBER:
+        return repr(float(value))
+    return escape(str(value))
+
+
+class _Property:
+    __slots__ = ("kind", "name", "group", "perm", "rule", "elements", "state")
+
+    def __init__(self, kind, name, group, elements, perm="rw", rule="OneOfMany"):
+        self.kind = kind
+        self.name = name
+        self.group = group
+        self.perm = perm
+        self.rule = rule
+        self.elements = dict(elements)  # element name -> float, bool or str
+        self.state = "Idle"
+
+
+class SimulatedMount:
+    """One virtual mount: its INDI properties and a simple slew model."""
+
+    def __init__(self, name, emit):
+        self.name = name
+        self.emit = emit  # emit(device_name, xml) sends to the clients watching this device
+        self.properties = {}
+        self.ra = 0.0
+        self.dec = 90.0
+        self.target = None
+        self.slew_from = None
+        self.slew_start = None
+        self.parking = False
+        self.motion = {"NS": 0, "WE": 0}
+        self.motion_time = None
+        self.focus_done = None
+
+        self._add(SWITCH, "CONNECTION", "Main Control", {"CONNECT": False, "DISCONNECT": True})
+        self._add(SWITCH, "CONNECTION_MODE", "Connection", {"CONNECTION_SERIAL": True, "CONNECTION_TCP": False})
+        self._add(TEXT, "DEVICE_ADDRESS", "Connection", {"ADDRESS": "127.0.0.1", "PORT": "4030"})
+
+    def _add(self, kind, name, group, elements, **kwargs):
+        self.properties[name] = _Property(kind, name, group, elements, **kwargs)
+
+    def _define_mount_properties(self):
+        self._add(NUMBER, "EQUATORIAL_EOD_COORD", "Main Control", {"RA": self.ra, "DEC": self.dec})
+        self._add(SWITCH, "ON_COORD_SET", "Main Control", {"TRACK": True, "SLEW": False, "SYNC": False})
+        self._add(SWITCH, "TELESCOPE_ABORT_MOTION", "Main Control", {"ABORT": False}, rule="AtMostOne")
+        self._add(SWITCH, "TELESCOPE_PARK", "Main Control", {"PARK": False, "UNPARK": True})
+        self._add(NUMBER, "TELESCOPE_PARK_POSITION", "Site Management", {"PARK_RA": 0.0, "PARK_DEC": 90.0})
+        self._add(SWITCH, "TELESCOPE_PARK_OPTION", "Site Management",
+                  {"PARK_CURRENT": False, "PARK_DEFAULT": False, "PARK_WRITE_DATA": False}, rule="AtMostOne")
+        self._add(SWITCH, "TELESCOPE_MOTION_NS", "Motion Control", {"MOTION_NORTH": False, "MOTION_SOUTH": False},
+                  rule="AtMostOne")
+        self._add(SWITCH, "TELESCOPE_MOTION_WE", "Motion Control", {"MOTION_WEST": False, "MOTION_EAST": False},
+                  rule="AtMostOne")
+        self._add(SWITCH, "TELESCOPE_SLEW_RATE", "Motion Control", {rate: rate == "SLEW_MAX" for rate in MOTION_SPEEDS})
+        self._add(SWITCH, "TELESCOPE_TRACK_STATE", "Main Control", {"TRACK_ON": True, "TRACK_OFF": False})
+        self._add(SWITCH, "TELESCOPE_TRACK_MODE", "Main Control",
+                  {"TRACK_SIDEREAL": True, "TRACK_SOLAR": False, "TRACK_LUNAR": False, "TRACK_CUSTOM": False})
+        self._add(NUMBER, "TELESCOPE_TRACK_RATE", "Main Control", {"TRACK_RATE_RA": 15.041067, "TRACK_RATE_DE": 0.0})
+        self._add(TEXT, "TIME_UTC", "Site Management", {"UTC": _timestamp(), "OFFSET": "0.00"})
+        self._add(NUMBER, "GEOGRAPHIC_COORD", "Site Management", {"LAT": 38.7, "LONG": 350.9, "ELEV": 100.0})
+        self._add(SWITCH, "CONFIG_PROCESS", "Options",
+                  {"CONFIG_LOAD": False, "CONFIG_SAVE": False, "CONFIG_DEFAULT": False}, rule="AtMostOne")
+        self._add(SWITCH, "FOCUS_MOTION", "Focuser", {"FOCUS_INWARD": True, "FOCUS_OUTWARD": False})
+        self._add(NUMBER, "FOCUS_SPEED", "Focuser", {"FOCUS_SPEED_VALUE": 1.0})
+        self._add(NUMBER, "FOCUS_TIMER", "Focuser", {"FOCUS_TIMER_VALUE": 0.0})
+        self._add(SWITCH, "FOCUS_ABORT_MOTION", "Focuser", {"ABORT": False}, rule="AtMostOne")
+
+    @property
+    def connected(self):
+        return self.properties["CONNECTION"].elements["CONNECT"]
+
+    # --- XML ---
+
+    def definition(self, prop):
+        kind = prop.kind
+        rule = f' rule="{prop.rule}"' if kind == SWITCH else ""
+        items = "".join(
+            f'<def{kind} name="{name}" label="{name}">{_format(kind, value)}</def{kind}>'
+            for name, value in prop.elements.items())
+        return (f'<def{kind}Vector device={quoteattr(self.name)} name="{prop.name}" label="{prop.name}" '
+                f'group="{prop.group}" state="{prop.state}" perm="{prop.perm}"{rule} timeout="60" '
+                f'timestamp="{_timestamp()}">{items}</def{kind}Vector>\n')
+
+    def definitions(self, name=None):
+        return [self.definition(p) for p in self.properties.values() if name is None or p.name == name]
+
+    def _set(self, prop, state=None):
+        if state is not None:
+            prop.state = state
+        kind = prop.kind
+        items = "".join(f'<one{kind} name="{name}">{_format(kind, value)}</one{kind}>'
+                        for name, value in prop.elements.items())
+        self.emit(self.name, f'<set{kind}Vector device={quoteattr(self.name)} name="{prop.name}" '
+                             f'state="{prop.state}" timestamp="{_timestamp()}">{items}</set{kind}Vector>\n')
+
+    # --- client commands ---
+
+    def handle_new(self, kind, name, values):
+        """Applies a new{kind}Vector from a client and emits the resulting updates."""
+        prop = self.properties.get(name)
+        if prop is None or prop.kind != kind:
+            return
+        if kind == SWITCH and prop.rule != "AnyOfMany" and any(values.values()):
+            prop.elements = {element: False for element in prop.elements}
+        prop.elements.update((k, v) for k, v in values.items() if k in prop.elements)
+
+        handler = getattr(self, "_new_" + name.lower(), None)
+        if handler is not None:
+            handler(prop)
+        else:
+            self._set(prop, "Ok")
+
+    def _new_connection(self, prop):
+        if prop.elements["CONNECT"] and "EQUATORIAL_EOD_COORD" not in self.properties:
+            self._set(prop, "Ok")
+            self._define_mount_properties()
+            for mount_prop in self.properties.values():
+                if mount_prop.name not in CONNECTION_PROPERTIES:
+                    self.emit(self.name, self.definition(mount_prop))
+        elif prop.elements["DISCONNECT"]:
+            for name in [n for n in self.properties if n not in CONNECTION_PROPERTIES]:
+                del self.properties[name]
+                self.emit(self.name, f'<delProperty device={quoteattr(self.name)} name="{name}" '
+                                     f'timestamp="{_timestamp()}"/>\n')
+            self._set(prop, "Idle")
+        else:
+            self._set(prop, "Ok")
+
+    def _new_equatorial_eod_coord(self, prop):
+        target = (prop.elements["RA"] % 24.0, max(-90.0, min(90.0, prop.elements["DEC"])))
+        prop.elements.update(RA=self.ra, DEC=self.dec)
+        if self.properties["ON_COORD_SET"].elements["SYNC"]:
+            self.ra, self.dec = target
+            prop.elements.update(RA=self.ra, DEC=self.dec)
+            self._set(prop, "Ok")
+            return
+        self._start_slew(target)
+
+    def _start_slew(self, target):
+        self.slew_from = self._position(time.monotonic())
+        self.target = target
+        self.slew_start = time.monotonic()
+        self._set(self.properties["EQUATORIAL_EOD_COORD"], "Busy")
+
+    def _new_telescope_abort_motion(self, prop):
+        now = time.monotonic()
+        self.ra, self.dec = self._position(now)
+        self.slew_start = None
+        self.parking = False
+        self.motion = {"NS": 0, "WE": 0}
+        prop.elements["ABORT"] = False
+        self._set(prop, "Ok")
+        coords = self.properties["EQUATORIAL_EOD_COORD"]
+        coords.elements.update(RA=self.ra, DEC=self.dec)
+        self._set(coords, "Idle")
+
+    def _new_telescope_park(self, prop):
+        if prop.elements["PARK"]:
+            position = self.properties["TELESCOPE_PARK_POSITION"].elements
+            self.parking = True
+            self._set(prop, "Busy")
+            self._start_slew((position["PARK_RA"], position["PARK_DEC"]))
+        else:
+            self._set(prop, "Ok")
+
+    def _new_telescope_motion_ns(self, prop):
+        self._start_motion("NS", prop, "MOTION_NORTH", "MOTION_SOUTH")
+
+    def _new_telescope_motion_we(self, prop):
+        self._start_motion("WE", prop, "MOTION_WEST", "MOTION_EAST")
+
+    def _start_motion(self, axis, prop, positive, negative):
+        now = time.monotonic()
+        self.ra, self.dec = self._position(now)
+        self.motion_time = now
+        self.motion[axis] = 1 if prop.elements[positive] else -1 if prop.elements[negative] else 0
+        self._set(prop, "Busy" if self.motion[axis] else "Idle")
+
+    def _new_config_process(self, prop):
+        prop.elements = {element: False for element in prop.elements}
+        self._set(prop, "Ok")
+
+    def _new_focus_timer(self, prop):
+        self.focus_done = time.monotonic() + prop.elements["FOCUS_TIMER_VALUE"] / 1000.0
+        self._set(prop, "Busy")
+
+    def _new_focus_abort_motion(self, prop):
+        self.focus_done = None
+        prop.elements["ABORT"] = False
+        self._set(prop, "Ok")
+        self._set(self.properties["FOCUS_TIMER"], "Idle")
+
+    # --- mount model ---
+
+    def _position(self, now):
+        ra, dec = self.ra, self.dec
+        if self.slew_start is not None:
+            elapsed = now - self.slew_start
+            (ra0, dec0), (ra1, dec1) = self.slew_from, self.target
+            dra = ((ra1 - ra0 + 12) % 24) - 12
+            step_ra = math.copysign(min(abs(dra), SLEW_SPEED / 15.0 * elapsed), dra)
+            step_dec = math.copysign(min(abs(dec1 - dec0), SLEW_SPEED * elapsed), dec1 - dec0)
+            ra, dec = (ra0 + step_ra) % 24, dec0 + step_dec
+        elif self.motion_time is not None and (self.motion["NS"] or self.motion["WE"]):
+            rates = self.properties["TELESCOPE_SLEW_RATE"].elements
+            speed = MOTION_SPEEDS[next((r for r, on in rates.items() if on), "SLEW_MAX")] * (now - self.motion_time)
+            ra = (ra + self.motion["WE"] * speed / 15.0) % 24
+            dec = max(-90.0, min(90.0, dec + self.motion["NS"] * speed))
+        return ra, dec
+
+    def tick(self, now):
+        """Advances the model and pushes the position, as a driver does every poll."""
+        if not self.connected or "EQUATORIAL_EOD_COORD" not in self.properties:
+            return
+        coords = self.properties["EQUATORIAL_EOD_COORD"]
+        ra, dec = self._position(now)
+        state = coords.state
+        if self.slew_start is not None:
+            state = "Busy"
+            (ra0, dec0), (ra1, dec1) = self.slew_from, self.target
+            duration = max(abs(((ra1 - ra0 + 12) % 24) - 12) * 15.0, abs(dec1 - dec0)) / SLEW_SPEED
+            if now - self.slew_start >= duration:
+                ra, dec = self.ra, self.dec = self.target
+                self.slew_start = None
+                state = "Ok"
+                if self.parking:
+                    self.parking = False
+                    self._set(self.properties["TELESCOPE_PARK"], "Ok")
+        elif self.motion["NS"] or self.motion["WE"]:
+            self.ra, self.dec, self.motion_time = ra, dec, now
+            state = "Busy"
+        elif state == "Busy":
+            state = "Ok"
+        coords.elements.update(RA=ra, DEC=dec)
+        self._set(coords, state)
+
+        if self.focus_done is not None and now >= self.focus_done:
+            self.focus_done = None
+            self._set(self.properties["FOCUS_TIMER"], "Ok")
+
+
+class _Endpoint:
+    """One listening socket and the clients connected to it."""
+
+    def __init__(self, server, mounts, port):
+        self.server = server
+        self.mounts = {mount.name: mount for mount in mounts}
+        self.port = port
+        self.clients = {}  # writer -> set of watched device names, or None for all
+        self.listener = None
+
+    def broadcast(self, device, text):
+        data = text.encode()
+        for writer, watched in list(self.clients.items()):
+            if watched is None or device in watched:
+                writer.write(data)
+                self.server.messages_out += 1
+
+    async def serve_client(self, reader, writer):
+        parser = ElementTree.XMLPullParser(events=("start", "end"))
+        parser.feed(b"<indi>")  # the stream is a sequence of top-level elements without a root
+        root = None
+        depth = 0
+        self.clients[writer] = set()
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                parser.feed(data)
+                for event, element in parser.read_events():
+                    if event == "start":
+                        depth += 1
+                        if root is None:
+                            root = element
+                        continue
+                    depth -= 1
+                    if depth == 1:
+                        self._handle(writer, element)
+                        root.remove(element)
+                await writer.drain()
+        except (ConnectionError, ElementTree.ParseError, asyncio.CancelledError):
+            pass
+        finally:
+            self.clients.pop(writer, None)
+            writer.close()
+
+    def _handle(self, writer, element):
+        self.server.messages_in += 1
+        device = element.get("device")
+        name = element.get("name")
+        if element.tag == "getProperties":
+            watched = self.clients.get(writer)
+            if device is None:
+                self.clients[writer] = None
+            elif watched is not None:
+                watched.add(device)
+            for mount in self.mounts.values():
+                if device is None or mount.name == device:
+                    for definition in mount.definitions(name):
+                        writer.write(definition.encode())
+                        self.server.messages_out += 1
+            return
+
+        mount = self.mounts.get(device)
+        if mount is None or not element.tag.startswith("new") or not element.tag.endswith("Vector"):
+            return
+        kind = element.tag[3:-6]
+        values = {}
+        for item in element:
+            text = (item.text or "").strip()
+            if kind == NUMBER:
+                values[item.get("name")] = float(text)
+            elif kind == SWITCH:
+                values[item.get("name")] = text == "On"
+            else:
+                values[item.get("name")] = text
+        self.server.received.append((time.perf_counter(), device, name))
+        mount.handle_new(kind, name, values)
+
+
+class FakeIndiServer:
+    """Runs `mounts` simulated mounts on one event loop thread.
+
+    With devices_per_port=1 every mount gets its own socket; with a larger
+    value mounts share sockets the way drivers share one indiserver. Ports
+    are consecutive from `port`, or picked by the OS when port is 0.
+    """
+
+    def __init__(self, mounts=1, devices_per_port=1, host="127.0.0.1", port=0, poll_seconds=POLL_SECONDS,
+                 prefix="Mount Simulator"):
+        self.host = host
+        self.poll_seconds = poll_seconds
+        self.mounts = [SimulatedMount(f"{prefix} {i + 1}", self._emit) for i in range(mounts)]
+        self._endpoints = [
+            _Endpoint(self, self.mounts[i:i + devices_per_port], port + i // devices_per_port if port else 0)
+            for i in range(0, mounts, devices_per_port)
+        ]
+        self._endpoint_of = {mount.name: e for e in self._endpoints for mount in e.mounts.values()}
+        self.messages_in = 0
+        self.messages_out = 0
+        self.received = deque(maxlen=100000)  # (perf_counter, device, property)
+        self.loop = None
+        self._ready = threading.Event()
+        self._serving = None
+
+    def _emit(self, device, text):
+        self._endpoint_of[device].broadcast(device, text)
+
+    def endpoints(self):
+        """[(port, [device names])] for every listening socket."""
+        return [(e.port, list(e.mounts)) for e in self._endpoints]
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            now = time.monotonic()
+            for mount in self.mounts:
+                mount.tick(now)
+
+    async def _serve(self):
+        for endpoint in self._endpoints:
+            endpoint.listener = await asyncio.start_server(endpoint.serve_client, self.host, endpoint.port,
+                                                           backlog=1024)
+            endpoint.port = endpoint.listener.sockets[0].getsockname()[1]
+        self._ready.set()
+        await self._poll()
+
+    def start(self):
+        """Runs the simulator on a background thread; returns endpoints()."""
+        self._ready.clear()
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self._run_loop, name="fake-indi", daemon=True).start()
+        self._ready.wait(30)
+        return self.endpoints()
+
+    def _run_loop(self):
+        self._serving = self.loop.create_task(self._serve())
+        try:
+            self.loop.run_until_complete(self._serving)
+        except asyncio.CancelledError:
+            pass
+
+    def stop(self):
+        async def shutdown():
+            for endpoint in self._endpoints:
+                for writer in list(endpoint.clients):
+                    writer.transport.abort()
+                if endpoint.listener is not None:
+                    endpoint.listener.close()
+            await asyncio.sleep(0.05)
+            self._serving.cancel()
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7624, help="first port")
+    parser.add_argument("--mounts", type=int, default=1)
+    parser.add_argument("--devices-per-port", type=int, default=1)
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS, help="position refresh period, seconds")
+    args = parser.parse_args()
+    server = FakeIndiServer(args.mounts, args.devices_per_port, args.host, args.port, args.poll)
+    for port, devices in server.start():
+        print(f"{args.host}:{port}  {', '.join(devices)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
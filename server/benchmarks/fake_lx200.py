@@ -0,0 +1,242 @@
+"""A small in-process LX200 mount for benchmarks and offline development.
+
+Speaks enough of the Meade protocol for LX200Controller and the INDI
+LX200 drivers, and records when each command arrives so callers can
+measure command-to-mount latency on the same clock.
+
+    python benchmarks/fake_lx200.py --port 4030
+"""
+import argparse
+import asyncio
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+SLEW_SPEED = 4.0  # degrees per second on each axis
+
+
+def _ra(hours):
+    total = round((hours % 24) * 3600) % 86400
+    return f"{total // 3600:02d}:{total // 60 % 60:02d}:{total % 60:02d}"
+
+
+def _dec(degrees):
+    sign = '-' if degrees < 0 else '+'
+    total = round(abs(degrees) * 3600)
+    return f"{sign}{total // 3600:02d}\xdf{total // 60 % 60:02d}:{total % 60:02d}"
+
+
+def _parse(text):
+    sign = -1 if text.strip().startswith('-') else 1
+    parts = [float(p) for p in text.strip().lstrip('+-').replace('*', ':').replace('\xdf', ':').split(':') if p]
+    return sign * sum(p / 60 ** i for i, p in enumerate(parts))
+
+
+class FakeLX200:
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.ra = 0.0
+        self.dec = 0.0
+        self.target = (0.0, 0.0)
+        self.slew_start = None
+        self.slew_from = (0.0, 0.0)
+        self.latitude = 38.7
+        self.west_longitude = 9.1
+        self.utc_offset = 0.0  # hours to add to local time to get UTC
+        self.clock_offset = timedelta()
+        self.tracking = True
+        self.received = deque(maxlen=10000)  # (perf_counter, command)
+        self.loop = None
+        self._server = None
+        self._writers = set()
+        self._ready = threading.Event()
+
+    # --- mount model ---
+
+    def _position(self):
+        if self.slew_start is None:
+            return self.ra, self.dec
+        elapsed = time.monotonic() - self.slew_start
+        (ra0, dec0), (ra1, dec1) = self.slew_from, self.target
+        dra = ((ra1 - ra0 + 12) % 24) - 12
+
+        def step(delta, speed):
+            return delta if abs(delta) <= speed * elapsed else speed * elapsed * (1 if delta > 0 else -1)
+
+        ra = (ra0 + step(dra, SLEW_SPEED / 15.0)) % 24
+        dec = dec0 + step(dec1 - dec0, SLEW_SPEED)
+        if abs(step(dra, SLEW_SPEED / 15.0)) >= abs(dra) and abs(dec - dec1) < 1e-9:
+            self.ra, self.dec, self.slew_start = ra1, dec1, None
+            return ra1, dec1
+        return ra, dec
+
+    def _local_now(self):
+        return datetime.utcnow() + self.clock_offset - timedelta(hours=self.utc_offset)
+
+    def handle(self, command):
+        """Returns the reply bytes for one command (without ':' and '#')."""
+        self.received.append((time.perf_counter(), command))
+        c = command
+        if c == 'GR':
+            return _ra(self._position()[0]) + '#'
+        if c == 'GD':
+            return _dec(self._position()[1]) + '#'
+        if c.startswith('Sr'):
+            self.target = (_parse(c[2:]), self.target[1])
+            return '1'
+        if c.startswith('Sd'):
+            self.target = (self.target[0], _parse(c[2:]))
+            return '1'
+        if c == 'MS':
+            self.slew_from = self._position()
+            self.slew_start = time.monotonic()
+            return '0'
+        if c == 'CM':
+            self.ra, self.dec = self.target
+            self.slew_start = None
+            return 'Coordinates     matched.        #'
+        if c == 'D':
+            self._position()
+            return '\x7f#' if self.slew_start is not None else '#'
+        if c in ('Q', 'Qn', 'Qs', 'Qe', 'Qw'):
+            self.ra, self.dec = self._position()
+            self.slew_start = None
+            return ''
+        if c == 'Gt':
+            d = round(abs(self.latitude) * 60)
+            return f"{'-' if self.latitude < 0 else '+'}{d // 60:02d}\xdf{d % 60:02d}#"
+        if c == 'Gg':
+            d = round((self.west_longitude % 360) * 60)
+            return f"{d // 60:03d}\xdf{d % 60:02d}#"
+        if c.startswith('St'):
+            self.latitude = _parse(c[2:])
+            return '1'
+        if c.startswith('Sg'):
+            self.west_longitude = _parse(c[2:])
+            return '1'
+        if c == 'GL' or c == 'Ga':
+            return self._local_now().strftime('%H:%M:%S') + '#'
+        if c == 'GC':
+            return self._local_now().strftime('%m/%d/%y') + '#'
+        if c == 'GG':
+            return f"{self.utc_offset:+05.1f}#"
+        if c.startswith('SG'):
+            self.utc_offset = float(c[2:])
+            return '1'
+        if c.startswith('SL'):
+            local = datetime.strptime(self._local_now().strftime('%Y-%m-%d ') + c[2:], '%Y-%m-%d %H:%M:%S')
+            self.clock_offset = local + timedelta(hours=self.utc_offset) - datetime.utcnow()
+            return '1'
+        if c.startswith('SC'):
+            local = datetime.strptime(c[2:] + self._local_now().strftime(' %H:%M:%S'), '%m/%d/%y %H:%M:%S')
+            self.clock_offset = local + timedelta(hours=self.utc_offset) - datetime.utcnow()
+            return '1Updating Planetary Data#                              #'
+        if c == 'GW':
+            return f"P{'T' if self.tracking else 'N'}1#"
+        if c in ('AP', 'AL', 'AA'):
+            self.tracking = c != 'AL'
+            return ''
+        if c == 'Gc':
+            return '24#'
+        if c == 'GT':
+            return '60.1#'
+        if c == 'GVP':
+            return 'Autostar#'
+        if c == 'GVN':
+            return '43Eg#'
+        if c == 'GVD':
+            return 'Jan 01 2020#'
+        if c == 'GVT':
+            return '00:00:00#'
+        if c in ('GM', 'GN', 'GO', 'GP'):
+            return 'Site#'
+        if c == 'GH':
+            return '0#'
+        return ''
+
+    # --- networking ---
+
+    async def _client(self, reader, writer):
+        buffer = b''
+        self._writers.add(writer)
+        try:
+            while True:
+                data = await reader.read(256)
+                if not data:
+                    break
+                buffer += data
+                while buffer:
+                    if buffer[:1] == b'\x06':  # ACK: alignment query
+                        buffer = buffer[1:]
+                        writer.write(b'P')
+                        continue
+                    start = buffer.find(b':')
+                    end = buffer.find(b'#', start)
+                    if start < 0 or end < 0:
+                        break
+                    command = buffer[start + 1:end].decode('latin-1')
+                    buffer = buffer[end + 1:]
+                    reply = self.handle(command)
+                    if reply:
+                        writer.write(reply.encode('latin-1'))
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _serve(self):
+        self._server = await asyncio.start_server(self._client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self):
+        """Runs the server on a background thread and returns its port."""
+        self._ready.clear()
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self._run_loop, name="fake-lx200", daemon=True).start()
+        self._ready.wait(5)
+        return self.port
+
+    def _run_loop(self):
+        self._serving = self.loop.create_task(self._serve())
+        try:
+            self.loop.run_until_complete(self._serving)
+        except asyncio.CancelledError:
+            pass
+
+    def stop(self):
+        """Drops every client and stops listening, like a mount losing power; start() again to restore."""
+        async def shutdown():
+            for writer in list(self._writers):
+                writer.transport.abort()
+            await asyncio.sleep(0.05)  # let the resets go out before the loop exits
+            self._server.close()
+            self._serving.cancel()
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop)
+
+    def wait_for(self, command, after, timeout=5.0):
+        """Returns the arrival time of the first `command` received after perf_counter `after`."""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            for t, c in reversed(list(self.received)):
+                if t < after:
+                    break
+                if c == command:
+                    return t
+            time.sleep(0.0002)
+        raise TimeoutError(f"{command} never reached the mount")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4030)
+    args = parser.parse_args()
+    mount = FakeLX200(args.host, args.port)
+    asyncio.run(mount._serve())
@@ -0,0 +1,156 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import numpy as np
+
+import deadline
+import tracing
+from base_controller import CommandCancelled
+
+EMERGENCY = "emergency"      # abort, park: run at once, never queued
+INTERACTIVE = "interactive"  # move, slew, focuser: someone is waiting at the controls
+BACKGROUND = "background"    # config, time, site: can wait behind everything else
+LANES = (EMERGENCY, INTERACTIVE, BACKGROUND)
+
+LATENCY_SAMPLES = 1000  # emergency latencies kept for the stats endpoint
+RESULT_GRACE_SECONDS = 0.5  # lets a command that hit the deadline hand back its partial result
+
+
+class CommandScheduler:
+    """Runs controller commands in priority lanes.
+
+    Interactive and background commands each get their own small worker pool,
+    so a backlog of config or time writes can never hold up a jog. Emergency
+    commands skip the pools entirely and run on the calling thread: before
+    they execute, every queued command is cancelled and every command blocked
+    in a controller wait is woken with CommandCancelled, so an abort never
+    waits behind a slew that is still polling for completion.
+    """
+
+    def __init__(self, controller, interactive_workers=4, background_workers=1, emergency_budget_ms=50.0):
+        self.controller = controller
+        self.emergency_budget_ms = emergency_budget_ms
+        self.logger = logging.getLogger('CommandScheduler')
+        self._executors = {
+            INTERACTIVE: ThreadPoolExecutor(interactive_workers, thread_name_prefix="cmd-interactive"),
+            BACKGROUND: ThreadPoolExecutor(background_workers, thread_name_prefix="cmd-background"),
+        }
+        self._lock = threading.Lock()
+        self._pending = {INTERACTIVE: set(), BACKGROUND: set()}
+        self._counts = {lane: {"completed": 0, "cancelled": 0, "failed": 0, "expired": 0} for lane in LANES}
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._over_budget = 0
+
+    def run(self, lane, fn, *args, **kwargs):
+        """Runs fn(*args, **kwargs) in lane and returns its result (or raises its exception)."""
+        if lane == EMERGENCY:
+            return self._run_emergency(fn, *args, **kwargs)
+        if lane not in self._executors:
+            raise ValueError(f"Unknown command lane: {lane}")
+
+        # The worker runs in a copy of the caller's context, so it sees the request deadline
+        context = contextvars.copy_context()
+        future = self._executors[lane].submit(context.run, self._execute, lane, time.perf_counter(), fn, *args, **kwargs)
+        with self._lock:
+            self._pending[lane].add(future)
+        future.add_done_callback(lambda f: self._discard(lane, f))
+        remaining = deadline.remaining()
+        try:
+            return future.result(None if remaining is None else remaining + RESULT_GRACE_SECONDS)
+        except CancelledError:
+            raise CommandCancelled("Cancelled by an emergency command") from None
+        except FutureTimeout:
+            if future.done():
+                raise  # the command itself ran out of time (DeadlineExceeded is a TimeoutError)
+            if future.cancel():
+                self._count(lane, "expired")
+            raise deadline.DeadlineExceeded(
+                f"{getattr(fn, '__name__', fn)} did not finish before the request deadline") from None
+
+    def _execute(self, lane, submitted, fn, *args, **kwargs):
+        remaining = deadline.remaining()
+        if remaining is not None and remaining <= 0:  # waited in the queue past the deadline
+            self._count(lane, "expired")
+            raise deadline.DeadlineExceeded(f"{getattr(fn, '__name__', fn)} expired in the {lane} queue")
+        self.controller.begin_command()
+        try:
+            with tracing.span(f"{lane}: {getattr(fn, '__name__', fn)}",
+                              queuedMs=round((time.perf_counter() - submitted) * 1000.0, 3)):
+                result = fn(*args, **kwargs)
+        except CommandCancelled:
+            self._count(lane, "cancelled")
+            raise
+        except deadline.DeadlineExceeded:
+            self._count(lane, "expired")
+            raise
+        except Exception:
+            self._count(lane, "failed")
+            raise
+        finally:
+            self.controller.end_command()
+        self._count(lane, "completed")
+        return result
+
+    def _run_emergency(self, fn, *args, **kwargs):
+        start = time.perf_counter()
+        self.preempt()
+        try:
+            with tracing.span(f"{EMERGENCY}: {getattr(fn, '__name__', fn)}"):
+                result = fn(*args, **kwargs)
+        except Exception:
+            self._count(EMERGENCY, "failed")
+            raise
+        latency_ms = (time.perf_counter() - start) * 1000.0
+        self._count(EMERGENCY, "completed")
+        with self._lock:
+            self._latencies.append(latency_ms)
+            if latency_ms > self.emergency_budget_ms:
+                self._over_budget += 1
+        if latency_ms > self.emergency_budget_ms:
+            self.logger.warning(f"Emergency {getattr(fn, '__name__', fn)} took {latency_ms:.1f} ms "
+                                f"(budget {self.emergency_budget_ms:.0f} ms)")
+        return result
+
+    def preempt(self):
+        """Cancels every queued command and wakes every command blocked in a controller wait."""
+        with self._lock:
+            pending = [(lane, f) for lane, futures in self._pending.items() for f in futures]
+        for lane, future in pending:
+            if future.cancel():
+                self._count(lane, "cancelled")
+        self.controller.cancel_waits()
+
+    def _discard(self, lane, future):
+        with self._lock:
+            self._pending[lane].discard(future)
+
+    def _count(self, lane, outcome):
+        with self._lock:
+            self._counts[lane][outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            latencies = np.array(self._latencies) if self._latencies else None
+            stats = {
+                "lanes": {lane: dict(counts) for lane, counts in self._counts.items()},
+                "queued": {lane: sum(not f.running() for f in futures) for lane, futures in self._pending.items()},
+                "emergencyBudgetMs": self.emergency_budget_ms,
+                "emergencyOverBudget": self._over_budget,
+            }
+        if latencies is not None:
+            stats["emergencyLatencyMs"] = {
+                "p50": float(np.percentile(latencies, 50)),
+                "p95": float(np.percentile(latencies, 95)),
+                "p99": float(np.percentile(latencies, 99)),
+                "max": float(latencies.max()),
+            }
+        return stats
+
+    def shutdown(self):
+        self.preempt()
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
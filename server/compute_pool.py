@@ -0,0 +1,286 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import deadline
+
+ALIGNMENT = 64              # bytes; every array in a block starts on a cache line
+WORKER_ATTACHMENTS = 8      # shared blocks a worker keeps mapped between jobs
+DURATION_SAMPLES = 1000
+
+
+class SharedArrays:
+    """Numpy arrays laid out in one shared-memory block.
+
+    The creating process owns the block and releases it; jobs get `handle`,
+    a small picklable description, and call attach(handle) in the worker to
+    map the same memory without copying.
+    """
+
+    def __init__(self, arrays=None, layout=None):
+        specs = {}
+        for name, array in (arrays or {}).items():
+            array = np.ascontiguousarray(array)
+            specs[name] = (array.shape, array.dtype.str)
+        for name, (shape, dtype) in (layout or {}).items():
+            specs[name] = (tuple(np.atleast_1d(shape)), np.dtype(dtype).str)
+
+        fields, offset = [], 0
+        for name, (shape, dtype) in specs.items():
+            fields.append((name, offset, tuple(shape), dtype))
+            size = int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize
+            offset += -(-size // ALIGNMENT) * ALIGNMENT
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self.handle = (self._shm.name, tuple(fields))
+        self.nbytes = offset
+
+        for name, array in (arrays or {}).items():
+            self.view(name)[...] = array
+
+    def view(self, name):
+        _, offset, shape, dtype = next(f for f in self.handle[1] if f[0] == name)
+        return np.ndarray(shape, dtype, buffer=self._shm.buf, offset=offset)
+
+    def copy(self):
+        """Private copies of every array, so the block can be released."""
+        return {name: np.array(self.view(name)) for name, _, _, _ in self.handle[1]}
+
+    def release(self):
+        self._shm.close()
+        self._shm.unlink()
+
+
+# --- worker side ---
+
+_attached = OrderedDict()  # block name -> (SharedMemory, {name: array})
+
+
+def attach(handle, writable=False):
+    """Maps the arrays of a SharedArrays handle in this process (cached per block)."""
+    name, fields = handle
+    entry = _attached.get(name)
+    if entry is None:
+        shm = shared_memory.SharedMemory(name=name)
+        arrays = {}
+        for field, offset, shape, dtype in fields:
+            array = np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)
+            array.flags.writeable = writable
+            arrays[field] = array
+        entry = _attached[name] = (shm, arrays)
+        while len(_attached) > WORKER_ATTACHMENTS:
+            detach(next(iter(_attached)))
+    else:
+        _attached.move_to_end(name)
+    return entry[1]
+
+
+def detach(name):
+    shm, arrays = _attached.pop(name, (None, None))
+    if shm is None:
+        return
+    arrays.clear()
+    try:
+        shm.close()
+    except BufferError:  # a job still holds a view; the mapping goes when the view does
+        pass
+
+
+def _ready():
+    return os.getpid()
+
+
+def _fill(fn, out_handle, args):
+    out = attach(out_handle, writable=True)
+    try:
+        return fn(*args, out)
+    finally:
+        out = None
+        detach(out_handle[0])
+
+
+def _context():
+    # Workers are forked before the server starts any thread (see ComputePool.start);
+    # spawn and forkserver would re-run server.py's startup code in every worker
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+class ComputePool:
+    """Runs CPU-heavy astronomy jobs in worker processes.
+
+    Propagating a large minor-body catalog or predicting passes for every
+    loaded satellite holds the GIL for hundreds of milliseconds, which would
+    otherwise stall move and abort requests running on the other threads.
+    Jobs are plain module-level functions; large read-only inputs are
+    published once with share() and reach the workers through shared memory,
+    and large outputs can be written straight into a shared block with
+    run_into(). With workers=0 jobs run inline on the calling thread, and
+    so they do once a worker has died: the pool is not forked again from
+    the running, multi-threaded server.
+    """
+
+    def __init__(self, workers=2):
+        self.workers = workers
+        self.logger = logging.getLogger('ComputePool')
+        self._executor = None
+        self._lock = threading.Lock()
+        self._shared = {}    # key -> SharedArrays currently published
+        self._retired = {}   # key -> previous SharedArrays, kept one generation for jobs still using it
+        self._counts = {"completed": 0, "failed": 0, "expired": 0}
+        self._running = 0
+        self._lost = False   # a worker died and the pool was shut down
+        self._durations = deque(maxlen=DURATION_SAMPLES)
+
+    def start(self):
+        """Starts the workers; call it while the process is still single-threaded."""
+        if self.workers <= 0:
+            return
+        with self._lock:
+            if self._executor is not None or self._lost:
+                return
+            # Workers must share our resource tracker: one of their own would unlink
+            # every block they attached to when they exit
+            resource_tracker.ensure_running()
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=_context())
+            # The first submit forks every worker, before the executor starts its own thread
+            futures = [self._executor.submit(_ready) for _ in range(self.workers)]
+        wait(futures)
+        self.logger.info(f"Started {self.workers} compute workers: {sorted(f.result() for f in futures)}")
+
+    def share(self, key, arrays):
+        """Publishes read-only arrays under key and returns the handle jobs attach to."""
+        block = SharedArrays(arrays)
+        with self._lock:
+            old = self._retired.pop(key, None)
+            if key in self._shared:
+                self._retired[key] = self._shared[key]
+            self._shared[key] = block
+        if old is not None:
+            old.release()
+        self.logger.debug(f"Shared '{key}': {block.nbytes / 1e6:.1f} MB")
+        return block.handle
+
+    def submit(self, fn, *args):
+        start = time.perf_counter()
+        future = None
+        with self._lock:
+            executor = self._executor
+        if executor is not None:  # None with workers=0, before start() or after a worker died
+            with self._lock:
+                self._running += 1
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                with self._lock:
+                    self._running -= 1
+                self._lose_workers(executor)
+        if future is None:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            self._finished(future, start)
+            return future
+        future.add_done_callback(lambda f: self._finished(f, start, pooled=True))
+        return future
+
+    def run(self, fn, *args):
+        """Runs fn(*args) in a worker and returns its result, within the request deadline."""
+        return self._result(self.submit(fn, *args), fn)
+
+    def map(self, fn, arg_tuples):
+        """Runs fn over every argument tuple across the workers; results in order."""
+        futures = [self.submit(fn, *args) for args in arg_tuples]
+        try:
+            return [self._result(f, fn) for f in futures]
+        finally:
+            for f in futures:
+                f.cancel()
+
+    def run_into(self, layout, fn, *args):
+        """Runs fn(*args, out) where out maps layout names to shared arrays the job fills.
+
+        layout is {name: (shape, dtype)}; returns the filled arrays as private copies.
+        """
+        block = SharedArrays(layout=layout)
+        try:
+            self.run(_fill, fn, block.handle, args)
+            return block.copy()
+        finally:
+            block.release()
+
+    def _result(self, future, fn):
+        remaining = deadline.remaining()
+        try:
+            return future.result(remaining)
+        except FutureTimeout:
+            if future.done():
+                raise  # the job itself raised a TimeoutError
+            if future.cancel():
+                self._count("expired")
+            raise deadline.DeadlineExceeded(
+                f"{getattr(fn, '__name__', fn)} did not finish before the request deadline") from None
+        except BrokenProcessPool:
+            self._lose_workers(self._executor)
+            raise RuntimeError("Compute worker died") from None
+
+    def _lose_workers(self, executor):
+        """Shuts a broken pool down; later jobs run inline instead of forking new workers."""
+        with self._lock:
+            if executor is None or self._executor is not executor:
+                return
+            self._executor = None
+            self._lost = True
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.logger.error("A compute worker died; jobs now run inline until the server is restarted")
+
+    def _finished(self, future, start, pooled=False):
+        with self._lock:
+            if pooled:
+                self._running -= 1
+            if not future.cancelled():
+                self._counts["failed" if future.exception() else "completed"] += 1
+                self._durations.append((time.perf_counter() - start) * 1000.0)
+
+    def _count(self, outcome):
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            durations = np.array(self._durations) if self._durations else None
+            stats = {
+                "workers": 0 if self._lost else self.workers,
+                "workersLost": self._lost,
+                "running": self._running,
+                **self._counts,
+                "sharedMB": {key: block.nbytes / 1e6 for key, block in self._shared.items()},
+            }
+        if durations is not None:
+            stats["durationMs"] = {
+                "p50": float(np.percentile(durations, 50)),
+                "p95": float(np.percentile(durations, 95)),
+                "max": float(durations.max()),
+            }
+        return stats
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            blocks = list(self._shared.values()) + list(self._retired.values())
+            self._shared.clear()
+            self._retired.clear()
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        for block in blocks:
+            block.release()
@@ -0,0 +1,75 @@
+import os
+
+# Backend selection: "indi" goes REST -> PyIndi -> indiserver -> driver -> mount,
+# "lx200" talks to the mount directly over TCP
+TELESCOPE_BACKEND = os.environ.get("TELESCOPE_BACKEND", "indi").lower()
+
+INDI_HOST = os.environ.get("INDI_HOST", "localhost")
+INDI_PORT = int(os.environ.get("INDI_PORT", "7624"))
+INDI_DEVICE = os.environ.get("INDI_DEVICE", "Telescope Simulator")
+
+# Mount network address, used by the LX200 backend and handed to the INDI driver
+MOUNT_HOST = os.environ.get("MOUNT_HOST", "10.0.0.1")
+MOUNT_PORT = int(os.environ.get("MOUNT_PORT", "4030"))
+
+# Command lanes: worker threads for interactive (move, slew, focuser) and background
+# (config, time, site) commands; emergency commands (abort, park) bypass both
+INTERACTIVE_WORKERS = int(os.environ.get("INTERACTIVE_WORKERS", "4"))
+BACKGROUND_WORKERS = int(os.environ.get("BACKGROUND_WORKERS", "1"))
+EMERGENCY_LATENCY_BUDGET_MS = float(os.environ.get("EMERGENCY_LATENCY_BUDGET_MS", "50"))
+
+# Connection supervision: health-check period and reconnect backoff bounds (seconds)
+HEALTH_CHECK_SECONDS = float(os.environ.get("HEALTH_CHECK_SECONDS", "2"))
+RECONNECT_MIN_SECONDS = float(os.environ.get("RECONNECT_MIN_SECONDS", "1"))
+RECONNECT_MAX_SECONDS = float(os.environ.get("RECONNECT_MAX_SECONDS", "60"))
+
+# Request deadlines: default budget for every API call, and the most a client may ask
+# for with the X-Request-Timeout header (seconds). Waits on the mount never outlive it.
+REQUEST_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", "15"))
+MAX_REQUEST_DEADLINE_SECONDS = float(os.environ.get("MAX_REQUEST_DEADLINE_SECONDS", "300"))
+
+# Worker processes for heavy catalog work (minor-body propagation, satellite passes);
+# 0 runs those jobs on the request thread
+COMPUTE_WORKERS = int(os.environ.get("COMPUTE_WORKERS", "2"))
+
+# Request tracing (Chrome trace-event JSON, open in chrome://tracing or ui.perfetto.dev):
+# off unless TRACE_FILE is set; then this fraction of requests is traced, plus any
+# request sent with an "X-Trace: 1" header
+TRACE_FILE = os.environ.get("TRACE_FILE", "")
+TRACE_SAMPLE_RATIO = float(os.environ.get("TRACE_SAMPLE_RATIO", "0.01"))
+
+# SQLite file with the last confirmed mount and site settings, re-applied after a restart
+STATE_FILE = os.environ.get("STATE_FILE", "state.db")
+
+# Ephemeris excerpt made with "python ephemeris.py de421.bsp de421-excerpt.bsp"; without it
+# the full de421.bsp is loaded (and downloaded if missing)
+EPHEMERIS_FILE = os.environ.get("EPHEMERIS_FILE", "de421-excerpt.bsp")
+
+# JSON and MessagePack responses at least this large are gzip/brotli compressed for
+# clients that send Accept-Encoding
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+
+# Telemetry bus: Unix socket on which the control server publishes its read endpoints
+# for read_worker.py processes (empty disables it), how often the fastest of them are
+# refreshed, and how old a snapshot may get before the workers answer 503 (seconds)
+TELEMETRY_SOCKET = os.environ.get("TELEMETRY_SOCKET", "telemetry.sock")
+TELEMETRY_INTERVAL = float(os.environ.get("TELEMETRY_INTERVAL", "0.25"))
+TELEMETRY_STALE_SECONDS = float(os.environ.get("TELEMETRY_STALE_SECONDS", "5"))
+
+# Pointing model fitted to sync residuals (JSON, kept across restarts) and how many
+# syncs it needs before slews are corrected with it
+POINTING_MODEL_FILE = os.environ.get("POINTING_MODEL_FILE", "pointing_model.json")
+POINTING_MODEL_MIN_POINTS = int(os.environ.get("POINTING_MODEL_MIN_POINTS", "3"))
+
+# Meridian flips (German equatorial mounts): how far past the meridian the mount may
+# track, how early before it a flip is allowed, when the API starts warning (minutes),
+# and whether the server re-slews at the planned time by itself
+MERIDIAN_LIMIT_MINUTES = float(os.environ.get("MERIDIAN_LIMIT_MINUTES", "10"))
+MERIDIAN_EARLY_MINUTES = float(os.environ.get("MERIDIAN_EARLY_MINUTES", "0"))
+MERIDIAN_WARN_MINUTES = float(os.environ.get("MERIDIAN_WARN_MINUTES", "30"))
+MERIDIAN_AUTO_FLIP = os.environ.get("MERIDIAN_AUTO_FLIP", "0").lower() in ("1", "true", "yes")
+
+# Earth orientation table (UT1-UTC, Delta T, polar motion) made with
+# "python earth_orientation.py earth_orientation.npz"; without it astropy and
+# Skyfield fall back to the data bundled with them
+EARTH_ORIENTATION_FILE = os.environ.get("EARTH_ORIENTATION_FILE", "earth_orientation.npz")
@@ -0,0 +1,136 @@
+import logging
+import random
+import threading
+import time
+
+HEALTH_CHECK_SECONDS = 2.0
+RECONNECT_MIN_SECONDS = 1.0
+RECONNECT_MAX_SECONDS = 60.0
+
+
+class ConnectionSupervisor:
+    """Keeps the controller's link to the mount alive from a background thread.
+
+    While the link is up, the controller's health check runs every
+    HEALTH_CHECK_SECONDS. When it fails, or the backend reports a drop (INDI
+    server or device gone, LX200 socket error), the controller is marked
+    disconnected, so calls fail at once instead of touching stale state.
+    Reconnects are then retried with jittered exponential backoff.
+    """
+
+    def __init__(self, controller, check_interval=HEALTH_CHECK_SECONDS,
+                 backoff_min=RECONNECT_MIN_SECONDS, backoff_max=RECONNECT_MAX_SECONDS):
+        self.controller = controller
+        self.check_interval = check_interval
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.logger = logging.getLogger('ConnectionSupervisor')
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._state = "connecting"
+        self._attempts = 0
+        self._reconnects = 0
+        self._next_attempt = None
+        self._last_error = None
+        controller.add_link_listener(self._link_changed)
+
+    def start(self):
+        """Starts supervising; the first connection attempt runs in the background."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="connection-supervisor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def reconnect_now(self):
+        """Skips the remaining backoff (or forces a reconnect if the link looks healthy)."""
+        with self._lock:
+            self._next_attempt = time.monotonic()
+            connected = self._state == "connected"
+        if connected:
+            # Outside the lock: mark_disconnected calls back into _link_changed
+            self.controller.mark_disconnected("reconnect requested")
+        self._wake.set()
+
+    def status(self):
+        with self._lock:
+            status = {
+                "state": self._state,
+                "attempts": self._attempts,
+                "reconnects": self._reconnects,
+                "lastError": self._last_error,
+                **self.controller.link_status(),
+            }
+            if self._next_attempt is not None and self._state != "connected":
+                status["nextAttemptIn"] = max(0.0, self._next_attempt - time.monotonic())
+        return status
+
+    def _link_changed(self, connected, reason):
+        if not connected:
+            with self._lock:
+                self._last_error = reason
+            self._wake.set()  # react to backend-reported drops without waiting for the next check
+
+    def _set_state(self, state):
+        with self._lock:
+            self._state = state
+
+    def _run(self):
+        backoff = self.backoff_min
+        while not self._stop.is_set():
+            if self.controller.link_status()["connected"]:
+                healthy = False
+                try:
+                    healthy = self.controller.health_check()
+                except Exception as e:
+                    self.logger.debug(f"Health check raised: {e}")
+                if healthy:
+                    backoff = self.backoff_min
+                    self._wake.wait(self.check_interval)
+                    self._wake.clear()
+                    continue
+                self.controller.mark_disconnected("health check failed")
+
+            self._set_state("connecting")
+            with self._lock:
+                self._attempts += 1
+            try:
+                try:
+                    self.controller.disconnect()  # drop stale sockets and device objects first
+                except Exception:
+                    pass
+                self.controller.connect()
+                with self._lock:
+                    self._state = "connected"
+                    self._reconnects += 1
+                    self._attempts = 0
+                    self._next_attempt = None
+                self.logger.info("Telescope connected")
+                backoff = self.backoff_min
+                continue
+            except Exception as e:
+                delay = backoff * random.uniform(0.8, 1.2)
+                backoff = min(backoff * 2, self.backoff_max)
+                with self._lock:
+                    self._state = "disconnected"
+                    self._last_error = str(e)
+                    self._next_attempt = time.monotonic() + delay
+                self.logger.warning(f"Connection attempt failed: {e}; retrying in {delay:.1f} s")
+
+            # Wait out the backoff; reconnect_now() can cut it short
+            while not self._stop.is_set():
+                with self._lock:
+                    remaining = self._next_attempt - time.monotonic() if self._next_attempt else 0
+                if remaining <= 0:
+                    break
+                self._wake.wait(remaining)
+                self._wake.clear()
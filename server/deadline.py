@@ -0,0 +1,99 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+LATENCY_SAMPLES = 1000  # per endpoint
+
+_current = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when an operation cannot finish before the caller's deadline."""
+
+
+class Deadline:
+    __slots__ = ("budget", "expires")
+
+    def __init__(self, seconds):
+        self.budget = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+
+def current():
+    """The deadline of the request (or command) running in this context, if any."""
+    return _current.get()
+
+
+def remaining(default=None):
+    """Seconds left before the current deadline, or default when there is none."""
+    deadline = _current.get()
+    return default if deadline is None else max(0.0, deadline.remaining())
+
+
+def check(what="operation"):
+    deadline = _current.get()
+    if deadline is not None and deadline.remaining() <= 0:
+        raise DeadlineExceeded(f"{what} did not finish within {deadline.budget:.1f} s")
+
+
+def activate(seconds):
+    """Sets a deadline for the current context; returns a token for reset().
+
+    A nested deadline never extends an outer one.
+    """
+    outer = _current.get()
+    if outer is not None and outer.remaining() < seconds:
+        seconds = max(0.0, outer.remaining())
+    return _current.set(Deadline(seconds))
+
+
+def reset(token):
+    _current.reset(token)
+
+
+@contextmanager
+def scope(seconds):
+    token = activate(seconds)
+    try:
+        yield _current.get()
+    finally:
+        reset(token)
+
+
+class EndpointLatency:
+    """Recent latencies per endpoint, for p50/p95/p99 reporting."""
+
+    def __init__(self, samples=LATENCY_SAMPLES):
+        self.samples = samples
+        self._latencies = {}
+        self._timeouts = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, timed_out=False):
+        with self._lock:
+            self._latencies.setdefault(endpoint, deque(maxlen=self.samples)).append(seconds * 1000.0)
+            if timed_out:
+                self._timeouts[endpoint] = self._timeouts.get(endpoint, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            snapshot = {endpoint: np.array(values) for endpoint, values in self._latencies.items()}
+            timeouts = dict(self._timeouts)
+        return {
+            endpoint: {
+                "count": int(len(values)),
+                "p50": float(np.percentile(values, 50)),
+                "p95": float(np.percentile(values, 95)),
+                "p99": float(np.percentile(values, 99)),
+                "max": float(values.max()),
+                "timeouts": timeouts.get(endpoint, 0),
+            }
+            for endpoint, values in snapshot.items()
+        }
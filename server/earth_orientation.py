@@ -0,0 +1,273 @@
+"""Earth orientation for offline sites: UT1-UTC, polar motion and Delta T from one bundled daily table.
+
+The sidereal clock, astropy and Skyfield all need UT1; left to themselves
+they read different tables (astropy's bundled IERS-A, Skyfield's built-in
+Delta T), which drift apart by tenths of a second, and neither can be
+refreshed without a download at run time. Instead the server ships
+earth_orientation.npz, cut from an IERS finals2000A.all file with
+
+    python earth_orientation.py earth_orientation.npz --source finals2000A.all
+
+(by default from the copy that comes with astropy, or --download for a fresh
+one), and installs it everywhere at startup. Values are daily on a uniform
+grid, so a lookup is an index computation and one linear interpolation,
+without searching or range warnings. Before the first day and after the last
+the end values are held. UT1 - TAI is what is interpolated, since it has no
+leap-second jumps.
+"""
+import argparse
+import logging
+import math
+import os
+import time
+import urllib.request
+
+import astropy.units as u
+import erfa
+import numpy as np
+from astropy.table import QTable
+from astropy.utils import iers
+from skyfield.timelib import Timescale
+
+DAY_SECONDS = 86400.0
+UNIX_EPOCH_MJD = 40587.0
+MJD_ZERO_JD = 2400000.5
+TT_MINUS_TAI = 32.184
+FINALS_URL = "https://datacenter.iers.org/data/9/finals2000A.all"
+UT1_SCALE = 1e-7       # seconds per stored unit (the precision of finals2000A.all)
+POLE_SCALE = 1e-6      # arcseconds per stored unit
+
+logger = logging.getLogger('EarthOrientation')
+
+
+class EarthOrientation:
+    """Daily UT1 - TAI, TAI - UTC and polar motion from mjd0 on, looked up in constant time."""
+
+    def __init__(self, mjd0, ut1_tai, tai_utc, pm_x, pm_y, leap_mjd, leap_offsets, predicted_from, source=""):
+        self.mjd0 = float(mjd0)
+        self.ut1_tai = np.asarray(ut1_tai, dtype=float)
+        self.tai_utc = np.asarray(tai_utc, dtype=float)
+        self.pm_x = np.asarray(pm_x, dtype=float)
+        self.pm_y = np.asarray(pm_y, dtype=float)
+        self.leap_mjd = np.asarray(leap_mjd, dtype=float)
+        self.leap_offsets = np.asarray(leap_offsets, dtype=float)
+        self.predicted_from = float(predicted_from)
+        self.source = source
+        self.last = len(self.ut1_tai) - 1
+
+    @classmethod
+    def open(cls, path):
+        with np.load(path) as f:
+            return cls(f["mjd0"], f["ut1_tai"] * UT1_SCALE, f["tai_utc"], f["pm_x"] * POLE_SCALE,
+                       f["pm_y"] * POLE_SCALE, f["leap_mjd"], f["leap_offsets"], f["predicted_from"],
+                       str(f["source"]))
+
+    def save(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f, mjd0=self.mjd0, ut1_tai=np.round(self.ut1_tai / UT1_SCALE).astype(np.int32),
+                tai_utc=self.tai_utc.astype(np.int8), pm_x=np.round(self.pm_x / POLE_SCALE).astype(np.int32),
+                pm_y=np.round(self.pm_y / POLE_SCALE).astype(np.int32), leap_mjd=self.leap_mjd,
+                leap_offsets=self.leap_offsets, predicted_from=self.predicted_from, source=self.source)
+        os.replace(tmp, path)
+
+    @property
+    def end_mjd(self):
+        return self.mjd0 + self.last
+
+    def _day(self, unix):
+        """Day index and fraction into it for unix times, held at the ends of the table."""
+        x = np.clip(np.asarray(unix, dtype=float) / DAY_SECONDS + UNIX_EPOCH_MJD - self.mjd0, 0.0, self.last)
+        i = np.minimum(x.astype(int), self.last - 1)
+        return i, x - i
+
+    def ut1_utc(self, unix):
+        """UT1 - UTC in seconds at unix times (scalar or array)."""
+        i, f = self._day(unix)
+        day = np.minimum(i + (f >= 1.0), self.last)  # TAI - UTC changes at midnight
+        return self.ut1_tai[i] + f * (self.ut1_tai[i + 1] - self.ut1_tai[i]) + self.tai_utc[day]
+
+    def delta_t(self, unix):
+        """TT - UT1 in seconds."""
+        i, f = self._day(unix)
+        return TT_MINUS_TAI - (self.ut1_tai[i] + f * (self.ut1_tai[i + 1] - self.ut1_tai[i]))
+
+    def polar_motion(self, unix):
+        """Pole coordinates x, y in arcseconds."""
+        i, f = self._day(unix)
+        return (self.pm_x[i] + f * (self.pm_x[i + 1] - self.pm_x[i]),
+                self.pm_y[i] + f * (self.pm_y[i + 1] - self.pm_y[i]))
+
+    def julian_dates(self, unix):
+        """Two-part Julian dates (tt1, tt2, ut11, ut12) of one unix time, for erfa."""
+        i, f = self._day(unix)
+        i, f = int(i), float(f)
+        ut1_tai = float(self.ut1_tai[i] + f * (self.ut1_tai[i + 1] - self.ut1_tai[i]))
+        tai_utc = float(self.tai_utc[min(i + (f >= 1.0), self.last)])
+        days = unix / DAY_SECONDS + UNIX_EPOCH_MJD
+        whole = math.floor(days)
+        fraction = days - whole
+        jd1 = MJD_ZERO_JD + whole
+        return (jd1, fraction + (tai_utc + TT_MINUS_TAI) / DAY_SECONDS,
+                jd1, fraction + (ut1_tai + tai_utc) / DAY_SECONDS)
+
+    def install_astropy(self):
+        """Makes astropy's UT1 and polar motion come from this table."""
+        mjd = self.mjd0 + np.arange(self.last + 1)
+        iers.conf.iers_degraded_accuracy = "ignore"  # outside the table, hold the end values as lookups here do
+        iers.earth_orientation_table.set(iers.IERS(QTable({
+            "MJD": mjd * u.d,
+            "UT1_UTC": (self.ut1_tai + self.tai_utc) * u.s,
+            "PM_x": self.pm_x * u.arcsec,
+            "PM_y": self.pm_y * u.arcsec,
+        })))
+
+    def timescale(self):
+        """A Skyfield Timescale whose Delta T (looked up here) and leap seconds come from this table."""
+        return Timescale(self._delta_t_at_tt, self.leap_mjd + MJD_ZERO_JD, self.leap_offsets)
+
+    def _delta_t_at_tt(self, tt):
+        # Skyfield passes TT Julian dates; reading them as UTC is about a minute off, which
+        # changes Delta T by well under a microsecond at daily resolution
+        return self.delta_t((np.asarray(tt) - MJD_ZERO_JD - UNIX_EPOCH_MJD) * DAY_SECONDS)
+
+    def status(self, unix=None):
+        unix = time.time() if unix is None else unix
+        today = unix / DAY_SECONDS + UNIX_EPOCH_MJD
+        return {
+            "source": self.source,
+            "start": _date(self.mjd0),
+            "end": _date(self.end_mjd),
+            "predictedFrom": _date(self.predicted_from),
+            "daysPredicted": max(0.0, today - self.predicted_from),
+            "daysLeft": self.end_mjd - today,
+            "ut1Utc": float(self.ut1_utc(unix)),
+            "deltaT": float(self.delta_t(unix)),
+        }
+
+
+def _date(mjd):
+    return time.strftime("%Y-%m-%d", time.gmtime((mjd - UNIX_EPOCH_MJD) * DAY_SECONDS))
+
+
+_installed = None
+
+
+def install(path):
+    """Opens the table at path and hands it to astropy; returns it, or None (with a warning) if it is missing.
+
+    Use installed() afterwards to reach it, and its timescale() for Skyfield.
+    """
+    global _installed
+    iers.conf.auto_download = False  # with or without the table, astropy never fetches its own
+    iers.conf.auto_max_age = None
+    try:
+        table = EarthOrientation.open(path)
+    except FileNotFoundError:
+        logger.warning(f"No Earth orientation table at {path}; astropy and Skyfield use their own bundled data")
+        return None
+    table.install_astropy()
+    _installed = table
+    status = table.status()
+    logger.info(f"Earth orientation from {path}: {status['start']} to {status['end']}, "
+                f"predicted from {status['predictedFrom']}")
+    if status["daysLeft"] < 30:
+        logger.warning(f"Earth orientation table ends {status['end']}; rebuild it with "
+                       f"'python earth_orientation.py {path} --download' when online")
+    return table
+
+
+def installed():
+    """The table passed to install(), or None."""
+    return _installed
+
+
+def parse_finals(path):
+    """(mjd, ut1_utc seconds, pm_x, pm_y arcseconds, first predicted mjd) of the days in a finals2000A.all file."""
+    mjd, dut1, pm_x, pm_y = [], [], [], []
+    predicted_from = math.inf
+    with open(path) as f:
+        for line in f:
+            if len(line) < 68 or not line[58:68].strip():
+                continue  # past the last prediction
+            mjd.append(float(line[7:15]))
+            pm_x.append(float(line[18:27]) if line[18:27].strip() else math.nan)
+            pm_y.append(float(line[37:46]) if line[37:46].strip() else math.nan)
+            dut1.append(float(line[58:68]))
+            if line[57] == "P":
+                predicted_from = min(predicted_from, mjd[-1])
+    mjd, dut1, pm_x, pm_y = map(np.array, (mjd, dut1, pm_x, pm_y))
+    if len(mjd) < 2 or np.any(np.diff(mjd) != 1.0):
+        raise ValueError(f"{path} is not a daily finals2000A.all series")
+    # Polar motion predictions can stop short of UT1 ones; hold the last
+    for pm in (pm_x, pm_y):
+        valid = np.flatnonzero(~np.isnan(pm))
+        pm[valid[-1] + 1:] = pm[valid[-1]]
+    return mjd, dut1, pm_x, pm_y, min(predicted_from, mjd[-1] + 1)
+
+
+def build(source, start_mjd=None):
+    """An EarthOrientation from a finals2000A.all file, from start_mjd (MJD) on."""
+    mjd, dut1, pm_x, pm_y, predicted_from = parse_finals(source)
+    # TAI - UTC: erfa's leap seconds up to the first day, then every whole-second jump in UT1 - UTC
+    first = erfa.d2dtf("UTC", 0, MJD_ZERO_JD, mjd[0])
+    tai_utc = erfa.dat(int(first[0]), int(first[1]), int(first[2]), 0.0) + np.concatenate(
+        [[0.0], np.cumsum(np.round(np.diff(dut1)))])
+    leaps = [(erfa.cal2jd(year, month, 1)[1], offset) for year, month, offset in erfa.leap_seconds.get()
+             if (year, month) > (1972, 1) and erfa.cal2jd(year, month, 1)[1] <= mjd[0]]
+    leaps += [(day, offset) for day, offset, jump in zip(mjd[1:], tai_utc[1:], np.diff(tai_utc)) if jump]
+    if start_mjd is not None:
+        keep = mjd >= start_mjd
+        mjd, dut1, pm_x, pm_y, tai_utc = mjd[keep], dut1[keep], pm_x[keep], pm_y[keep], tai_utc[keep]
+    return EarthOrientation(mjd[0], dut1 - tai_utc, tai_utc, pm_x, pm_y, [d for d, _ in leaps],
+                            [o for _, o in leaps], predicted_from, os.path.basename(source))
+
+
+def verify(table, source):
+    """Largest difference in seconds between the table's UT1 - UTC and the source's daily values.
+
+    Also returns the largest error of interpolating each observed day from
+    its neighbours two days apart, an upper bound on interpolation error
+    within a day.
+    """
+    mjd, dut1, _, _, predicted_from = parse_finals(source)
+    days = (mjd >= table.mjd0) & (mjd <= table.end_mjd)
+    stored = float(np.max(np.abs(table.ut1_utc((mjd[days] - UNIX_EPOCH_MJD) * DAY_SECONDS) - dut1[days])))
+    ut1_tai = table.ut1_tai[table.mjd0 + np.arange(table.last + 1) < predicted_from]
+    midpoint = np.abs(ut1_tai[1:-1] - (ut1_tai[:-2] + ut1_tai[2:]) / 2.0)
+    return stored, float(midpoint.max()) if midpoint.size else 0.0
+
+
+def main():
+    year = time.gmtime().tm_year
+    parser = argparse.ArgumentParser(description="Build the Earth orientation table from an IERS finals2000A.all file.")
+    parser.add_argument("output", help="table to write, e.g. earth_orientation.npz")
+    parser.add_argument("--source", default=iers.IERS_A_FILE,
+                        help="finals2000A.all to read (default: the copy bundled with astropy)")
+    parser.add_argument("--download", action="store_true", help=f"fetch a fresh finals2000A.all from {FINALS_URL}")
+    parser.add_argument("--start", type=int, default=year - 10, help="first year kept (default: 10 years ago)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    source = args.source
+    if args.download:
+        source = f"{args.output}.finals2000A.all"
+        urllib.request.urlretrieve(FINALS_URL, source)
+        logger.info(f"Downloaded {FINALS_URL}")
+    table = build(source, erfa.cal2jd(args.start, 1, 1)[1])
+    table.save(args.output)
+    stored, midpoint = verify(EarthOrientation.open(args.output), source)
+    if args.download:
+        os.remove(source)
+    status = table.status()
+    logger.info(f"Wrote {args.output} ({os.path.getsize(args.output) / 1e3:.0f} kB): {status['start']} to "
+                f"{status['end']}, predicted from {status['predictedFrom']}")
+    if stored > 1e-6:
+        raise SystemExit(f"Table differs from {source} by up to {stored * 1e3:.3f} ms")
+    logger.info(f"UT1 - UTC matches {os.path.basename(source)} on every day; interpolating a day from its "
+                f"neighbours is off by at most {midpoint * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
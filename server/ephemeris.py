@@ -0,0 +1,214 @@
+"""Solar-system ephemeris: a trimmed SPK excerpt, opened memory-mapped, bodies built on first use.
+
+The full de421.bsp covers 1899-2053 for every planet; the server only needs
+the bodies in PLANETS (plus the Earth) for a few decades around the present.
+Cut that out once with
+
+    python ephemeris.py de421.bsp de421-excerpt.bsp --start 2015 --end 2045
+
+and point EPHEMERIS_FILE at the result. The excerpt keeps the source's
+Chebyshev records unchanged, only fewer of them, so positions inside the
+window are bit-identical to the full kernel (the command checks this before
+it finishes).
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from collections.abc import Mapping
+
+import numpy as np
+from jplephem.calendar import compute_julian_date
+from jplephem.excerpter import write_excerpt
+from skyfield.api import load
+from skyfield.jpllib import SpiceKernel
+
+# Name the server uses -> name in the kernel
+PLANETS = {
+    'mercury': 'mercury',
+    'venus': 'venus',
+    'mars': 'mars',
+    'jupiter': 'jupiter barycenter',
+    'saturn': 'saturn barycenter',
+    'uranus': 'uranus barycenter',
+    'neptune': 'neptune barycenter',
+    'pluto': 'pluto barycenter',
+    'moon': 'moon',
+    'sun': 'sun',
+}
+OBSERVER = 'earth'
+# apparent() bends light around these, so every excerpt keeps them
+DEFLECTORS = ['sun', 'jupiter barycenter', 'saturn barycenter']
+VERIFY_SAMPLES = 2000          # times per body compared against the source kernel
+
+logger = logging.getLogger('Ephemeris')
+
+
+class Ephemeris:
+    """A SPICE kernel whose bodies are looked up once and kept.
+
+    jplephem maps the file read-only, so opening it only reads the segment
+    summaries; a segment's coefficients are paged in when a position is first
+    computed from it, and only the pages covering the requested times. Each
+    body's chain of segments is resolved the first time it is asked for and
+    reused afterwards, so bodies never used cost nothing.
+    """
+
+    def __init__(self, kernel):
+        self.kernel = kernel
+        self.path = kernel.path
+        self._bodies = {}
+        self._lock = threading.Lock()
+        segments = kernel.spk.segments
+        self.start_jd = max(s.start_jd for s in segments)
+        self.end_jd = min(s.end_jd for s in segments)
+
+    @classmethod
+    def open(cls, path, fallback=None):
+        """Opens path, or the fallback kernel through Skyfield's loader (which downloads it) if path is missing."""
+        start = time.perf_counter()
+        if path and os.path.exists(path):
+            kernel = SpiceKernel(path)
+        elif fallback:
+            if path:
+                logger.warning(f"{path} not found, using the full {fallback}")
+            kernel = load(fallback)
+        else:
+            raise RuntimeError(f"Ephemeris {path} not found")
+        ephemeris = cls(kernel)
+        logger.info(f"Opened {ephemeris.path} ({os.path.getsize(ephemeris.path) / 1e6:.1f} MB, "
+                    f"{len(kernel.segments)} segments, JD {ephemeris.start_jd:.1f}-{ephemeris.end_jd:.1f}) "
+                    f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return ephemeris
+
+    def __getitem__(self, name):
+        body = self._bodies.get(name)
+        if body is None:
+            with self._lock:
+                body = self._bodies.get(name)
+                if body is None:
+                    body = self._bodies[name] = self.kernel[name]
+        return body
+
+    def __contains__(self, name):
+        return name in self.kernel
+
+    def covers(self, jd):
+        """True if every segment of the kernel covers the TDB Julian date(s) jd."""
+        jd = np.asarray(jd)
+        return bool(np.all((jd >= self.start_jd) & (jd <= self.end_jd)))
+
+    def bodies(self, names=None):
+        """A read-only mapping of server name -> body that resolves each body on first access."""
+        return Bodies(self, PLANETS if names is None else names)
+
+    def status(self):
+        return {
+            "file": os.path.basename(self.path),
+            "startJd": self.start_jd,
+            "endJd": self.end_jd,
+            "segments": len(self.kernel.segments),
+            "loadedBodies": sorted(self._bodies),
+        }
+
+
+class Bodies(Mapping):
+    def __init__(self, ephemeris, names):
+        self._ephemeris = ephemeris
+        self._names = dict(names)
+
+    def __getitem__(self, name):
+        return self._ephemeris[self._names[name]]
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+
+def _julian_date(text):
+    """YYYY, YYYY-MM or YYYY-MM-DD -> Julian date at 0h."""
+    parts = [int(p) for p in text.split("-")] + [1, 1]
+    return compute_julian_date(parts[0], parts[1], parts[2])
+
+
+def segment_chain(kernel, names):
+    """(center, target) of every segment needed to reach names from the solar-system barycenter."""
+    pairs = set()
+    for name in names:
+        body = kernel[name]
+        for vector in getattr(body, "vector_functions", [body]):  # a body straight off the barycenter is one segment
+            pairs.add((vector.center, vector.target))
+    return pairs
+
+
+def excerpt(source, output, start_jd, end_jd, names):
+    """Writes the segments behind names, trimmed to start_jd..end_jd, from source to output."""
+    kernel = SpiceKernel(source)
+    names = list(dict.fromkeys(list(names) + DEFLECTORS))
+    missing = [name for name in names if name not in kernel]
+    if missing:
+        raise RuntimeError(f"{source} has no segments for {', '.join(missing)}")
+    pairs = segment_chain(kernel, names)
+    chosen = [s for s in kernel.spk.segments if (s.center, s.target) in pairs]
+    # jplephem labels every segment with the window asked for, so keep it inside what the source covers
+    start_jd = max(start_jd, max(s.start_jd for s in chosen))
+    end_jd = min(end_jd, min(s.end_jd for s in chosen))
+    if start_jd >= end_jd:
+        raise RuntimeError(f"{source} does not cover the requested dates")
+    # summary values are (start, end, target, center, frame, type, start index, end index)
+    summaries = [(name, values) for name, values in kernel.spk.daf.summaries()
+                 if (int(values[3]), int(values[2])) in pairs]
+    with open(output, "w+b") as f:
+        write_excerpt(kernel.spk, f, start_jd, end_jd, summaries)
+    kernel.close()
+    return len(summaries)
+
+
+def verify(source, output, names, samples=VERIFY_SAMPLES):
+    """Largest difference in km between positions from source and output over output's window (0.0 if identical)."""
+    full, trimmed = SpiceKernel(source), SpiceKernel(output)
+    ts = load.timescale()
+    # Segments claim exactly the window asked for; keep clear of its last instant
+    start = max(s.start_jd for s in trimmed.spk.segments)
+    end = min(s.end_jd for s in trimmed.spk.segments)
+    t = ts.tdb_jd(np.linspace(start, end, samples, endpoint=False))
+    worst = 0.0
+    for name in names:
+        a, b = full[name].at(t).position.km, trimmed[name].at(t).position.km
+        worst = max(worst, float(np.max(np.abs(a - b))))
+    full.close()
+    trimmed.close()
+    return worst
+
+
+def main():
+    year = time.gmtime().tm_year
+    parser = argparse.ArgumentParser(description="Cut a time window and body subset out of an SPK kernel.")
+    parser.add_argument("source", help="full kernel, e.g. de421.bsp")
+    parser.add_argument("output", help="excerpt to write, e.g. de421-excerpt.bsp")
+    parser.add_argument("--start", default=str(year - 10), help="first date, YYYY[-MM[-DD]] (default: 10 years ago)")
+    parser.add_argument("--end", default=str(year + 20), help="last date, YYYY[-MM[-DD]] (default: 20 years ahead)")
+    parser.add_argument("--bodies", default=",".join([OBSERVER] + sorted(set(PLANETS.values()))),
+                        help="comma-separated kernel body names (default: the Earth and every body the server tracks)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    names = list(dict.fromkeys([name.strip() for name in args.bodies.split(",") if name.strip()] + DEFLECTORS))
+    start = time.perf_counter()
+    count = excerpt(args.source, args.output, _julian_date(args.start), _julian_date(args.end), names)
+    logger.info(f"Wrote {count} segments to {args.output}: {os.path.getsize(args.source) / 1e6:.1f} MB -> "
+                f"{os.path.getsize(args.output) / 1e6:.1f} MB in {time.perf_counter() - start:.2f} s")
+    worst = verify(args.source, args.output, names)
+    if worst != 0.0:
+        raise SystemExit(f"Excerpt differs from {args.source} by up to {worst} km")
+    logger.info(f"Positions of {len(names)} bodies match {args.source} exactly")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import logging
+import sys
+import threading
+import time
+
+DIRECTIONS = ("FOCUS_INWARD", "FOCUS_OUTWARD")
+MIN_STEP_MS = 10
+MAX_STEP_MS = 60000
+MAX_STEPS = 500
+LEAD_SECONDS = 0.2     # between accepting a sweep and its first step, for the speed and timer writes
+SPIN_SECONDS = 0.002   # the end of every wait is spun instead of slept; a sleep alone can overrun by a few ms
+SWITCH_INTERVAL = 0.0005  # while spinning, so busy request threads hand back the GIL within 0.5 ms instead of 5
+
+
+def parse_spec(data):
+    """Checks a sweep request and returns (direction, [step durations in ms], settle seconds, speed or None).
+
+    Steps are given either as a list ("steps": [200, 200, 400]) or as
+    "duration" (ms) and "count".
+    """
+    direction = data.get("direction")
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+    if data.get("steps") is not None:
+        durations = [float(ms) for ms in data["steps"]]
+    else:
+        durations = [float(data.get("duration", 0))] * int(data.get("count", 1))
+    if not 1 <= len(durations) <= MAX_STEPS:
+        raise ValueError(f"A sweep has 1 to {MAX_STEPS} steps")
+    if not all(MIN_STEP_MS <= ms <= MAX_STEP_MS for ms in durations):
+        raise ValueError(f"Step durations must be between {MIN_STEP_MS} and {MAX_STEP_MS} ms")
+    settle = float(data.get("settle", 1.0))
+    if not 0 <= settle <= 600:
+        raise ValueError("settle must be between 0 and 600 seconds")
+    speed = data.get("speed")
+    return direction, durations, settle, None if speed is None else float(speed)
+
+
+class FocusSweep:
+    """Runs a focus sweep on the server: timed focuser moves separated by settle pauses.
+
+    Every start and stop is sent at an absolute deadline on the monotonic
+    clock, so each step moves for the time asked whatever the latency of
+    the browser or the network. The focuser timer is also set to each
+    step's length, as a backstop. Each step is followed by a progress event
+    with how late its commands went out; events() hands them to the
+    streaming endpoint as they happen.
+    """
+
+    def __init__(self, controller, run=None):
+        self.controller = controller
+        self.run = run or (lambda fn, *args, **kwargs: fn(*args, **kwargs))  # e.g. a scheduler lane
+        self.logger = logging.getLogger('FocusSweep')
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._thread = None
+        self._generation = 0  # a run whose stop() join timed out must not touch the next run's state
+        self._spec = None
+        self._events = []
+        self._finished = True
+
+    def start(self, direction, durations, settle, speed=None):
+        self.stop()
+        with self._lock:
+            self._spec = {"direction": direction, "steps": list(durations), "settle": settle, "speed": speed}
+            self._events = []
+            self._finished = False
+            self._generation += 1
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="focus-sweep", daemon=True,
+                                            args=(self._generation, self._spec, self._stop))
+            self._thread.start()
+        self.logger.info(f"Focus sweep: {len(durations)} steps {direction}, {settle} s settle")
+
+    def stop(self, wait=True):
+        """Ends a running sweep, stopping the focuser if it is moving; wait=False only signals it."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        if wait and thread is not threading.current_thread():
+            thread.join(timeout=5)
+
+    def is_active(self):
+        return self._thread is not None
+
+    def status(self):
+        with self._lock:
+            if self._spec is None:
+                return {"active": False}
+            steps = [event for event in self._events if event["type"] == "step"]
+            return {
+                "active": self._thread is not None,
+                **self._spec,
+                "completed": len(steps),
+                "result": self._events[-1]["type"] if self._finished and self._events else None,
+                "startJitterMaxMs": max((abs(e["startJitterMs"]) for e in steps), default=None),
+                "stopJitterMaxMs": max((abs(e["stopJitterMs"]) for e in steps), default=None),
+            }
+
+    def events(self, after, timeout):
+        """Events from index after on, waiting up to timeout for one; also whether the sweep is over."""
+        with self._changed:
+            if len(self._events) <= after and not self._finished:
+                self._changed.wait(timeout)
+            return self._events[after:], self._finished
+
+    def _emit(self, generation, kind, **fields):
+        with self._changed:
+            if generation != self._generation:
+                return
+            self._events.append({"type": kind, "sequence": len(self._events), "time": time.time(), **fields})
+            self._changed.notify_all()
+
+    def _sleep_until(self, deadline, stop):
+        """Waits for a monotonic deadline; False if the sweep was stopped first."""
+        switch_interval = None
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return not stop.is_set()
+                if remaining > SPIN_SECONDS:
+                    if stop.wait(remaining - SPIN_SECONDS):
+                        return False
+                else:
+                    if switch_interval is None:
+                        switch_interval = sys.getswitchinterval()
+                        sys.setswitchinterval(min(switch_interval, SWITCH_INTERVAL))
+                    time.sleep(0)  # let other threads run while spinning
+        finally:
+            if switch_interval is not None:
+                sys.setswitchinterval(switch_interval)
+
+    def _halt(self):
+        self.run(self.controller.set_focuser_abort_motion, True)
+        self.run(self.controller.set_focuser_abort_motion, False)  # INDI leaves the abort switch on otherwise
+
+    def _run(self, generation, spec, stop):
+        steps = spec["steps"]
+        self._emit(generation, "started", steps=len(steps), direction=spec["direction"])
+        moving = False
+        result, error = "completed", None
+        try:
+            if spec["speed"] is not None:
+                self.run(self.controller.set_focuser_speed, spec["speed"])
+            deadline = time.monotonic() + LEAD_SECONDS
+            for index, duration in enumerate(steps):
+                self.run(self.controller.set_focuser_timer, duration)
+                if not self._sleep_until(deadline, stop):
+                    result = "aborted"
+                    break
+                started = time.monotonic()
+                self.run(self.controller.set_focuser_motion, spec["direction"])
+                moving = True
+                # The stop is timed from when the start went out, so a late start does not shorten the move
+                stop_deadline = started + duration / 1000.0
+                self._sleep_until(stop_deadline, stop)
+                stopped = time.monotonic()
+                self._halt()
+                moving = False
+                self._emit(generation, "step", step=index + 1, of=len(steps), durationMs=duration,
+                           movedMs=round((stopped - started) * 1000.0, 3),
+                           startJitterMs=round((started - deadline) * 1000.0, 3),
+                           stopJitterMs=round((stopped - stop_deadline) * 1000.0, 3))
+                if stop.is_set():
+                    result = "aborted"
+                    break
+                deadline = stop_deadline + spec["settle"]
+        except Exception as e:
+            result, error = "failed", str(e)
+            self.logger.error(f"Focus sweep failed: {e}")
+        finally:
+            if moving:
+                try:
+                    self._halt()
+                except Exception as e:
+                    self.logger.error(f"Could not stop the focuser: {e}")
+        self.logger.info(f"Focus sweep {result}")
+        with self._changed:
+            if generation != self._generation:
+                return
+            self._thread = None
+        self._emit(generation, result, **({"message": error} if error else {}))
+        with self._changed:
+            if generation == self._generation:
+                self._finished = True
+                self._changed.notify_all()
@@ -0,0 +1,46 @@
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger('HorizonMask')
+
+
+class HorizonMask:
+    """Minimum usable altitude as a function of azimuth.
+
+    Points are (azimuth, altitude) pairs in degrees; altitudes in between are
+    linearly interpolated and the profile wraps around at 360°.
+    """
+
+    def __init__(self, points=None, default_altitude=0.0):
+        if points:
+            points = sorted((float(az) % 360.0, float(alt)) for az, alt in points)
+            self.azimuths = np.array([p[0] for p in points])
+            self.altitudes = np.array([p[1] for p in points])
+        else:
+            self.azimuths = np.array([0.0])
+            self.altitudes = np.array([float(default_altitude)])
+
+    @classmethod
+    def from_file(cls, path, default_altitude=0.0):
+        """Loads a JSON list of [azimuth, altitude] pairs, or a flat mask if the file is missing."""
+        path = Path(path)
+        if not path.exists():
+            return cls(default_altitude=default_altitude)
+        points = json.loads(path.read_text())
+        logger.info(f"Loaded horizon mask with {len(points)} points from {path}")
+        return cls(points, default_altitude)
+
+    def min_altitude(self, azimuth):
+        """Returns the mask altitude for scalar or array azimuths (degrees)."""
+        if len(self.azimuths) == 1:
+            return np.full(np.shape(azimuth), self.altitudes[0]) if np.ndim(azimuth) else float(self.altitudes[0])
+        return np.interp(np.mod(azimuth, 360.0), self.azimuths, self.altitudes, period=360.0)
+
+    def is_visible(self, altitude, azimuth):
+        return np.asarray(altitude) > self.min_altitude(azimuth)
+
+    def to_list(self):
+        return [[float(az), float(alt)] for az, alt in zip(self.azimuths, self.altitudes)]
@@ -1,11 +1,17 @@
 import PyIndi
 import logging
 
+import tracing
+
 class IndiClient(PyIndi.BaseClient):
     def __init__(self):
         super(IndiClient, self).__init__()
         self.logger = logging.getLogger('IndiClient')
         self.logger.info('creating an instance of IndiClient')
+        self.on_server_disconnected = None  # callback(code)
+        self.on_device_removed = None       # callback(device_name)
+        self.on_property_update = None      # callback(property), for new and updated properties
+        self._replies = {}                  # (device, property) -> traced send waiting for the driver's reply
 
     def newDevice(self, d):
         '''Emmited when a new device is created from INDI server.'''
@@ -14,14 +20,49 @@ class IndiClient(PyIndi.BaseClient):
     def removeDevice(self, d):
         '''Emmited when a device is deleted from INDI server.'''
         self.logger.info(f"remove device {d.getDeviceName()}")
+        if self.on_device_removed is not None:
+            self.on_device_removed(d.getDeviceName())
 
     def newProperty(self, p):
         '''Emmited when a new property is created for an INDI driver.'''
         self.logger.info(f"new property {p.getName()} as {p.getTypeAsString()} for device {p.getDeviceName()}")
+        self._reply_received(p)
+        if self.on_property_update is not None:
+            self.on_property_update(p)
 
     def updateProperty(self, p):
         '''Emmited when a new property value arrives from INDI server.'''
         self.logger.info(f"update property {p.getName()} as {p.getTypeAsString()} for device {p.getDeviceName()}")
+        self._reply_received(p)
+        if self.on_property_update is not None:
+            self.on_property_update(p)
+
+    # The sendNew* overrides time the call itself and, in a traced request, the
+    # round trip until indiserver sends the property back
+
+    def sendNewSwitch(self, p):
+        with tracing.span("indi.sendNewSwitch", property=p.getName()):
+            super().sendNewSwitch(p)
+        self._await_reply(p)
+
+    def sendNewNumber(self, p):
+        with tracing.span("indi.sendNewNumber", property=p.getName()):
+            super().sendNewNumber(p)
+        self._await_reply(p)
+
+    def sendNewText(self, p):
+        with tracing.span("indi.sendNewText", property=p.getName()):
+            super().sendNewText(p)
+        self._await_reply(p)
+
+    def _await_reply(self, p):
+        handle = tracing.begin_async(f"indi.reply {p.getName()}", device=p.getDeviceName())
+        if handle is not None:
+            self._replies[(p.getDeviceName(), p.getName())] = handle
+
+    def _reply_received(self, p):
+        if self._replies:
+            tracing.end_async(self._replies.pop((p.getDeviceName(), p.getName()), None), state=p.getStateAsString())
 
     def removeProperty(self, p):
         '''Emmited when a property is deleted for an INDI driver.'''
@@ -38,3 +79,5 @@ class IndiClient(PyIndi.BaseClient):
     def serverDisconnected(self, code):
         '''Emmited when the server gets disconnected.'''
         self.logger.info(f"Server disconnected (exit code = {code},{self.getHost()}:{self.getPort()})")
+        if self.on_server_disconnected is not None:
+            self.on_server_disconnected(code)
@@ -1,16 +1,40 @@
-from base_controller import BaseTelescopeController
+from base_controller import BaseTelescopeController, TrackRateUnsupportedError
 import PyIndi
 import time
 import logging
 from indi_client import IndiClient
+import sidereal
+import deadline
 from datetime import datetime
 
+PROPERTY_TIMEOUT = 5  # seconds to wait for a property to be defined by the driver
+PROPERTY_POLL_SECONDS = 1.0  # fallback re-check; property updates wake waits sooner
+SLEW_TIMEOUT = 180
+SYNC_TIMEOUT = 30
+CONFIG_LOAD_TIMEOUT = 5
+
+# Properties holding persistent settings (base_controller.SETTINGS). FOCUS_TIMER is
+# left out: the driver counts it down while the focuser moves.
+SETTING_PROPERTIES = {
+    "GEOGRAPHIC_COORD": "site",
+    "TELESCOPE_SLEW_RATE": "slewRate",
+    "TELESCOPE_TRACK_MODE": "trackMode",
+    "TELESCOPE_PARK_POSITION": "parkPosition",
+    "FOCUS_SPEED": "focuserSpeed",
+}
+
 class IndiTelescopeController(BaseTelescopeController):
-    def __init__(self, host="localhost", port=7624, device_name="LX200 Autostar"):
+    def __init__(self, host="localhost", port=7624, device_name="LX200 Autostar", device_address="10.0.0.1", device_port=4030):
+        super().__init__()
         self.client = IndiClient()
         self.client.setServer(host, port)
+        self.client.on_server_disconnected = lambda code: self.mark_disconnected(f"INDI server disconnected (code {code})")
+        self.client.on_device_removed = self._device_removed
+        self.client.on_property_update = self._property_updated
         self.device = None
         self.device_name = device_name
+        self.device_address = device_address
+        self.device_port = device_port
         self.logger = logging.getLogger('IndiTelescopeController')
 
     def connect(self):
@@ -51,16 +75,16 @@ class IndiTelescopeController(BaseTelescopeController):
             raise RuntimeError("DEVICE_ADDRESS not available")
 
         # --- Set DEVICE_ADDRESS ---
-        device_address_prop[0].text = "10.0.0.1"
+        device_address_prop[0].text = self.device_address
         self.client.sendNewText(device_address_prop)
-        self.logger.info("Sent DEVICE_ADDRESS = 10.0.0.1")
+        self.logger.info(f"Sent DEVICE_ADDRESS = {self.device_address}")
         time.sleep(2)
         self.logger.info(f"DEVICE_ADDRESS now: {device_address_prop[0].text}")
 
         # --- Set DEVICE_PORT ---
-        device_address_prop[1].text = "4030"
+        device_address_prop[1].text = str(self.device_port)
         self.client.sendNewText(device_address_prop)
-        self.logger.info("Sent DEVICE_PORT = 4030")
+        self.logger.info(f"Sent DEVICE_PORT = {self.device_port}")
         time.sleep(2)
         self.logger.info(f"DEVICE_PORT now: {device_address_prop[1].text}")
 
@@ -102,6 +126,30 @@ class IndiTelescopeController(BaseTelescopeController):
     def is_connected(self):
         return self.client.isServerConnected()
 
+    def health_check(self):
+        return self.client.isServerConnected() and self.device is not None and self.device.isConnected()
+
+    def _property_updated(self, prop):
+        self.notify_update()
+        key = SETTING_PROPERTIES.get(prop.getName())
+        # Ok means the driver applied the value; Busy/Alert updates are not settings yet
+        if key is None or prop.getDeviceName() != self.device_name or prop.getState() != PyIndi.IPS_OK:
+            return
+        try:
+            self._state_changed(key, self.read_setting(key))
+        except Exception as e:  # e.g. still connecting: the next update will be recorded
+            self.logger.debug(f"Not recording {key}: {e}")
+
+    def _device_removed(self, name):
+        if name == self.device_name:
+            self.mark_disconnected(f"device '{name}' removed")
+
+    def _wait_for_property(self, getter, name, timeout=PROPERTY_TIMEOUT):
+        if not self._poll_until(lambda: getter(name), PROPERTY_POLL_SECONDS, timeout):
+            deadline.check(f"Waiting for {name}")
+            raise RuntimeError(f"{name} not found")
+        return getter(name)
+
     def get_coordinates(self):
         eq = self.device.getNumber("EQUATORIAL_EOD_COORD")
         if eq is None:
@@ -112,14 +160,11 @@ class IndiTelescopeController(BaseTelescopeController):
         }
         return position
 
-    def slew_to(self, ra, dec):
+    def slew_to(self, ra, dec, wait=True):
         self.logger.debug(f"[SLEW] Slewing to RA={ra}, DEC={dec}")
 
         # Step 1: Set ON_COORD_SET to SLEW
-        coord_mode = self.device.getSwitch("ON_COORD_SET")
-        while not(coord_mode):
-            time.sleep(0.5)
-            coord_mode=self.device.getSwitch("ON_COORD_SET")
+        coord_mode = self._wait_for_property(self.device.getSwitch, "ON_COORD_SET")
         
         coord_mode[0].s=PyIndi.ISS_ON  # TRACK
         coord_mode[1].s=PyIndi.ISS_OFF   # SLEW
@@ -127,34 +172,34 @@ class IndiTelescopeController(BaseTelescopeController):
         self.client.sendNewSwitch(coord_mode)
 
         # We set the desired coordinates
-        telescope_radec=self.device.getNumber("EQUATORIAL_EOD_COORD")
-        while not(telescope_radec):
-            time.sleep(0.5)
-            telescope_radec=self.device.getNumber("EQUATORIAL_EOD_COORD")
+        telescope_radec = self._wait_for_property(self.device.getNumber, "EQUATORIAL_EOD_COORD")
 
         telescope_radec[0].value=ra
         telescope_radec[1].value=dec
         self.client.sendNewNumber(telescope_radec)
 
+        if not wait:
+            return {"status": "Slewing to coordinates", "ra": ra, "dec": dec}
+
         # and wait for the scope has finished moving
-        while (telescope_radec.getState() == PyIndi.IPS_BUSY):
-            self.logger.debug(f"Slewing... RA={telescope_radec[0].value}, Dec={telescope_radec[1].value}")
-            self.logger.debug(f"State: {telescope_radec.getState()}")
-            time.sleep(0.5)
+        if not self._poll_until(lambda: telescope_radec.getState() != PyIndi.IPS_BUSY,
+                                PROPERTY_POLL_SECONDS, SLEW_TIMEOUT):
+            if deadline.remaining(default=1.0) > 0:
+                raise RuntimeError(f"Slew still busy after {SLEW_TIMEOUT} s")
+            # The request ran out of time, not the mount: report the slew as under way
+            self.logger.debug(f"[SLEW] Deadline reached at RA={telescope_radec[0].value}, Dec={telescope_radec[1].value}")
+            return {"status": "Slewing to coordinates", "ra": ra, "dec": dec, "partial": True}
 
         print("State:", telescope_radec.getState())
         self.logger.debug("[SLEW] Slew completed")
-        time.sleep(0.5)  # Give INDI a moment to register switch
+        self._wait(0.5)  # Give INDI a moment to register switch
         return {"status": "Slewing to coordinates", "ra": ra, "dec": dec}
 
     def sync_to(self, ra, dec):
         self.logger.debug(f"[SYNC] Syncing to RA={ra}, DEC={dec}")
 
         # Step 1: Set ON_COORD_SET to SLEW
-        coord_mode = self.device.getSwitch("ON_COORD_SET")
-        while not(coord_mode):
-            time.sleep(0.5)
-            coord_mode=self.device.getSwitch("ON_COORD_SET")
+        coord_mode = self._wait_for_property(self.device.getSwitch, "ON_COORD_SET")
         
         coord_mode[0].s=PyIndi.ISS_OFF  # TRACK
         coord_mode[1].s=PyIndi.ISS_OFF  # SLEW
@@ -162,24 +207,22 @@ class IndiTelescopeController(BaseTelescopeController):
         self.client.sendNewSwitch(coord_mode)
 
         # We set the desired coordinates
-        telescope_radec=self.device.getNumber("EQUATORIAL_EOD_COORD")
-        while not(telescope_radec):
-            time.sleep(0.5)
-            telescope_radec=self.device.getNumber("EQUATORIAL_EOD_COORD")
+        telescope_radec = self._wait_for_property(self.device.getNumber, "EQUATORIAL_EOD_COORD")
 
         telescope_radec[0].value=ra
         telescope_radec[1].value=dec
         self.client.sendNewNumber(telescope_radec)
 
         # and wait for the scope has finished moving
-        while (telescope_radec.getState() == PyIndi.IPS_BUSY):
-            self.logger.debug(f"Syncing... RA={telescope_radec[0].value}, Dec={telescope_radec[1].value}")
-            self.logger.debug(f"State: {telescope_radec.getState()}")
-            time.sleep(0.5)
+        synced = self._poll_until(lambda: telescope_radec.getState() != PyIndi.IPS_BUSY,
+                                  PROPERTY_POLL_SECONDS, SYNC_TIMEOUT)
+        if not synced and deadline.remaining(default=1.0) > 0:
+            raise RuntimeError(f"Sync still busy after {SYNC_TIMEOUT} s")
+        rejected = telescope_radec.getState() == PyIndi.IPS_ALERT
 
         print("State:", telescope_radec.getState())
-        self.logger.debug("[SYNC] Sync completed")
-        time.sleep(0.5)  # Give INDI a moment to register switch
+        self.logger.debug("[SYNC] Sync completed" if synced else "[SYNC] Deadline reached, sync still busy")
+        self._wait(0.5)  # Give INDI a moment to register switch
 
         # Set ON_COORD_SET back to SLEW
         coord_mode[0].s=PyIndi.ISS_OFF    # TRACK
@@ -187,6 +230,10 @@ class IndiTelescopeController(BaseTelescopeController):
         coord_mode[2].s=PyIndi.ISS_OFF    # SYNC
         self.client.sendNewSwitch(coord_mode)
 
+        if rejected:
+            raise RuntimeError("Sync rejected by the driver")
+        if not synced:
+            return {"status": "pending", "ra": ra, "dec": dec, "partial": True}
         return {"status": "success", "ra": ra, "dec": dec}
 
     
@@ -232,10 +279,10 @@ class IndiTelescopeController(BaseTelescopeController):
 
         ra = None
         dec = None
+        ha = None
 
         if self.device_name == "Telescope Simulator":
             # Get PARK_HA and PARK_DEC
-            ha = None
             for elem in prop:
                 if elem.name == "PARK_HA":
                     ha = elem.value
@@ -243,10 +290,8 @@ class IndiTelescopeController(BaseTelescopeController):
                     dec = elem.value
 
             if ha is not None:
-                # Convert HA to RA using LST
-                #lst = self.get_sidereal_time()
-                #ra = (lst - ha) % 24
-                ra = ha  # Placeholder for actual RA calculation
+                # Convert HA to RA using the local sidereal time of the site
+                ra = sidereal.clock.ra_from_hour_angle(ha, self.get_site_coords()["longitude"])
         else:
             # For real telescopes, use PARK_RA and PARK_DEC
             for elem in prop:
@@ -258,9 +303,11 @@ class IndiTelescopeController(BaseTelescopeController):
         if ra is None or dec is None:
             raise ValueError("Park position RA/DEC not available.")
 
+        if ha is not None:
+            return {"ra": ra, "dec": dec, "ha": ha}
         return {"ra": ra, "dec": dec}
 
-    def set_park_position(self, ra, dec):
+    def set_park_position(self, ra, dec, ha=None):
         prop = self.device.getNumber("TELESCOPE_PARK_POSITION")
         if prop is None:
             raise RuntimeError("TELESCOPE_PARK_POSITION not found")
@@ -269,7 +316,12 @@ class IndiTelescopeController(BaseTelescopeController):
         has_az_alt = False
 
         for elem in prop:
-            if elem.name == "PARK_RA":
+            if elem.name == "PARK_HA":
+                if ha is None:
+                    ha = sidereal.clock.hour_angle(ra, self.get_site_coords()["longitude"])
+                elem.value = ha
+                has_ra_dec = True
+            elif elem.name == "PARK_RA":
                 elem.value = ra
                 has_ra_dec = True
             elif elem.name == "PARK_DEC":
@@ -573,13 +625,13 @@ class IndiTelescopeController(BaseTelescopeController):
         self.client.sendNewSwitch(config_process_prop)
 
         # Wait for driver to process (timeout safety)
-        start_time = time.time()
-        while time.time() - start_time < 5:  # 5-second timeout
-            config_process_prop = self.device.getSwitch("CONFIG_PROCESS")
-            load_switch = next((i for i in config_process_prop if i.name == "CONFIG_LOAD"), None)
-            if load_switch and load_switch.s == PyIndi.ISS_OFF:
-                break
-            time.sleep(0.1)
+        def load_finished():
+            prop = self.device.getSwitch("CONFIG_PROCESS")
+            load_switch = next((i for i in prop if i.name == "CONFIG_LOAD"), None) if prop else None
+            return load_switch is not None and load_switch.s == PyIndi.ISS_OFF
+
+        loaded = self._poll_until(load_finished, PROPERTY_POLL_SECONDS, CONFIG_LOAD_TIMEOUT)
+        config_process_prop = self.device.getSwitch("CONFIG_PROCESS") or config_process_prop
 
         # Reset explicitly (in case driver doesn't auto-reset)
         for item in config_process_prop:
@@ -587,7 +639,13 @@ class IndiTelescopeController(BaseTelescopeController):
                 item.s = PyIndi.ISS_OFF
         self.client.sendNewSwitch(config_process_prop)
 
-        return {"status": "success"}
+        return {"status": "success" if loaded else "timeout"}
+
+    def get_track_mode(self):
+        track_mode_prop = self.device.getSwitch("TELESCOPE_TRACK_MODE")
+        if not track_mode_prop:
+            raise RuntimeError("Track Mode property not found")
+        return next((item.name for item in track_mode_prop if item.s == PyIndi.ISS_ON), None)
 
     def set_track_mode(self, mode):
         """Sets the telescope tracking mode."""
@@ -599,6 +657,26 @@ class IndiTelescopeController(BaseTelescopeController):
             self.logger.info(f"Setting {item.name} to {'ON' if item.s == PyIndi.ISS_ON else 'OFF'}")
         self.client.sendNewSwitch(track_mode_prop)
 
+    def set_track_rate(self, ra_rate, dec_rate):
+        """Switches to custom tracking at the given RA/Dec rates (arcsec/s)."""
+        track_rate_prop = self.device.getNumber("TELESCOPE_TRACK_RATE")
+        if not track_rate_prop:
+            raise TrackRateUnsupportedError("TELESCOPE_TRACK_RATE not found")
+
+        track_mode_prop = self.device.getSwitch("TELESCOPE_TRACK_MODE")
+        if track_mode_prop and not any(item.name == "TRACK_CUSTOM" for item in track_mode_prop):
+            raise TrackRateUnsupportedError("TRACK_CUSTOM mode not supported")
+
+        for item in track_rate_prop:
+            if item.name == "TRACK_RATE_RA":
+                item.value = ra_rate
+            elif item.name == "TRACK_RATE_DE":
+                item.value = dec_rate
+        self.client.sendNewNumber(track_rate_prop)
+
+        if track_mode_prop and not any(item.name == "TRACK_CUSTOM" and item.s == PyIndi.ISS_ON for item in track_mode_prop):
+            self.set_track_mode("TRACK_CUSTOM")
+
     def set_focuser_motion(self, direction):
         focuser_motion_prop = self.device.getSwitch("FOCUS_MOTION")
         if not focuser_motion_prop:
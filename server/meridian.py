@@ -0,0 +1,216 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import sidereal
+
+SIDEREAL_DAY_SECONDS = 24.0 / sidereal.SIDEREAL_HOURS_PER_SECOND
+GRID_MINUTES = 1.0       # resolution of the altitude check over the flip window
+CACHE_SECONDS = 300      # plans are in absolute times; recomputed this often for the hour-angle snapshot
+CACHE_ENTRIES = 256
+CHUNK_TARGETS = 20000    # targets per vectorized pass, bounds the (targets x window) altitude grid
+
+
+def _iso(unix_time):
+    return None if unix_time != unix_time else time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(unix_time))
+
+
+class MeridianPlanner:
+    """When targets cross the meridian, and when the mount should flip for them.
+
+    A German equatorial mount can follow a target up to limit_minutes past
+    the meridian before it must flip, and may flip from early_minutes
+    before it (0 for mounts that only flip once past it). Within that
+    window, and not before now, a target that is out of reach for a while
+    anyway (above max_altitude or below the horizon) is flipped for as
+    soon as it is back in reach, so the flip costs no observing time and
+    the re-slew stays within limits; if it never comes back in the window
+    there is no automatic flip. Otherwise the flip is at the start of the
+    window. A target that sets before the limit needs no flip. A
+    target already past the meridian is taken to be on the far side of
+    the pier, as a slew there would leave it, so its flip is at the
+    next transit.
+
+    Everything is computed for many targets at once from the sidereal
+    clock, and cached per target key and site.
+    """
+
+    def __init__(self, limit_minutes, early_minutes, min_altitude, max_altitude):
+        self.limit_minutes = limit_minutes
+        self.early_minutes = early_minutes
+        self.min_altitude = min_altitude  # degrees, or a function of azimuth (e.g. HorizonMask.min_altitude)
+        self.max_altitude = max_altitude
+        self.logger = logging.getLogger('MeridianPlanner')
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def plan(self, key, ra_hours, dec_deg, latitude, longitude, unix=None):
+        """Plan arrays for the targets at ICRS ra_hours / dec_deg; key names them for the cache.
+
+        Returns a dict of arrays: transit (unix time of the next upper
+        transit), limit, flipAt (NaN if no flip is needed), reason and
+        culmination (degrees).
+        """
+        unix = time.time() if unix is None else unix
+        cache_key = (key, round(latitude, 4), round(longitude, 4))
+        with self._lock:
+            entry = self._cache.get(cache_key)
+            if entry is not None and 0 <= unix - entry[0] < CACHE_SECONDS:
+                self._cache.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+        ra_hours, dec_deg = np.atleast_1d(ra_hours), np.atleast_1d(dec_deg)
+        parts = [self._compute(ra_hours[i:i + CHUNK_TARGETS], dec_deg[i:i + CHUNK_TARGETS], latitude, longitude, unix)
+                 for i in range(0, max(len(ra_hours), 1), CHUNK_TARGETS)]
+        result = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        with self._lock:
+            self._cache[cache_key] = (unix, result)
+            self.misses += 1
+            while len(self._cache) > CACHE_ENTRIES:
+                self._cache.popitem(last=False)
+        return result
+
+    def _compute(self, ra_hours, dec_deg, latitude, longitude, unix):
+        ra, dec = sidereal.clock.of_date(ra_hours, dec_deg, unix)
+        ha = (sidereal.clock.lst(longitude, unix) - ra + 12.0) % 24.0 - 12.0
+        transit = unix - ha / sidereal.SIDEREAL_HOURS_PER_SECOND
+        transit = np.where(ha > 0, transit + SIDEREAL_DAY_SECONDS, transit)
+
+        # Altitude over the flip window, which is the same stretch of hour angle for every target
+        offsets = np.arange(-self.early_minutes, self.limit_minutes + GRID_MINUTES / 2, GRID_MINUTES)
+        grid_hours = offsets / 60.0 * sidereal.SIDEREAL_HOURS_PER_SECOND * 3600.0
+        alt, az = sidereal.altaz_at_hour_angle(grid_hours[None, :], dec[:, None], latitude)
+        floor = self.min_altitude(az) if callable(self.min_altitude) else self.min_altitude
+        below = alt <= floor
+        ahead = transit[:, None] + offsets[None, :] * 60.0 >= unix  # inside an early window, not in the past
+        unreachable = below | (alt > self.max_altitude)
+        out_of_reach = unreachable & ahead
+
+        culmination = 90.0 - np.abs(latitude - dec)
+        goes_out = out_of_reach.any(axis=1)
+        first_out = np.argmax(out_of_reach, axis=1)
+        # The flip re-slews to the target, so it waits until the target is back within limits
+        back = ~unreachable & (np.arange(len(offsets))[None, :] > first_out[:, None])
+        first_back = np.argmax(back, axis=1)
+        first_ahead = np.argmax(ahead, axis=1)
+        flip_at = transit + np.where(goes_out, offsets[first_back], offsets[first_ahead]) * 60.0
+        flip_at[goes_out & ~back.any(axis=1)] = np.nan
+        reason = np.where(goes_out, "belowHorizon", "earliest").astype(object)
+        reason[goes_out & (np.take_along_axis(alt, first_out[:, None], axis=1)[:, 0] > self.max_altitude)] = \
+            "aboveMaxAltitude"
+        sets_first = below[:, -1]
+        reason[sets_first] = "setsBeforeLimit"
+        reason[culmination <= (floor.min(axis=1) if np.ndim(floor) else floor)] = "neverRises"
+        flip_at[(reason == "setsBeforeLimit") | (reason == "neverRises")] = np.nan
+        return {"transit": transit, "limit": transit + self.limit_minutes * 60.0, "flipAt": flip_at,
+                "reason": reason, "culmination": culmination}
+
+    def describe(self, plan, index=0, unix=None, warn_minutes=30):
+        """One target's plan as a JSON-ready dict, relative to now."""
+        unix = time.time() if unix is None else unix
+        transit, limit, flip_at = (float(plan[name][index]) for name in ("transit", "limit", "flipAt"))
+        to_flip = (flip_at - unix) / 60.0
+        warning = None
+        if flip_at == flip_at and to_flip <= warn_minutes:
+            warning = f"Meridian flip due in {to_flip:.0f} min" if to_flip > 0 else "Meridian flip due now"
+        return {
+            "side": "east" if 0 <= transit - unix < SIDEREAL_DAY_SECONDS / 2 else "west",
+            "transit": _iso(transit),
+            "minutesToMeridian": (transit - unix) / 60.0,
+            "flipLimit": _iso(limit),
+            "minutesToFlipLimit": (limit - unix) / 60.0,
+            "flipAt": _iso(flip_at),
+            "minutesToFlip": None if flip_at != flip_at else to_flip,
+            "flipReason": str(plan["reason"][index]),
+            "culmination": float(plan["culmination"][index]),
+            "warning": warning,
+        }
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses,
+                    "limitMinutes": self.limit_minutes, "earlyMinutes": self.early_minutes}
+
+
+class FlipScheduler:
+    """Watches the current target and performs its planned meridian flip.
+
+    flip(target, cancelled) is called at the planned time, from this
+    thread, when auto is on; it should re-slew to the target, which a German
+    equatorial mount does from the other side of the pier once past the
+    meridian. It checks cancelled() right before moving, and returns False
+    if it did not. With auto off the plan is only reported.
+    """
+
+    def __init__(self, flip, auto=False):
+        self.flip = flip
+        self.auto = auto
+        self.logger = logging.getLogger('FlipScheduler')
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._target = None
+        self._plan = None
+        self._flip_at = None
+        self._flipped = None
+
+    def start(self, target, plan):
+        """Watches target (passed back to flip) with its MeridianPlanner plan."""
+        self.stop()
+        flip_at = float(plan["flipAt"][0])
+        with self._lock:
+            self._target = target
+            self._plan = plan
+            self._flip_at = None if flip_at != flip_at else flip_at
+            self._flipped = None
+            self._stop.clear()
+            if self.auto and self._flip_at is not None:
+                self._thread = threading.Thread(target=self._run, name="meridian-flip", daemon=True)
+                self._thread.start()
+                self.logger.info(f"Meridian flip for {target['name']} scheduled at {_iso(self._flip_at)}")
+
+    def stop(self, wait=True):
+        """Cancels the watch; wait=False only signals the thread, and a later stop() joins it."""
+        thread = self._thread
+        if thread is not None:
+            self._stop.set()
+            if not wait:
+                return
+            if thread is not threading.current_thread():
+                thread.join(timeout=1)
+        with self._lock:
+            self._thread = None
+            self._target = None
+            self._plan = None
+
+    def target(self):
+        """(target, plan) being watched, or (None, None)."""
+        with self._lock:
+            return self._target, self._plan
+
+    def status(self):
+        with self._lock:
+            return {"auto": self.auto, "scheduled": self._thread is not None, "flipped": _iso(self._flipped)
+                    if self._flipped else None}
+
+    def _run(self):
+        delay = self._flip_at - time.time()
+        if delay > 0 and self._stop.wait(delay):
+            return
+        target = self._target
+        try:
+            if self.flip(target, self._stop.is_set):
+                with self._lock:
+                    self._flipped = time.time()
+                self.logger.info(f"Meridian flip for {target['name']} done")
+            else:
+                self.logger.info(f"Meridian flip for {target['name']} cancelled")
+        except Exception as e:
+            self.logger.error(f"Meridian flip for {target['name']} failed: {e}")
+        with self._lock:
+            self._thread = None
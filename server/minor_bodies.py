@@ -0,0 +1,346 @@
+import gzip
+import logging
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from skyfield.api import wgs84
+
+import compute_pool
+
+GAUSS_K = 0.01720209895          # Gaussian gravitational constant, rad/day
+LIGHT_DAYS_PER_AU = 0.0057755183
+OBLIQUITY_J2000 = np.radians(23.4392911)
+PARABOLIC_TOLERANCE = 1e-6       # |e - 1| below this is solved with Barker's equation
+KEPLER_ITERATIONS = 50
+KEPLER_TOLERANCE = 1e-12
+BUCKET_SECONDS = 300             # propagated positions are shared within one bucket
+CACHE_BUCKETS = 4
+
+_PACKED_DIGITS = {c: i for i, c in enumerate("0123456789ABCDEFGHIJKLMNOPQRSTUV")}
+_PACKED_TABLE = np.zeros(128, dtype=np.int64)
+for _c, _v in _PACKED_DIGITS.items():
+    _PACKED_TABLE[ord(_c)] = _v
+
+
+def _open_text(path):
+    path = Path(path)
+    return gzip.open(path, 'rb') if path.suffix == ".gz" else open(path, 'rb')
+
+
+def _julian_day(year, month, day):
+    """Vectorized Gregorian calendar date (day may be fractional) to Julian Date."""
+    a = (14 - month) // 12
+    y = year + 4800 - a
+    m = month + 12 * a - 3
+    jdn = np.floor(day).astype(np.int64) + (153 * m + 2) // 5 + 365 * y + y // 4 - y // 100 + y // 400 - 32045
+    return jdn - 0.5 + (day - np.floor(day))
+
+
+def _column(raw, start, end):
+    """Fixed-width column [start, end) of a (rows, width) byte matrix as an S-array."""
+    return np.ascontiguousarray(raw[:, start:end]).view(f"S{end - start}").ravel()
+
+
+def _orientation(peri, node, incl):
+    """Unit vectors towards perihelion (P) and 90° ahead of it (Q), in ICRS/J2000 equatorial."""
+    w, o, i = np.radians(peri), np.radians(node), np.radians(incl)
+    cw, sw, co, so, ci, si = np.cos(w), np.sin(w), np.cos(o), np.sin(o), np.cos(i), np.sin(i)
+    p = np.stack((cw * co - sw * so * ci, cw * so + sw * co * ci, sw * si), axis=-1)
+    q = np.stack((-sw * co - cw * so * ci, -sw * so + cw * co * ci, cw * si), axis=-1)
+    ce, se = np.cos(OBLIQUITY_J2000), np.sin(OBLIQUITY_J2000)
+    rotation = np.array([[1, 0, 0], [0, ce, -se], [0, se, ce]])
+    return p @ rotation.T, q @ rotation.T
+
+
+def solve_conic(q, e, dt):
+    """In-plane position (x towards perihelion, y) in AU, dt days after perihelion.
+
+    Elliptic and hyperbolic orbits are solved with vectorized Newton
+    iterations on Kepler's equation, near-parabolic ones with Barker's
+    equation in closed form.
+    """
+    q, e, dt = np.broadcast_arrays(np.asarray(q, float), np.asarray(e, float), np.asarray(dt, float))
+    x = np.empty(q.shape)
+    y = np.empty(q.shape)
+
+    ell = e < 1 - PARABOLIC_TOLERANCE
+    hyp = e > 1 + PARABOLIC_TOLERANCE
+    par = ~(ell | hyp)
+
+    if ell.any():
+        ee = e[ell]
+        a = q[ell] / (1 - ee)
+        mean = np.mod(GAUSS_K * a ** -1.5 * dt[ell] + np.pi, 2 * np.pi) - np.pi
+        ecc = mean + 0.85 * ee * np.sign(np.sin(mean))
+        for _ in range(KEPLER_ITERATIONS):
+            step = (ecc - ee * np.sin(ecc) - mean) / (1 - ee * np.cos(ecc))
+            ecc -= step
+            if np.max(np.abs(step)) < KEPLER_TOLERANCE:
+                break
+        x[ell] = a * (np.cos(ecc) - ee)
+        y[ell] = a * np.sqrt(1 - ee ** 2) * np.sin(ecc)
+
+    if hyp.any():
+        ee = e[hyp]
+        a = q[hyp] / (ee - 1)
+        mean = GAUSS_K * a ** -1.5 * dt[hyp]
+        anomaly = np.arcsinh(mean / ee)
+        for _ in range(KEPLER_ITERATIONS):
+            step = (ee * np.sinh(anomaly) - anomaly - mean) / (ee * np.cosh(anomaly) - 1)
+            anomaly -= step
+            if np.max(np.abs(step)) < KEPLER_TOLERANCE:
+                break
+        x[hyp] = a * (ee - np.cosh(anomaly))
+        y[hyp] = a * np.sqrt(ee ** 2 - 1) * np.sinh(anomaly)
+
+    if par.any():
+        qq = q[par]
+        w = 3 * GAUSS_K * dt[par] / np.sqrt(2 * qq ** 3)
+        root = np.cbrt(w / 2 + np.sqrt(w ** 2 / 4 + 1))
+        s = root - 1 / root
+        x[par] = qq * (1 - s ** 2)
+        y[par] = 2 * qq * s
+
+    return x, y
+
+
+def _geocentric(q, e, tp, p, qv, jd_tt, earth):
+    dt = jd_tt - tp
+    x, y = solve_conic(q, e, dt)
+    geo = x[:, None] * p + y[:, None] * qv - earth
+
+    # One light-time iteration is well below an arcsecond for anything past the Moon
+    delay = np.linalg.norm(geo, axis=1) * LIGHT_DAYS_PER_AU
+    x, y = solve_conic(q, e, dt - delay)
+    return x[:, None] * p + y[:, None] * qv - earth
+
+
+def _positions(q, e, tp, p, qv, jd_tt, earth):
+    geo = _geocentric(q, e, tp, p, qv, jd_tt, earth)
+    distance = np.linalg.norm(geo, axis=1)
+    unit = geo / distance[:, None]
+    return {
+        "ra": np.degrees(np.arctan2(unit[:, 1], unit[:, 0])) % 360.0,
+        "dec": np.degrees(np.arcsin(unit[:, 2])),
+        "distance": distance,
+        "unit": unit,
+    }
+
+
+def _propagate(elements, jd_tt, earth, out):
+    """Compute-pool job: positions of the shared catalog, written into shared output arrays."""
+    el = compute_pool.attach(elements)
+    for name, value in _positions(el["q"], el["e"], el["tp"], el["p"], el["qv"], jd_tt, earth).items():
+        out[name][...] = value
+
+
+class MinorBodyCatalog:
+    """Asteroid and comet orbits from MPC element files, held as arrays.
+
+    Every body is stored as perihelion distance, eccentricity, perihelion
+    time and orientation vectors, so the whole set propagates in one
+    vectorized Kepler solve. Perturbations since the element epoch are
+    ignored, which is fine for pointing with current MPCORB/CometEls files.
+    """
+
+    def __init__(self, ephemeris, ts, pool=None):
+        self.ephemeris = ephemeris
+        self.ts = ts
+        self.pool = pool  # optional ComputePool for whole-catalog propagation
+        self.logger = logging.getLogger('MinorBodyCatalog')
+        self.names = []
+        self.index = {}
+        self.q = np.empty(0)
+        self.e = np.empty(0)
+        self.tp = np.empty(0)
+        self.p = np.empty((0, 3))
+        self.qv = np.empty((0, 3))
+        self._cache = OrderedDict()
+        self._elements_handle = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def load_mpcorb(self, path):
+        """Loads asteroid elements in MPCORB.DAT format (plain or .gz)."""
+        with _open_text(path) as f:
+            lines = f.read().split(b"\n")
+
+        # Skip the header if present: data starts after the row of dashes
+        start = next((i + 1 for i, line in enumerate(lines[:100]) if line.startswith(b"-----")), 0)
+        width = 202
+        rows = [line.rstrip(b"\r").ljust(width)[:width] for line in lines[start:] if len(line) >= 103 and line[:1] != b" "]
+        if not rows:
+            return 0
+
+        raw = np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(len(rows), width)
+        mean_anomaly = _column(raw, 26, 35).astype(float)
+        peri = _column(raw, 37, 46).astype(float)
+        node = _column(raw, 48, 57).astype(float)
+        incl = _column(raw, 59, 68).astype(float)
+        e = _column(raw, 70, 79).astype(float)
+        n = _column(raw, 80, 91).astype(float)
+        a = _column(raw, 92, 103).astype(float)
+
+        # Packed epoch, e.g. K24AH = 2024-10-17 (0h TT)
+        epoch = raw[:, 20:25]
+        year = (_PACKED_TABLE[epoch[:, 0]] * 100 + _PACKED_TABLE[epoch[:, 1]] * 10 + _PACKED_TABLE[epoch[:, 2]])
+        epoch_jd = _julian_day(year, _PACKED_TABLE[epoch[:, 3]], _PACKED_TABLE[epoch[:, 4]].astype(float))
+
+        tp = epoch_jd - np.where(mean_anomaly > 180, mean_anomaly - 360, mean_anomaly) / n
+
+        names = []
+        for packed, readable in zip(_column(raw, 0, 7), _column(raw, 166, 194)):
+            readable = readable.decode('ascii', 'replace').strip()
+            aliases = [packed.decode('ascii', 'replace').strip(), readable]
+            numbered = re.match(r"^\((\d+)\)\s*(.*)$", readable)
+            if numbered:
+                aliases.extend(numbered.groups())
+            names.append((readable or aliases[0], aliases))
+
+        p, qv = _orientation(peri, node, incl)
+        self._append(names, a * (1 - e), e, tp, p, qv)
+        self.logger.info(f"Loaded {len(rows)} asteroids from {path}")
+        return len(rows)
+
+    def load_comets(self, path):
+        """Loads comet elements in the MPC CometEls.txt format (plain or .gz)."""
+        names, rows = [], []
+        with _open_text(path) as f:
+            for line in f:
+                line = line.decode('ascii', 'replace').rstrip("\r\n")
+                if len(line) < 102:
+                    continue
+                try:
+                    rows.append([float(line[14:18]), float(line[19:21]), float(line[22:29]), float(line[30:39]),
+                                 float(line[41:49]), float(line[51:59]), float(line[61:69]), float(line[71:79])])
+                except ValueError:
+                    continue
+                full = line[102:158].strip()
+                designation, _, rest = full.partition("/")
+                aliases = [full, full.split(" (")[0]]
+                if designation.endswith("P") and designation[:-1].isdigit():
+                    aliases.extend([designation, rest])
+                named = re.search(r"\(([^)]+)\)$", full)
+                if named:
+                    aliases.append(named.group(1))
+                names.append((full, aliases))
+
+        if not rows:
+            return 0
+
+        data = np.array(rows)
+        tp = _julian_day(data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), data[:, 2])
+        p, qv = _orientation(data[:, 5], data[:, 6], data[:, 7])
+        self._append(names, data[:, 3], data[:, 4], tp, p, qv)
+        self.logger.info(f"Loaded {len(rows)} comets from {path}")
+        return len(rows)
+
+    def _append(self, names, q, e, tp, p, qv):
+        with self._lock:
+            offset = len(self.names)
+            for i, (name, aliases) in enumerate(names):
+                self.names.append(name)
+                for alias in aliases:
+                    if alias:
+                        self.index.setdefault(alias.lower(), offset + i)
+            self.q = np.concatenate((self.q, q))
+            self.e = np.concatenate((self.e, e))
+            self.tp = np.concatenate((self.tp, tp))
+            self.p = np.concatenate((self.p, p))
+            self.qv = np.concatenate((self.qv, qv))
+            self._cache.clear()
+            self._elements_handle = None
+
+    def find(self, name):
+        """Returns the index of a body by name, number or designation, or None."""
+        return self.index.get(name.strip().lower())
+
+    def _earth_heliocentric(self, t):
+        return self.ephemeris['earth'].at(t).position.au - self.ephemeris['sun'].at(t).position.au
+
+    def _geocentric(self, idx, jd_tt, earth):
+        """Light-time corrected geocentric ICRS vectors (AU) for bodies idx at jd_tt."""
+        return _geocentric(self.q[idx], self.e[idx], self.tp[idx], self.p[idx], self.qv[idx], jd_tt, earth)
+
+    def _shared_elements(self):
+        with self._lock:
+            if self._elements_handle is None:
+                self._elements_handle = self.pool.share("minor_bodies", {
+                    "q": self.q, "e": self.e, "tp": self.tp, "p": self.p, "qv": self.qv})
+            return self._elements_handle
+
+    def positions(self, unix_time):
+        """Geocentric astrometric RA/Dec (deg) and distance (AU) of every body.
+
+        Results are cached per BUCKET_SECONDS bucket, so concurrent lookups
+        and cone searches within a few minutes share one propagation.
+        """
+        bucket = int(unix_time // BUCKET_SECONDS)
+        with self._lock:
+            cached = self._cache.get(bucket)
+            if cached is not None:
+                self._cache.move_to_end(bucket)
+                return cached
+
+        t = self.ts.utc(1970, 1, 1, 0, 0, (bucket + 0.5) * BUCKET_SECONDS)
+        earth = self._earth_heliocentric(t)
+        if self.pool is not None and len(self):
+            # Seconds of numpy for a full MPCORB: run it in a worker, off the request threads
+            n = len(self)
+            result = self.pool.run_into(
+                {"ra": (n, float), "dec": (n, float), "distance": (n, float), "unit": ((n, 3), float)},
+                _propagate, self._shared_elements(), t.tt, earth)
+        else:
+            result = _positions(self.q, self.e, self.tp, self.p, self.qv, t.tt, earth)
+
+        with self._lock:
+            self._cache[bucket] = result
+            while len(self._cache) > CACHE_BUCKETS:
+                self._cache.popitem(last=False)
+        return result
+
+    def position(self, index, unix_time):
+        positions = self.positions(unix_time)
+        return {
+            "name": self.names[index],
+            "ra": float(positions["ra"][index]),
+            "dec": float(positions["dec"][index]),
+            "distance": float(positions["distance"][index]),
+        }
+
+    def cone_search(self, ra_deg, dec_deg, radius_deg, unix_time, limit=100):
+        """Bodies within radius_deg of (ra_deg, dec_deg), nearest first."""
+        positions = self.positions(unix_time)
+        ra, dec = np.radians(ra_deg), np.radians(dec_deg)
+        center = np.array([np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)])
+        cos_sep = positions["unit"] @ center
+        hits = np.nonzero(cos_sep >= np.cos(np.radians(radius_deg)))[0]
+        hits = hits[np.argsort(-cos_sep[hits])][:limit]
+        separation = np.degrees(np.arccos(np.clip(cos_sep[hits], -1, 1)))
+        return [{
+            "name": self.names[i],
+            "ra": float(positions["ra"][i]),
+            "dec": float(positions["dec"][i]),
+            "distance": float(positions["distance"][i]),
+            "separation": float(s),
+        } for i, s in zip(hits, separation)]
+
+    def source(self, index, latitude, longitude, elevation):
+        """Tracking source for one body: topocentric RA (hours) / Dec (deg) of date over unix times."""
+        observer = wgs84.latlon(latitude, longitude, elevation_m=elevation)
+
+        def radec(unix_times):
+            t = self.ts.utc(1970, 1, 1, 0, 0, unix_times)
+            earth = (self._earth_heliocentric(t) + observer.at(t).position.au).T
+            geo = self._geocentric(np.full(len(t.tt), index), t.tt, earth)
+            of_date = np.einsum('ijn,nj->ni', t.M, geo)
+            ra = np.degrees(np.arctan2(of_date[:, 1], of_date[:, 0])) % 360.0
+            dec = np.degrees(np.arcsin(of_date[:, 2] / np.linalg.norm(of_date, axis=1)))
+            return ra / 15.0, dec
+
+        return radec
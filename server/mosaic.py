@@ -0,0 +1,141 @@
+import logging
+import time
+
+import numpy as np
+
+from sidereal import clock
+
+MAX_TILES = 100000             # refuse regions that would need more pointings than this
+NIGHT_SUN_ALTITUDE = -12.0     # degrees; nautical twilight counts as night
+NIGHT_HOURS = 24.0             # window searched for the current (or next) night
+NIGHT_STEP_MINUTES = 10
+
+logger = logging.getLogger('Mosaic')
+
+
+def _unwrap_ra(ra_deg, reference):
+    return (np.asarray(ra_deg, dtype=float) - reference + 180.0) % 360.0 - 180.0 + reference
+
+
+def _inside(x, y, polygon):
+    """Even-odd point-in-polygon test of every (x, y) against every edge at once."""
+    xi, yi = polygon[:, 0], polygon[:, 1]
+    xj, yj = np.roll(xi, 1), np.roll(yi, 1)
+    x, y = x[:, None], y[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crosses = ((yi > y) != (yj > y)) & (x < (xj - xi) * (y - yi) / (yj - yi) + xi)
+    return np.count_nonzero(crosses, axis=1) % 2 == 1
+
+
+def tile(fov_width, fov_height, overlap=0.2, center=None, width=None, height=None, polygon=None):
+    """Pointing centres covering a region, row by row in declination.
+
+    The region is either center=(ra_hours, dec_deg) with width/height in
+    degrees on the sky, or polygon, a list of (ra_hours, dec_deg) vertices.
+    Rows are fov_height * (1 - overlap) apart; along each row the RA step is
+    widened by 1/cos(dec) at the row edge nearest the equator, where frames
+    are furthest apart on the sky, so neighbouring frames keep their overlap
+    all the way up to the pole.
+
+    Returns (ra_hours, dec_deg, row, column) arrays in serpentine order:
+    every other row runs backwards, so the slews between frames stay short.
+    """
+    if not 0 <= overlap < 1:
+        raise ValueError("overlap must be in [0, 1)")
+    if fov_width <= 0 or fov_height <= 0:
+        raise ValueError("Field of view must be positive")
+    step_dec = fov_height * (1.0 - overlap)
+    step_sky = fov_width * (1.0 - overlap)
+
+    if polygon is not None:
+        vertices = np.asarray(polygon, dtype=float)
+        if vertices.ndim != 2 or vertices.shape[0] < 3 or vertices.shape[1] != 2:
+            raise ValueError("polygon needs at least three [ra, dec] vertices")
+        ra0 = vertices[0, 0] * 15.0
+        vertices = np.column_stack((_unwrap_ra(vertices[:, 0] * 15.0, ra0), vertices[:, 1]))
+        ra_min, ra_max = vertices[:, 0].min(), vertices[:, 0].max()
+        dec_min, dec_max = vertices[:, 1].min(), vertices[:, 1].max()
+    elif center is not None and width and height:
+        ra_c, dec_c = float(center[0]) * 15.0, float(center[1])
+        half_ra = min(180.0, width / 2.0 / max(np.cos(np.radians(dec_c)), 1e-6))
+        ra_min, ra_max = ra_c - half_ra, ra_c + half_ra
+        dec_min, dec_max = max(-90.0, dec_c - height / 2.0), min(90.0, dec_c + height / 2.0)
+        vertices = None
+    else:
+        raise ValueError("Give either a center with width and height, or a polygon")
+
+    # Rows: centred on the region, the outer frames reaching just past its edges
+    rows = max(1, int(np.ceil((dec_max - dec_min - fov_height) / step_dec - 1e-9)) + 1)
+    row_dec = (dec_min + dec_max) / 2.0 + (np.arange(rows) - (rows - 1) / 2.0) * step_dec
+    row_dec = np.clip(row_dec, -90.0, 90.0)
+
+    # Per-row RA step from the frame edge closest to the equator
+    edge = np.maximum(np.abs(row_dec) - fov_height / 2.0, 0.0)
+    row_step = np.minimum(step_sky / np.maximum(np.cos(np.radians(edge)), 1e-6), 360.0)
+    row_width = np.minimum(fov_width / np.maximum(np.cos(np.radians(edge)), 1e-6), 360.0)
+    span = ra_max - ra_min
+    counts = np.where(span + row_width >= 360.0 + row_step,  # the row wraps all the way round
+                      np.ceil(360.0 / row_step - 1e-9),
+                      np.maximum(1, np.ceil((span - row_width) / row_step - 1e-9) + 1)).astype(np.int64)
+    total = int(counts.sum())
+    if total > MAX_TILES:
+        raise ValueError(f"Region needs {total} pointings, more than the limit of {MAX_TILES}")
+
+    # All frames at once: row index per frame, then its position within the row
+    row = np.repeat(np.arange(rows), counts)
+    column = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    ra = (ra_min + ra_max) / 2.0 + (column - (counts[row] - 1) / 2.0) * row_step[row]
+    dec = row_dec[row]
+
+    if vertices is not None:
+        # Keep a frame if its centre or a corner falls in the polygon, or it holds a vertex
+        half_w, half_h = row_width[row] / 2.0, fov_height / 2.0
+        keep = _inside(ra, dec, vertices)
+        for dx, dy in ((-1, -1), (-1, 1), (1, -1), (1, 1)):
+            keep |= _inside(ra + dx * half_w, dec + dy * half_h, vertices)
+        holds = ((np.abs(vertices[None, :, 0] - ra[:, None]) <= half_w[:, None])
+                 & (np.abs(vertices[None, :, 1] - dec[:, None]) <= half_h)).any(axis=1)
+        keep |= holds
+        ra, dec, row, column = ra[keep], dec[keep], row[keep], column[keep]
+
+    # Serpentine order, renumbering columns along the direction of travel
+    backwards = row % 2 == 1
+    order = np.lexsort((np.where(backwards, -column, column), row))
+    ra, dec, row, column = ra[order], dec[order], row[order], column[order]
+    first = np.r_[True, row[1:] != row[:-1]]
+    starts = np.flatnonzero(first)
+    column = np.arange(len(row)) - np.repeat(starts, np.diff(np.r_[starts, len(row)]))
+    return (ra % 360.0) / 15.0, dec, row, column
+
+
+def night_visibility(ra_hours, dec_deg, latitude, longitude, mask, max_altitude, sun_radec,
+                     start=None, hours=NIGHT_HOURS, step_minutes=NIGHT_STEP_MINUTES):
+    """When each pointing is above the horizon mask and below max_altitude during the night.
+
+    The night is the first stretch within `hours` of start with the Sun below
+    NIGHT_SUN_ALTITUDE; sun_radec is the Sun's (ra_hours, dec_deg), which
+    moves little enough over a night to be taken as fixed.
+    Returns (observable minutes, unix time of highest night altitude,
+    altitude at that time, night start, night end); night start is None if
+    the Sun never sets in the window.
+    """
+    start = time.time() if start is None else start
+    times = start + np.arange(0.0, hours * 3600.0 + 1.0, step_minutes * 60.0)
+    sun_alt, _ = clock.altaz_series(sun_radec[0], sun_radec[1], latitude, longitude, times)
+    dark = np.flatnonzero(sun_alt[0] < NIGHT_SUN_ALTITUDE)
+    n = len(ra_hours)
+    if not len(dark):
+        return np.zeros(n), np.full(n, np.nan), np.full(n, np.nan), None, None
+
+    # First contiguous dark stretch: tonight, or the next night if it is daytime
+    breaks = np.flatnonzero(np.diff(dark) > 1)
+    night = times[dark[:breaks[0] + 1] if len(breaks) else dark]
+
+    alt, az = clock.altaz_series(ra_hours, dec_deg, latitude, longitude, night)
+    usable = (alt <= max_altitude) & mask.is_visible(alt, az)
+    alt = np.where(usable, alt, -np.inf)
+    best = np.argmax(alt, axis=1)
+    best_alt = alt[np.arange(n), best]
+    seen = np.isfinite(best_alt)
+    return (np.count_nonzero(usable, axis=1) * float(step_minutes), np.where(seen, night[best], np.nan),
+            np.where(seen, best_alt, np.nan), float(night[0]), float(night[-1]))
@@ -0,0 +1,171 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+import sidereal
+
+ARCSEC_PER_RADIAN = 180.0 * 3600.0 / math.pi
+MAX_RESIDUAL_DEGREES = 5.0   # a sync further off than this is a wrong star or a lost mount, not pointing error
+PRIOR_ARCSEC = 3600.0        # terms the points do not constrain yet stay near zero instead of absorbing noise
+
+# Standard equatorial terms (TPOINT names). Each row gives a term's effect on the
+# hour-angle residual times cos(dec), i.e. on the sky, and on the dec residual.
+TERMS = ("IH", "ID", "CH", "NP", "MA", "ME", "TF")
+TERM_NAMES = {
+    "IH": "hour angle index error",
+    "ID": "declination index error",
+    "CH": "collimation error",
+    "NP": "HA/Dec non-perpendicularity",
+    "MA": "polar axis azimuth misalignment",
+    "ME": "polar axis elevation misalignment",
+    "TF": "tube flexure",
+}
+
+
+def design(ha, dec, latitude):
+    """Model rows for points at hour angle, declination and latitude (radians, arrays), shape (N, 2, terms)."""
+    ha, dec, latitude = np.broadcast_arrays(np.atleast_1d(ha), np.atleast_1d(dec), np.atleast_1d(latitude))
+    sh, ch = np.sin(ha), np.cos(ha)
+    sd, cd = np.sin(dec), np.cos(dec)
+    sp, cp = np.sin(latitude), np.cos(latitude)
+    zero, one = np.zeros_like(ha), np.ones_like(ha)
+    x = np.stack((cd, zero, one, sd, -ch * sd, sh * sd, cp * sh), axis=-1)
+    y = np.stack((zero, one, zero, zero, sh, ch, cp * ch * sd - sp * cd), axis=-1)
+    return np.stack((x, y), axis=-2)
+
+
+class PointingModel:
+    """Pointing corrections fitted to sync residuals, applied to slew targets.
+
+    Every sync adds a point: where the mount thought it was minus where the
+    star really is, in hour angle and declination. The terms are refitted
+    by adding the point's two rows to the normal equations and solving a
+    7x7 system, so a new point costs the same however many came before.
+    Slews are sent to the target plus the predicted residual.
+
+    The mount's own sync shifts its zero by the residual it was synced
+    with; that shift is kept as an offset, so points taken before and
+    after a sync fit the same model. A mount or driver restart undoes its
+    syncs, so the offset only lasts for one connection: it is not loaded
+    from the file, and reset_offset() clears it when the link comes back.
+    """
+
+    def __init__(self, path, min_points=3):
+        self.path = path
+        self.min_points = min_points
+        self.logger = logging.getLogger('PointingModel')
+        self._lock = threading.Lock()
+        self._points = []                      # [unix, ha, dec, latitude, dH cos(dec), dDec]: radians / arcsec
+        self._offset = np.zeros(2)             # zero shift from syncs so far, hour angle and dec (arcsec)
+        self._reset_fit()
+        if os.path.exists(path):
+            saved = json.loads(open(path).read())
+            with self._lock:
+                for point in saved["points"]:
+                    self._add(np.array(point, dtype=float))
+            self.logger.info(f"Loaded {len(self._points)} pointing model points from {path}")
+
+    def _reset_fit(self):
+        self._normal = np.eye(len(TERMS)) / PRIOR_ARCSEC ** 2
+        self._rhs = np.zeros(len(TERMS))
+        self._terms = np.zeros(len(TERMS))
+        self._cached = None                    # (terms in radians, offset in radians) once the model is in use
+
+    def _add(self, point):
+        rows = design(point[1], point[2], point[3])[0]
+        self._normal += rows.T @ rows
+        self._rhs += rows.T @ point[4:6]
+        self._terms = np.linalg.solve(self._normal, self._rhs)
+        self._points.append(point)
+        if len(self._points) >= self.min_points:
+            self._cached = (tuple(self._terms / ARCSEC_PER_RADIAN), tuple(self._offset / ARCSEC_PER_RADIAN))
+
+    def add_point(self, ra, dec, mount_ra, mount_dec, latitude, longitude, unix=None):
+        """Records a sync of a mount reading mount_ra/mount_dec onto ra/dec (hours, degrees).
+
+        Call it once the mount accepted the sync. Returns the residual in
+        arcseconds, or None if it was too large to be a pointing error.
+        """
+        unix = time.time() if unix is None else unix
+        ha = sidereal.clock.hour_angle(ra, longitude, unix)
+        d_ha = ((ra - mount_ra + 12.0) % 24.0 - 12.0) * 15.0 * 3600.0   # the mount's HA minus the true one
+        d_dec = (mount_dec - dec) * 3600.0
+        if math.hypot(d_ha * math.cos(math.radians(dec)), d_dec) > MAX_RESIDUAL_DEGREES * 3600.0:
+            self.logger.warning(f"Ignoring sync {d_ha:.0f}\" / {d_dec:.0f}\" off; not a pointing error")
+            return None
+        with self._lock:
+            # In the frame of the first sync, before any of them moved the mount's zero
+            dx, dy = d_ha + self._offset[0], d_dec + self._offset[1]
+            point = np.array([unix, math.radians(ha * 15.0), math.radians(dec), math.radians(latitude),
+                              dx * math.cos(math.radians(dec)), dy])
+            self._offset += (d_ha, d_dec)
+            self._add(point)
+            self._save()
+        self.logger.info(f"Pointing model point {len(self._points)}: {d_ha:.1f}\" in HA, {d_dec:.1f}\" in Dec")
+        return {"ha": d_ha, "dec": d_dec}
+
+    def correct(self, ra, dec, latitude, longitude, unix=None):
+        """Mount coordinates (hours, degrees) that put the telescope on ra/dec."""
+        cached = self._cached
+        if cached is None:
+            return ra, dec
+        (ih, id_, ch_, np_, ma, me, tf), (offset_ha, offset_dec) = cached
+        h = math.radians(sidereal.clock.hour_angle(ra, longitude, unix) * 15.0)
+        d, p = math.radians(dec), math.radians(latitude)
+        sh, ch, sd, cd, sp, cp = math.sin(h), math.cos(h), math.sin(d), math.cos(d), math.sin(p), math.cos(p)
+        dx = ih * cd + ch_ + np_ * sd - ma * ch * sd + me * sh * sd + tf * cp * sh
+        d_ha = dx / max(cd, 1e-6) - offset_ha
+        d_dec = id_ + ma * sh + me * ch + tf * (cp * ch * sd - sp * cd) - offset_dec
+        return (ra - math.degrees(d_ha) / 15.0) % 24.0, min(max(dec + math.degrees(d_dec), -90.0), 90.0)
+
+    def reset_offset(self):
+        """Forgets the syncs' zero shift, e.g. after a reconnect, when the mount may have lost them."""
+        with self._lock:
+            if not self._offset.any():
+                return
+            self._offset = np.zeros(2)
+            if self._cached is not None:
+                self._cached = (self._cached[0], (0.0, 0.0))
+            self._save()
+        self.logger.info("Sync offset cleared for the new connection")
+
+    def clear(self):
+        with self._lock:
+            self._points = []
+            self._offset = np.zeros(2)
+            self._reset_fit()
+            self._save()
+        self.logger.info("Pointing model cleared")
+
+    def status(self):
+        with self._lock:
+            points = np.array(self._points).reshape(-1, 6)
+            terms, normal = self._terms.copy(), self._normal.copy()
+            offset = self._offset.copy()
+        result = {"file": self.path, "points": len(points), "minPoints": self.min_points,
+                  "active": len(points) >= self.min_points, "offset": {"ha": offset[0], "dec": offset[1]},
+                  "terms": {}, "rms": None}
+        sigma = np.full(len(TERMS), np.nan)
+        if len(points):
+            fitted = design(points[:, 1], points[:, 2], points[:, 3]) @ terms
+            residuals = points[:, 4:6] - fitted
+            result["rms"] = float(np.sqrt(np.mean(np.sum(residuals ** 2, axis=1))))
+            dof = 2 * len(points) - len(TERMS)
+            if dof > 0:  # with fewer equations than terms the fit is exact and says nothing about its errors
+                sigma = np.sqrt(np.diag(np.linalg.inv(normal)) * np.sum(residuals ** 2) / dof)
+        for name, value, error in zip(TERMS, terms.tolist(), sigma.tolist()):
+            result["terms"][name] = {"description": TERM_NAMES[name], "arcsec": value,
+                                     "sigma": None if error != error else error}
+        return result
+
+    def _save(self):
+        data = {"terms": list(TERMS), "offset": self._offset.tolist(), "points": [p.tolist() for p in self._points]}
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(data, f)
+        os.replace(temporary, self.path)  # a crash mid-write leaves the previous model, not half a file
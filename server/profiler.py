@@ -0,0 +1,179 @@
+import html
+import logging
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+
+DEFAULT_INTERVAL = 0.01      # seconds between samples (100 Hz)
+MAX_SECONDS = 120
+MAX_DEPTH = 128              # frames kept per stack, innermost first
+
+# Leaf functions where a thread is parked rather than working (_worker is an idle
+# ThreadPoolExecutor thread blocked on its queue); their stacks are dropped unless
+# idle stacks are asked for
+IDLE_LEAVES = {"wait", "select", "poll", "accept", "readinto", "recv", "recv_into", "_wait_for_tstate_lock",
+               "_worker"}
+
+SVG_WIDTH = 1200
+FRAME_HEIGHT = 16
+MIN_FRAME_PX = 0.3           # narrower frames are left out of the SVG
+CHAR_PX = 6.5
+
+
+def _label(code):
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profile:
+    """Collapsed stacks ("thread;outer;...;inner" -> samples) from one sampling run."""
+
+    def __init__(self, stacks, samples, idle, seconds, sampling_seconds, interval):
+        self.stacks = stacks
+        self.samples = samples
+        self.idle = idle
+        self.seconds = seconds
+        self.sampling_seconds = sampling_seconds
+        self.interval = interval
+
+    def summary(self):
+        return {
+            "seconds": round(self.seconds, 3),
+            "interval": self.interval,
+            "samples": self.samples,
+            "idleSamples": self.idle,
+            "stacks": len(self.stacks),
+            # share of one core spent taking samples
+            "overheadPercent": round(100.0 * self.sampling_seconds / max(self.seconds, 1e-9), 2),
+        }
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed format, as read by flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def svg(self, title="Control server profile"):
+        root = {"children": {}, "value": 0}
+        for stack, count in self.stacks.items():
+            node = root
+            node["value"] += count
+            for frame in stack.split(";"):
+                node = node["children"].setdefault(frame, {"children": {}, "value": 0})
+                node["value"] += count
+
+        depth = self._depth(root)
+        height = (depth + 3) * FRAME_HEIGHT
+        total = max(root["value"], 1)
+        scale = SVG_WIDTH / total
+        rects = []
+
+        def draw(node, name, x, level):
+            width = node["value"] * scale
+            if width < MIN_FRAME_PX:
+                return
+            y = height - (level + 1) * FRAME_HEIGHT
+            hue = zlib.crc32(name.split(" (")[0].encode()) % 55
+            tip = html.escape(f"{name} — {node['value']} samples ({100.0 * node['value'] / total:.1f}%)")
+            text = name if len(name) * CHAR_PX < width - 4 else name[:max(0, int((width - 4) / CHAR_PX) - 2)] + ".."
+            rects.append(
+                f'<g><title>{tip}</title><rect x="{x:.1f}" y="{y}" width="{width:.1f}" height="{FRAME_HEIGHT - 1}" '
+                f'fill="hsl({hue},85%,60%)" rx="2"/>'
+                + (f'<text x="{x + 3:.1f}" y="{y + FRAME_HEIGHT - 4}">{html.escape(text)}</text>' if len(text) > 2 else "")
+                + "</g>")
+            for child_name, child in sorted(node["children"].items()):
+                draw(child, child_name, x, level + 1)
+                x += child["value"] * scale
+
+        x = 0.0
+        for name, child in sorted(root["children"].items()):
+            draw(child, name, x, 0)
+            x += child["value"] * scale
+
+        summary = self.summary()
+        caption = html.escape(f"{title}: {summary['samples']} samples over {summary['seconds']} s, "
+                              f"sampling overhead {summary['overheadPercent']}%")
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{height}" '
+                f'font-family="monospace" font-size="11">'
+                f'<rect width="100%" height="100%" fill="#f8f8f8"/>'
+                f'<text x="6" y="{FRAME_HEIGHT}" font-size="13">{caption}</text>'
+                + "".join(rects) + "</svg>")
+
+    @staticmethod
+    def _depth(node):
+        if not node["children"]:
+            return 0
+        return 1 + max(Profile._depth(child) for child in node["children"].values())
+
+
+class StackProfiler:
+    """Samples the Python stacks of every thread with sys._current_frames().
+
+    Nothing runs between profiles. While one runs, the calling thread wakes
+    every interval, walks each thread's frames and counts the stack, so the
+    cost scales with threads x depth and is reported with the result. Threads
+    only show up while they run Python code: the PyIndi callback thread
+    appears inside IndiClient.updateProperty and friends, not while it is
+    waiting in C++.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('StackProfiler')
+        self._lock = threading.Lock()
+
+    def run(self, seconds, interval=DEFAULT_INTERVAL, idle=False):
+        if not 0 < seconds <= MAX_SECONDS:
+            raise ValueError(f"seconds must be between 0 and {MAX_SECONDS}")
+        interval = max(float(interval), 0.001)
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            return self._sample(seconds, interval, idle)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds, interval, idle):
+        me = threading.get_ident()
+        labels = {}    # code object -> label, so each function is formatted once
+        stacks = Counter()
+        samples = idle_samples = 0
+        sampling = 0.0
+        start = time.perf_counter()
+        end = start + seconds
+        next_tick = start
+        while True:
+            now = time.perf_counter()
+            if now >= end:
+                break
+            if now < next_tick:
+                time.sleep(next_tick - now)
+                continue
+            next_tick += interval
+            if next_tick < now:  # fell behind (e.g. the GIL was busy): skip ahead, don't burst
+                next_tick = now + interval
+
+            tick = time.perf_counter()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if not idle and frame.f_code.co_name in IDLE_LEAVES:
+                    idle_samples += 1
+                    continue
+                frames = []
+                while frame is not None and len(frames) < MAX_DEPTH:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _label(code)
+                    frames.append(label)
+                    frame = frame.f_back
+                frames.append(names.get(ident, f"thread-{ident}").replace(";", ":"))
+                stacks[";".join(reversed(frames))] += 1
+                samples += 1
+            sampling += time.perf_counter() - tick
+
+        profile = Profile(dict(stacks), samples, idle_samples, time.perf_counter() - start, sampling, interval)
+        self.logger.info(f"Profiled {profile.seconds:.1f} s: {samples} samples, "
+                         f"{profile.summary()['overheadPercent']}% sampling overhead")
+        return profile
@@ -0,0 +1,115 @@
+"""Read-only API workers that serve the mount's state from the telemetry bus.
+
+The control server publishes its read endpoints (coordinates, tracking,
+parking, site, ...) on TELEMETRY_SOCKET; these processes answer GETs for
+them from the latest snapshot without touching the mount or the control
+server, so dashboards and outreach displays can be spread over every core:
+
+    python read_worker.py --workers 4 --port 7124
+
+All workers share one listening socket and the kernel hands each new
+connection to whichever is free. Anything not published answers 404, so
+writes and the other endpoints still go to the control server.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+from flask import Flask, Response, jsonify
+from flask_cors import CORS
+from werkzeug.serving import make_server
+
+import config
+import responses
+from telemetry import TelemetrySubscriber
+
+app = Flask(__name__)
+app.json = responses.FastJSONProvider(app)
+CORS(app)
+
+subscriber = None
+
+
+@app.route("/api/telemetry", methods=["GET"])
+def get_telemetry_status():
+    return jsonify({"status": "success", "pid": os.getpid(), **subscriber.status()})
+
+
+@app.route("/api/<path:endpoint>", methods=["GET"])
+def read(endpoint):
+    entry = subscriber.get(f"/api/{endpoint}")
+    if entry is None:
+        if subscriber.age() is None:
+            return jsonify({"status": "error", "message": "No telemetry from the control server yet"}), 503
+        return jsonify({"status": "error", "message": f"/api/{endpoint} is not served by read workers"}), 404
+    status, body, age = entry
+    if age > config.TELEMETRY_STALE_SECONDS:
+        return jsonify({"status": "error", "message": f"Telemetry is {age:.1f} s old; is the control server running?",
+                        "telemetry": subscriber.status()}), 503
+    response = Response(body, status=status, mimetype="application/json")
+    response.headers["X-Telemetry-Age"] = f"{age:.3f}"
+    return response
+
+
+@app.after_request
+def compress_response(response):
+    return responses.compress(response, config.COMPRESS_MIN_BYTES)
+
+
+def serve(listener):
+    global subscriber
+    subscriber = TelemetrySubscriber(config.TELEMETRY_SOCKET)
+    subscriber.start()
+    server = make_server(*listener.getsockname()[:2], app, threaded=True, fd=listener.fileno())
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=7124)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # a line per request costs more than serving it
+    logger = logging.getLogger('ReadWorkers')
+
+    listener = socket.create_server((args.host, args.port), backlog=1024)
+    listener.setblocking(False)  # every worker wakes for a new connection; the ones that lose the accept go back to waiting
+    children = set()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                serve(listener)
+            finally:
+                os._exit(1)
+        children.add(pid)
+
+    def stop(signum, frame):
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(args.workers):
+        spawn()
+    logger.info(f"{args.workers} read workers on {args.host}:{args.port}, telemetry from {config.TELEMETRY_SOCKET}")
+    while True:
+        pid, status = os.wait()
+        children.discard(pid)
+        logger.warning(f"Read worker {pid} exited with status {status}, starting another")
+        time.sleep(1)
+        spawn()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+from sgp4.api import Satrec, SatrecArray
+from sgp4.exporter import export_tle
+from skyfield.api import wgs84
+from skyfield.iokit import parse_tle_file
+
+import compute_pool
+
+PREDICTION_HOURS = 24
+PREDICTION_STEP_SECONDS = 60    # LEO passes last several minutes, a minute grid catches them
+DEEP_SPACE_STEP_SECONDS = 600   # orbits over 225 min barely move across the sky
+DEEP_SPACE_MEAN_MOTION = 2 * math.pi / 225.0  # rad/min, SGP4's near-earth/deep-space boundary
+CHUNK_SIZE = 512                # satellites propagated per vectorized call
+TRAJECTORY_STEP_SECONDS = 1.0
+STREAM_CADENCE_SECONDS = 1.0
+STREAM_LEAD_SECONDS = 0.5       # command slightly ahead to absorb the mount's reaction time
+JITTER_SAMPLES = 600            # ticks kept for the jitter stats, the last 10 minutes at 1 Hz
+
+WGS84_A = 6378.137  # km
+WGS84_E2 = 6.69437999014e-3
+UNIX_EPOCH_JD = 2440587.5
+
+
+def _gmst_radians(jd_ut1):
+    """IAU 1982 Greenwich mean sidereal time, the frame TEME is defined against."""
+    t = (jd_ut1 - 2451545.0) / 36525.0
+    seconds = 67310.54841 + (876600.0 * 3600 + 8640184.812866) * t + 0.093104 * t**2 - 6.2e-6 * t**3
+    return np.radians((seconds % 86400.0) / 240.0)
+
+
+def _site_vectors(latitude, longitude, elevation):
+    """Observer ECEF position (km) and its local east/north/up unit vectors."""
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    n = WGS84_A / math.sqrt(1 - WGS84_E2 * math.sin(lat) ** 2)
+    h = elevation / 1000.0
+    position = np.array([
+        (n + h) * math.cos(lat) * math.cos(lon),
+        (n + h) * math.cos(lat) * math.sin(lon),
+        (n * (1 - WGS84_E2) + h) * math.sin(lat),
+    ])
+    east = np.array([-math.sin(lon), math.cos(lon), 0.0])
+    north = np.array([-math.sin(lat) * math.cos(lon), -math.sin(lat) * math.sin(lon), math.cos(lat)])
+    up = np.array([math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)])
+    return position, east, north, up
+
+
+_worker_models = {}  # compute-pool worker: (shared block name, index) -> Satrec
+
+
+def _chunk_passes(models, names, times, site, mask):
+    """Passes of one chunk of satellites over the time grid (same clock as times)."""
+    jd_day = np.floor(UNIX_EPOCH_JD + times[0] / 86400.0 - 0.5) + 0.5
+    jd = np.full(len(times), jd_day)
+    fr = (UNIX_EPOCH_JD - jd_day) + times / 86400.0
+
+    errors, r_teme, _ = SatrecArray(models).sgp4(jd, fr)
+
+    # TEME -> Earth-fixed is a rotation by GMST about the pole (UT1 ~ UTC here)
+    gmst = _gmst_radians(jd + fr)
+    cos_g, sin_g = np.cos(gmst), np.sin(gmst)
+    x = cos_g * r_teme[..., 0] + sin_g * r_teme[..., 1]
+    y = -sin_g * r_teme[..., 0] + cos_g * r_teme[..., 1]
+    rho = np.stack((x, y, r_teme[..., 2]), axis=-1) - site[0]
+
+    distance = np.linalg.norm(rho, axis=-1)
+    altitude = np.degrees(np.arcsin(rho @ site[3] / distance))
+    azimuth = np.degrees(np.arctan2(rho @ site[1], rho @ site[2])) % 360.0
+    margin = altitude - mask.min_altitude(azimuth)
+
+    visible = (margin > 0) & (errors == 0)
+    edges = np.diff(np.pad(visible, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+    rise_sat, rise_idx = np.nonzero(edges == 1)
+    _, set_idx = np.nonzero(edges == -1)
+
+    step = times[1] - times[0]
+    passes = []
+    for s, r, e in zip(rise_sat, rise_idx, set_idx):
+        peak = r + int(np.argmax(altitude[s, r:e]))
+        rise_t = times[r]
+        if r > 0:
+            rise_t -= step * margin[s, r] / (margin[s, r] - margin[s, r - 1])
+        set_t = times[e - 1]
+        if e < len(times):
+            set_t += step * margin[s, e - 1] / (margin[s, e - 1] - margin[s, e])
+        passes.append({
+            "name": names[s],
+            "norad": models[s].satnum,
+            "rise": float(rise_t),
+            "culmination": float(times[peak]),
+            "set": float(set_t),
+            "maxAltitude": float(altitude[s, peak]),
+            "riseAzimuth": float(azimuth[s, r]),
+            "setAzimuth": float(azimuth[s, e - 1]),
+        })
+    return passes
+
+
+def _shared_chunk_passes(tle_handle, indexes, names, times, site, mask):
+    """Compute-pool job: rebuilds the chunk's Satrecs from the shared TLE table (cached) and finds passes."""
+    block = tle_handle[0]
+    if any(key[0] != block for key in _worker_models):
+        _worker_models.clear()  # the catalog was reloaded
+    lines = compute_pool.attach(tle_handle)["tle"]
+    models = []
+    for i in indexes:
+        model = _worker_models.get((block, i))
+        if model is None:
+            text = lines[i].decode("ascii")
+            model = _worker_models[(block, i)] = Satrec.twoline2rv(text[:69], text[69:])
+        models.append(model)
+    return _chunk_passes(models, names, times, site, mask)
+
+
+def _iso(unix_time):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(unix_time))
+
+
+class SatelliteCatalog:
+    """Satellites loaded from local TLE files, with batch pass prediction."""
+
+    def __init__(self, ts, pool=None):
+        self.ts = ts
+        self.pool = pool  # optional ComputePool for pass prediction
+        self.satellites = {}
+        self.logger = logging.getLogger('SatelliteCatalog')
+        self._rows = {}          # id(satellite) -> row in the shared TLE table
+        self._tle_handle = None
+
+    def load_directory(self, directory):
+        """Loads every *.tle / *.txt file in directory; later entries replace earlier ones."""
+        satellites = {}
+        directory = Path(directory)
+        if directory.is_dir():
+            for path in sorted(directory.iterdir()):
+                if path.suffix.lower() not in (".tle", ".txt"):
+                    continue
+                with open(path, 'rb') as f:
+                    for sat in parse_tle_file(f, self.ts):
+                        satellites[(sat.name or str(sat.model.satnum)).strip().lower()] = sat
+        self.satellites = satellites
+        if self.pool is not None and satellites:
+            # Workers cannot unpickle Satrec objects; they rebuild them from the exported elements
+            rows = list(satellites.values())
+            table = np.array(["".join(export_tle(sat.model)).encode("ascii") for sat in rows], dtype="S138")
+            self._tle_handle = self.pool.share("satellites", {"tle": table})
+            self._rows = {id(sat): i for i, sat in enumerate(rows)}
+        self.logger.info(f"Loaded {len(satellites)} satellites from {directory}")
+        return len(satellites)
+
+    def find(self, name):
+        """Looks a satellite up by name or NORAD catalog number."""
+        key = name.strip().lower()
+        sat = self.satellites.get(key)
+        if sat is None and key.isdigit():
+            sat = next((s for s in self.satellites.values() if s.model.satnum == int(key)), None)
+        return sat
+
+    def predict_passes(self, latitude, longitude, elevation, mask, start=None, hours=PREDICTION_HOURS, names=None):
+        """Finds every pass above the horizon mask for the whole set (or names) in the window.
+
+        Satellites are propagated in chunks with SGP4's array interface and
+        converted to topocentric Alt/Az with numpy, so the cost is one C call
+        per chunk rather than one Python call per satellite and time step.
+        """
+        start = time.time() if start is None else start
+        sats = list(self.satellites.values()) if names is None else [s for s in map(self.find, names) if s]
+        site = _site_vectors(latitude, longitude, elevation)
+
+        near = [s for s in sats if s.model.no_kozai >= DEEP_SPACE_MEAN_MOTION]
+        deep = [s for s in sats if s.model.no_kozai < DEEP_SPACE_MEAN_MOTION]
+
+        jobs = []
+        for group, step in ((near, PREDICTION_STEP_SECONDS), (deep, DEEP_SPACE_STEP_SECONDS)):
+            times = start + np.arange(0, hours * 3600 + step, step, dtype=float)
+            jobs.extend((group[i:i + CHUNK_SIZE], times) for i in range(0, len(group), CHUNK_SIZE))
+
+        shared = self._tle_handle
+        if self.pool is not None and shared is not None and all(id(s) in self._rows for s in sats):
+            # Chunks run in parallel in the compute workers, off the request threads
+            chunks = self.pool.map(_shared_chunk_passes, [
+                (shared, [self._rows[id(s)] for s in chunk], [s.name for s in chunk], times, site, mask)
+                for chunk, times in jobs])
+        else:
+            chunks = [_chunk_passes([s.model for s in chunk], [s.name for s in chunk], times, site, mask)
+                      for chunk, times in jobs]
+
+        passes = [p for chunk in chunks for p in chunk]
+        passes.sort(key=lambda p: p["rise"])
+        return passes
+
+    def trajectory(self, sat, latitude, longitude, elevation, start, end, step=TRAJECTORY_STEP_SECONDS):
+        """Precomputes the Alt/Az and RA/Dec (of date) path of sat between start and end."""
+        times = np.arange(start, end + step, step, dtype=float)
+        t = self.ts.utc(1970, 1, 1, 0, 0, times)
+        topocentric = (sat - wgs84.latlon(latitude, longitude, elevation_m=elevation)).at(t)
+        alt, az, _ = topocentric.altaz()
+        ra, dec, _ = topocentric.radec(epoch='date')
+        return Trajectory(times, alt.degrees, az.degrees, ra.hours, dec.degrees)
+
+
+class Trajectory:
+    """A precomputed path sampled on a regular time grid."""
+
+    def __init__(self, times, altitude, azimuth, ra_hours, dec_deg):
+        self.times = times
+        self.step = times[1] - times[0]
+        self.altitude = altitude
+        self.azimuth = np.degrees(np.unwrap(np.radians(azimuth)))
+        self.ra_deg = np.degrees(np.unwrap(np.radians(ra_hours * 15.0)))
+        self.dec_deg = dec_deg
+        self.start = float(times[0])
+        self.end = float(times[-1])
+
+    def sample(self, t):
+        i = min(max(int((t - self.start) // self.step), 0), len(self.times) - 2)
+        f = min(max((t - self.times[i]) / self.step, 0.0), 1.0)
+
+        def lerp(a):
+            return float(a[i] + (a[i + 1] - a[i]) * f)
+
+        return {
+            "ra": (lerp(self.ra_deg) / 15.0) % 24.0,
+            "dec": lerp(self.dec_deg),
+            "alt": lerp(self.altitude),
+            "az": lerp(self.azimuth) % 360.0,
+        }
+
+    def below(self, max_altitude):
+        """The path up to its first sample above max_altitude; None if that leaves less than a step."""
+        above = np.flatnonzero(self.altitude > max_altitude)
+        if not len(above):
+            return self
+        end = above[0]
+        if end < 2:
+            return None
+        return Trajectory(self.times[:end], self.altitude[:end], self.azimuth[:end], self.ra_deg[:end] / 15.0,
+                          self.dec_deg[:end])
+
+
+class TrajectoryStreamer:
+    """Feeds a trajectory to the mount from its own thread at a fixed cadence.
+
+    Ticks are scheduled on the monotonic clock against absolute deadlines, so
+    a slow command delays one tick instead of shifting every later one.
+    """
+
+    def __init__(self, controller, cadence=STREAM_CADENCE_SECONDS, lead=STREAM_LEAD_SECONDS, run=None):
+        self.controller = controller
+        self.run = run or (lambda fn, *args, **kwargs: fn(*args, **kwargs))  # e.g. a scheduler lane
+        self.cadence = cadence
+        self.lead = lead
+        self.logger = logging.getLogger('TrajectoryStreamer')
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._target = None
+        self._trajectory = None
+        self._jitter = deque(maxlen=JITTER_SAMPLES)
+        self._ticks = 0
+
+    def start(self, target, trajectory):
+        self.stop()
+        with self._lock:
+            self._target = target
+            self._trajectory = trajectory
+            self._jitter = deque(maxlen=JITTER_SAMPLES)
+            self._ticks = 0
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="trajectory-streamer", daemon=True)
+            self._thread.start()
+        self.logger.info(f"Streaming {target} from {_iso(trajectory.start)} to {_iso(trajectory.end)}")
+
+    def stop(self, wait=True):
+        """Ends streaming; wait=False only signals the loop, and a later stop() joins it."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        if not wait:
+            return
+        if thread is not threading.current_thread():
+            thread.join(timeout=self.cadence + 1)
+        with self._lock:
+            self._thread = None
+        self.logger.info("Trajectory streaming stopped")
+
+    def is_active(self):
+        return self._thread is not None
+
+    def status(self):
+        with self._lock:
+            if self._trajectory is None:
+                return {"active": False}
+            jitter_ms = np.abs(np.array(self._jitter)) * 1000.0 if self._jitter else np.zeros(1)
+            return {
+                "active": self._thread is not None,
+                "target": self._target,
+                "start": _iso(self._trajectory.start),
+                "end": _iso(self._trajectory.end),
+                "ticks": self._ticks,
+                "jitterMeanMs": float(jitter_ms.mean()),
+                "jitterMaxMs": float(jitter_ms.max()),
+            }
+
+    def _run(self):
+        trajectory = self._trajectory
+        clock_offset = time.time() - time.monotonic()
+
+        # Pre-position on the rise point (or the current point of a pass in progress)
+        first = trajectory.sample(max(time.time() + self.lead, trajectory.start))
+        try:
+            self.run(self.controller.slew_to, first["ra"], first["dec"], wait=False)
+        except Exception as e:
+            self.logger.error(f"Pre-positioning failed: {e}")
+
+        deadline = max(trajectory.start - clock_offset, time.monotonic())
+        while not self._stop.is_set():
+            delay = deadline - time.monotonic()
+            if delay > 0 and self._stop.wait(delay):
+                break
+
+            t = deadline + clock_offset + self.lead
+            if t > trajectory.end:
+                break
+
+            jitter = time.monotonic() - deadline
+            sample = trajectory.sample(t)
+            try:
+                self.run(self.controller.slew_to, sample["ra"], sample["dec"], wait=False)
+            except Exception as e:
+                self.logger.error(f"Trajectory command failed: {e}")
+            with self._lock:
+                self._jitter.append(jitter)
+                self._ticks += 1
+
+            # Skip ticks we are already late for instead of bursting to catch up
+            deadline += self.cadence
+            behind = time.monotonic() - deadline
+            if behind > 0:
+                deadline += math.ceil(behind / self.cadence) * self.cadence
+
+        with self._lock:
+            self._thread = None
+        self.logger.info(f"Finished streaming {self._target}")
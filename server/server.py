@@ -1,53 +1,162 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 from datetime import datetime, timezone
 import logging
+import threading
+import time
 from skyfield.api import load, wgs84, Star, Angle
 from astroquery.simbad import Simbad
-from astropy.time import Time
-from astropy.coordinates import SkyCoord, AltAz, EarthLocation
-import astropy.units as u
 import json
+import numpy as np
 from pathlib import Path
-from indi_controller import IndiTelescopeController
-from astropy.utils import iers
-iers.conf.auto_download = False
-iers.conf.auto_max_age = None
+import config
+from tracking import NonSiderealTracker, skyfield_source
+from horizon import HorizonMask
+from satellites import SatelliteCatalog, TrajectoryStreamer
+from minor_bodies import MinorBodyCatalog
+from target_lists import TargetListStore
+from skymap import SkyMap
+import mosaic
+import sidereal
+from command_scheduler import CommandScheduler, EMERGENCY, INTERACTIVE, BACKGROUND
+from connection_supervisor import ConnectionSupervisor
+from compute_pool import ComputePool
+from base_controller import TelescopeDisconnectedError
+import deadline
+import tracing
+from profiler import StackProfiler
+from state_store import StateStore
+from ephemeris import Ephemeris
+from pointing_model import PointingModel
+import focus_sweep
+import meridian
+import responses
+from telemetry import INTERNAL_REQUEST, TelemetryPublisher
+import earth_orientation
 
 MIN_ALTITUDE = 0  # degrees
 MAX_ALTITUDE = 58  # degrees
+TLE_DIRECTORY = "tle"  # local *.tle / *.txt files, loaded at startup
+HORIZON_FILE = "horizon.json"  # optional [[azimuth, altitude], ...] horizon mask
+MPCORB_FILE = "MPCORB.DAT"  # optional MPC asteroid elements (.gz also accepted)
+COMET_FILE = "CometEls.txt"  # optional MPC comet elements
 
 app = Flask(__name__)
+app.json = responses.FastJSONProvider(app)
 CORS(app)
 
 logging.basicConfig(level=logging.DEBUG)
 
+# UT1, Delta T and polar motion for the sidereal clock, astropy and Skyfield alike, never downloaded
+earth_orientation_table = earth_orientation.install(config.EARTH_ORIENTATION_FILE)
+
+# Forked first, while this is the only thread: the controller and supervisor start threads below
+compute = ComputePool(config.COMPUTE_WORKERS)
+compute.start()
+
+# The trace writer is a thread too, so it starts after the fork
+tracing.configure(config.TRACE_FILE, config.TRACE_SAMPLE_RATIO)
+
 # Load once at startup  
 LOCAL_CATALOG = json.loads(Path("catalog.json").read_text())
 
-controller = IndiTelescopeController(host="localhost", port=7624, device_name="Telescope Simulator")
-
-try:
-    controller.connect()
-except Exception as e:
-    logging.error(f"Failed to connect to INDI server: {e}")
-
-# Preload solar system ephemeris
-ephemeris = load('de421.bsp')
-planets = {
-    'mercury': ephemeris['mercury'],
-    'venus': ephemeris['venus'],
-    'mars': ephemeris['mars'],
-    'jupiter': ephemeris['jupiter barycenter'],
-    'saturn': ephemeris['saturn barycenter'],
-    'uranus': ephemeris['uranus barycenter'],
-    'neptune': ephemeris['neptune barycenter'],
-    'pluto': ephemeris['pluto barycenter'],
-    'moon': ephemeris['moon'],
-    'sun': ephemeris['sun']
-}
-
-ts = load.timescale()
+if config.TELESCOPE_BACKEND == "lx200":
+    from LX200_controller import LX200Controller
+    controller = LX200Controller(host=config.MOUNT_HOST, port=config.MOUNT_PORT)
+else:
+    from indi_controller import IndiTelescopeController
+    controller = IndiTelescopeController(host=config.INDI_HOST, port=config.INDI_PORT, device_name=config.INDI_DEVICE,
+                                         device_address=config.MOUNT_HOST, device_port=config.MOUNT_PORT)
+
+# Connects in the background and keeps reconnecting; until the link is up,
+# mount requests get a 503 instead of blocking on a dead connection
+supervisor = ConnectionSupervisor(controller, config.HEALTH_CHECK_SECONDS,
+                                  config.RECONNECT_MIN_SECONDS, config.RECONNECT_MAX_SECONDS)
+
+# abort/park preempt everything; jogs and slews never queue behind config or time writes
+commands = CommandScheduler(controller, config.INTERACTIVE_WORKERS, config.BACKGROUND_WORKERS,
+                            config.EMERGENCY_LATENCY_BUDGET_MS)
+
+# Confirmed settings are saved as they change; on every link-up the ones the mount
+# lost are re-applied, instead of a CONFIG_LOAD round trip
+state_store = StateStore(config.STATE_FILE)
+controller.add_state_listener(state_store.put)
+last_restore = {}
+pointing_model = PointingModel(config.POINTING_MODEL_FILE, config.POINTING_MODEL_MIN_POINTS)
+
+def restore_state():
+    global last_restore
+    last_restore = state_store.restore(controller, lambda fn, *args: commands.run(BACKGROUND, fn, *args))
+    tracker.resend_rates()  # TRACK_CUSTOM is never saved, so a running tracker selects it again
+
+def on_link_change(connected, reason):
+    if not connected:
+        state_store.pause()
+        return
+    pointing_model.reset_offset()  # a restarted mount or driver has dropped its syncs
+    threading.Thread(target=restore_state, name="StateRestore", daemon=True).start()
+
+request_latency = deadline.EndpointLatency()
+profiler = StackProfiler()
+# Background motion goes through the interactive lane, where an abort can cancel it
+def interactive(fn, *args, **kwargs):
+    return commands.run(INTERACTIVE, fn, *args, **kwargs)
+
+tracker = NonSiderealTracker(controller, run=interactive)
+satellite_streamer = TrajectoryStreamer(controller, run=interactive)
+focus_sweeper = focus_sweep.FocusSweep(controller, run=interactive)
+
+# Started once everything on_link_change and restore_state reach exists
+controller.add_link_listener(on_link_change)
+supervisor.start()
+
+horizon_mask = HorizonMask.from_file(HORIZON_FILE, MIN_ALTITUDE)
+meridian_planner = meridian.MeridianPlanner(config.MERIDIAN_LIMIT_MINUTES, config.MERIDIAN_EARLY_MINUTES,
+                                            horizon_mask.min_altitude, MAX_ALTITUDE)
+
+def meridian_flip(target, cancelled):
+    """Re-slews to the current target; past the meridian the mount comes back on the other side of the pier.
+
+    Returns False without moving if cancelled() turns true before the slew is sent, and
+    raises ValueError if the target is outside the altitude limits.
+    """
+    ra, dec = target["ra"], target["dec"]
+    if tracker.is_active():  # a moving target: go where it is now
+        position = tracker.status()
+        ra, dec = position["ra"], position["dec"]
+    site = controller.get_site_coords()
+    # The same altitude rules as slew_with_limits: the flip must not go where /api/slew would refuse to
+    altitude = get_altaz(ra, dec, site['latitude'], normalize_longitude(site['longitude']))['altitude']
+    if not MIN_ALTITUDE < altitude <= MAX_ALTITUDE:
+        raise ValueError(f"Target is at {altitude:.1f}° altitude, outside the {MIN_ALTITUDE}-{MAX_ALTITUDE}° limits")
+    mount_ra, mount_dec = pointing_model.correct(ra, dec, site['latitude'], normalize_longitude(site['longitude']))
+    if cancelled():
+        return False
+    commands.run(INTERACTIVE, controller.slew_to, mount_ra, mount_dec, wait=False)
+    return True
+
+flip_scheduler = meridian.FlipScheduler(meridian_flip, config.MERIDIAN_AUTO_FLIP)
+
+# Solar system ephemeris: the trimmed excerpt if one was made, otherwise the full kernel
+ephemeris = Ephemeris.open(config.EPHEMERIS_FILE, fallback='de421.bsp')
+planets = ephemeris.bodies()
+
+ts = earth_orientation_table.timescale() if earth_orientation_table else load.timescale()
+
+satellite_catalog = SatelliteCatalog(ts, compute)
+satellite_catalog.load_directory(TLE_DIRECTORY)
+
+target_lists = TargetListStore()
+
+sky_map = SkyMap(LOCAL_CATALOG, planets, ephemeris, ts)
+
+minor_bodies = MinorBodyCatalog(ephemeris, ts, compute)
+for path in (MPCORB_FILE, MPCORB_FILE + ".gz"):
+    if Path(path).exists():
+        minor_bodies.load_mpcorb(path)
+        break
+if Path(COMET_FILE).exists():
+    minor_bodies.load_comets(COMET_FILE)
 
 def hms_to_hours(hms):
     h, m, s = map(float, hms.strip().split(':'))
@@ -66,25 +175,120 @@ def normalize_longitude(lon):
     return lon
 
 def get_altaz(ra_hours, dec_degrees, lat_deg, lon_deg):
-    # Create target sky coordinate
-    target = SkyCoord(ra=ra_hours * u.hour, dec=dec_degrees * u.deg, frame='icrs')
-    #app.logger.debug(f"Target coordinates: RA={ra_hours} hours, Dec={dec_degrees} degrees")
-
-    # Observer's location
-    location = EarthLocation(lat=lat_deg * u.deg, lon=lon_deg * u.deg)
-    #app.logger.debug(f"Observer's location: Lat={lat_deg}°, Lon={lon_deg}°")
-
-    # Current UTC time
-    now = Time(datetime.now(timezone.utc))
-    #app.logger.debug(f"Current UTC time: {now}")
+    # Sidereal time and precession come from the cached Earth-rotation snapshot,
+    # so this no longer builds an astropy Time and frame transform per request
+    with tracing.span("get_altaz"):
+        altitude, azimuth = sidereal.clock.altaz(ra_hours, dec_degrees, lat_deg, lon_deg)
+    return { "altitude": float(altitude), "azimuth": float(azimuth) }
+
+# Endpoints that never talk to the mount and keep working while it is disconnected
+OFFLINE_ENDPOINTS = {
+    "home", "resolve_object", "get_tracking_status", "get_satellites", "reload_satellites",
+    "get_satellite_tracking_status", "get_minor_bodies", "minor_body_cone_search", "get_target_lists",
+    "delete_target_list", "get_command_stats", "get_connection_status", "reconnect_telescope",
+    "get_request_latency", "get_compute_stats", "get_tracing_status", "profile_server",
+    "get_saved_state", "get_telemetry_status", "get_pointing_model", "clear_pointing_model",
+    "get_earth_orientation",
+}
 
-    # Convert to Alt/Az
-    altaz_frame = AltAz(obstime=now, location=location)
-    #app.logger.debug("Creating AltAz frame for transformation")
-    target_altaz = target.transform_to(altaz_frame)
-    #app.logger.debug(f"Transformed AltAz coordinates: Altitude={target_altaz.alt.degree}°, Azimuth={target_altaz.az.degree}°")
+@app.before_request
+def start_request_trace():
+    if request.environ.get(INTERNAL_REQUEST):
+        return  # the telemetry publisher's polls would crowd out the sampled requests
+    g.trace_token = tracing.start(request.endpoint or request.path, force=request.headers.get("X-Trace") == "1")
+    if g.trace_token is not None:
+        g.trace_span = tracing.span(f"{request.method} {request.path}").__enter__()
+
+@app.before_request
+def start_request_deadline():
+    # X-Request-Timeout (seconds) lets a client ask for a shorter or longer budget, up to the cap
+    seconds = config.REQUEST_DEADLINE_SECONDS
+    try:
+        seconds = min(float(request.headers.get("X-Request-Timeout", seconds)), config.MAX_REQUEST_DEADLINE_SECONDS)
+    except ValueError:
+        pass
+    g.request_start = time.perf_counter()
+    g.deadline_token = deadline.activate(max(seconds, 0.0))
+
+def cached_park_position(value):
+    # Mounts parked by hour angle save that; the RA is worked out for now from the saved site
+    site = state_store.get("site")
+    if "ha" in value and site is not None:
+        return {"ra": sidereal.clock.ra_from_hour_angle(value["ha"], site["longitude"]), **value}
+    return dict(value)
+
+# Reads answered from the saved state while the mount is unreachable: endpoint -> (key, response body)
+CACHED_READS = {
+    "get_site_info": ("site", lambda value: {"site": value}),
+    "get_slew_rate": ("slewRate", lambda value: {"current": value}),
+    "get_park_position": ("parkPosition", cached_park_position),
+    "get_focuser_speed": ("focuserSpeed", lambda value: {"speed": value}),
+    "get_focuser_timer": ("focuserTimer", lambda value: {"timer": value}),
+}
 
-    return { "altitude": target_altaz.alt.degree, "azimuth": target_altaz.az.degree }
+@app.before_request
+def reject_while_disconnected():
+    if request.endpoint in OFFLINE_ENDPOINTS or request.endpoint is None or request.method == "OPTIONS":
+        return None
+    link = controller.link_status()
+    if not link["connected"]:
+        if request.method == "GET" and request.endpoint in CACHED_READS:
+            key, body = CACHED_READS[request.endpoint]
+            value = state_store.get(key)
+            if value is not None:
+                return jsonify({"status": "success", **body(value), "cached": True})
+        return jsonify({"status": "error", "message": f"Telescope disconnected: {link['error']}",
+                        "connection": supervisor.status()}), 503
+    return None
+
+# Routes re-raise this past their own error handling, so a link lost mid-request is a 503
+@app.errorhandler(TelescopeDisconnectedError)
+def telescope_disconnected(e):
+    return jsonify({"status": "error", "message": str(e), "connection": supervisor.status()}), 503
+
+@app.errorhandler(deadline.DeadlineExceeded)
+def deadline_exceeded(e):
+    return jsonify({"status": "timeout", "message": str(e)}), 504
+
+@app.after_request
+def record_request_latency(response):
+    if "request_start" in g:
+        # Routes report any exception as a 400; one caused by the deadline passing is a timeout
+        if response.status_code in (400, 500) and deadline.remaining(default=1.0) <= 0:
+            response.status_code = 504
+    # The telemetry publisher's polls are left out, so the percentiles are those of real clients
+    if "request_start" in g and not request.environ.get(INTERNAL_REQUEST):
+        request_latency.record(request.endpoint or request.path, time.perf_counter() - g.request_start,
+                               timed_out=response.status_code == 504)
+    if "trace_span" in g:
+        g.trace_span.set(status=response.status_code)
+    return response
+
+@app.after_request
+def compress_response(response):
+    # Registered after record_request_latency, so it runs first and its time is counted
+    with tracing.span("compress_response"):
+        return responses.compress(response, config.COMPRESS_MIN_BYTES)
+
+@app.after_request
+def refresh_telemetry(response):
+    # A write may have changed what the read workers show; don't leave them a refresh period behind
+    if telemetry_bus is not None and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        telemetry_bus.refresh()
+    return response
+
+@app.teardown_request
+def end_request_deadline(exc):
+    token = g.pop("deadline_token", None)
+    if token is not None:
+        deadline.reset(token)
+
+@app.teardown_request
+def end_request_trace(exc):
+    span = g.pop("trace_span", None)
+    if span is not None:
+        span.__exit__(type(exc) if exc else None, exc, None)
+    tracing.finish(g.pop("trace_token", None))
 
 @app.route("/", methods=["GET"])
 def home():
@@ -100,7 +304,14 @@ def slew_to_coordinates():
     try:
         ra = hms_to_hours(ra_str)
         dec = dms_to_degrees(dec_str)
+    except Exception as e:
+        return jsonify({'message': str(e), 'status': 'error'}), 400
 
+    return slew_with_limits(ra, dec, object_name)
+
+def slew_with_limits(ra, dec, object_name):
+    """Checks the altitude rules for the current site, then slews and starts any tracking."""
+    try:
         site_coords = controller.get_site_coords()
         lat = site_coords['latitude']
         long = site_coords['longitude']
@@ -131,19 +342,43 @@ def slew_to_coordinates():
             app.logger.info(f"⚠ Target is above {MAX_ALTITUDE}° — potential obstruction")
             return jsonify({'message': "Target is above maximum altitude", 'status': 'error'}), 200 # 200 so the message is shown correctly in the interface
         
+        tracker.stop()
+        flip_scheduler.stop()
+        satellite_streamer.stop()
+
         # Change Track Mode if object sent is Sun or Moon
 
         if object_name.lower() == "sun":
-            controller.set_track_mode("TRACK_SOLAR")
+            commands.run(INTERACTIVE, controller.set_track_mode, "TRACK_SOLAR")
         elif object_name.lower() == "moon":
-            controller.set_track_mode("TRACK_LUNAR")
+            commands.run(INTERACTIVE, controller.set_track_mode, "TRACK_LUNAR")
         else:
-            controller.set_track_mode("TRACK_SIDEREAL")
+            commands.run(INTERACTIVE, controller.set_track_mode, "TRACK_SIDEREAL")
 
-        controller.slew_to(ra, dec)
-        app.logger.debug(f"Slewing to RA={ra} hours, Dec={dec} degrees")
+        # The mount is sent where it will think the target is, so it ends up on the real one
+        mount_ra, mount_dec = pointing_model.correct(ra, dec, lat, normalize_longitude(long))
+        result = commands.run(INTERACTIVE, controller.slew_to, mount_ra, mount_dec)
+        app.logger.debug(f"Slewing to RA={ra} hours, Dec={dec} degrees (mount RA={mount_ra}, Dec={mount_dec})")
 
-        return jsonify({'message': 'Slew successfully', 'status': 'success'})
+        # When this target crosses the meridian and the best time to flip for it
+        plan = meridian_planner.plan(("target", ra, dec), ra, dec, lat, normalize_longitude(long))
+        flip_scheduler.start({"name": object_name, "ra": ra, "dec": dec}, plan)
+        meridian_plan = meridian_planner.describe(plan, warn_minutes=config.MERIDIAN_WARN_MINUTES)
+
+        # Solar system objects drift against the stars: follow them with precomputed rates
+        if object_name.lower() in planets:
+            source = skyfield_source(ephemeris, ts, planets[object_name.lower()], lat, normalize_longitude(long), elev)
+            tracker.start(object_name, source)
+        elif minor_bodies.find(object_name) is not None:
+            source = minor_bodies.source(minor_bodies.find(object_name), lat, normalize_longitude(long), elev)
+            tracker.start(object_name, source)
+
+        if result.get("partial"):  # the request deadline passed first; the mount keeps slewing
+            return jsonify({'message': 'Slew in progress', 'status': 'success', 'partial': True,
+                            'meridian': meridian_plan})
+        return jsonify({'message': 'Slew successfully', 'status': 'success', 'meridian': meridian_plan})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({'message': str(e), 'status': 'error'}), 400
 
@@ -164,12 +399,54 @@ def sync_telescope():
         #if not is_coordinate_visible(ra, dec, latitude, longitude, elevation):
         #    return jsonify({"error": "Target is below the horizon."}), 400
 
+        # Where the mount thought it was is the pointing model's data point
+        position = controller.get_coordinates()
+        site_coords = controller.get_site_coords()
+
         app.logger.debug(f"Syncing to RA={ra} hours, Dec={dec} degrees")
-        controller.sync_to(ra, dec)
-        return jsonify({'message': 'Sync command sent', 'status': 'success'})
+        result = commands.run(INTERACTIVE, controller.sync_to, ra, dec)
+        residual = None
+        if result.get("status") == "success":  # a pending sync may still fail; only confirmed ones are points
+            residual = pointing_model.add_point(ra, dec, position["ra"], position["dec"], site_coords['latitude'],
+                                                normalize_longitude(site_coords['longitude']))
+        return jsonify({'message': 'Sync command sent', 'status': 'success', 'partial': bool(result.get("partial")),
+                        'residual': residual, 'pointingModelPoints': pointing_model.status()["points"]})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({'message': str(e), 'status': 'error'}), 500
 
+@app.route("/api/pointing-model", methods=["GET"])
+def get_pointing_model():
+    return jsonify({"status": "success", **pointing_model.status()})
+
+@app.route("/api/pointing-model", methods=["DELETE"])
+def clear_pointing_model():
+    pointing_model.clear()
+    return jsonify({"status": "success", "message": "Pointing model cleared"})
+
+@app.route("/api/meridian", methods=["GET"])
+def get_meridian():
+    """Meridian and flip plan of the target last slewed to, with a warning when the flip is near."""
+    try:
+        target, plan = flip_scheduler.target()
+        body = {"status": "success", **flip_scheduler.status(), "planner": meridian_planner.stats(), "target": None}
+        if target is not None:  # the plan made at the slew, so a flip done or due stays on record
+            body.update(target=target["name"], **meridian_planner.describe(plan, warn_minutes=config.MERIDIAN_WARN_MINUTES))
+        return jsonify(body)
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+def observer_site():
+    """Site for endpoints that work offline: ?lat= and ?lon= (and ?elevation=) if given, else the last confirmed site."""
+    if request.args.get("lat") is not None and request.args.get("lon") is not None:
+        return {"latitude": float(request.args["lat"]), "longitude": float(request.args["lon"]),
+                "elevation": float(request.args.get("elevation", 0))}
+    site = state_store.get("site")
+    if site is None:
+        raise ValueError("No site known yet; pass ?lat= and ?lon=")
+    return site
+
 @app.route("/api/resolve-object", methods=["POST"])
 def resolve_object():
     try:
@@ -190,6 +467,14 @@ def resolve_object():
             ra_deg = ra.hours * 15
             dec_deg = dec.degrees
 
+        # Satellite check (TLEs loaded from TLE_DIRECTORY)
+        elif (sat := satellite_catalog.find(object_name)) is not None:
+            site = observer_site()
+            observer = wgs84.latlon(site['latitude'], normalize_longitude(site['longitude']), elevation_m=site['elevation'])
+            ra, dec, _ = (sat - observer).at(ts.now()).radec(epoch='date')
+            ra_deg = ra.hours * 15
+            dec_deg = dec.degrees
+
         # Local catalog check
         else:
             match = next((o for o in LOCAL_CATALOG if o["name"].lower() == object_name.lower()), None)
@@ -206,6 +491,12 @@ def resolve_object():
                     ra_deg = match["ra"]
                     dec_deg = match["dec"]
 
+            # Asteroids and comets from the local MPC element files
+            elif (minor_body := minor_bodies.find(object_name)) is not None:
+                body = minor_bodies.position(minor_body, datetime.now(timezone.utc).timestamp())
+                ra_deg = body["ra"]
+                dec_deg = body["dec"]
+
             # Simbad online fallback
             else:
                 try:
@@ -236,27 +527,48 @@ def resolve_object():
             "dec": dec_deg
         })
 
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error resolving object: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+def run_emergency(fn):
+    """Stops the motion loops and runs fn in the emergency lane.
+
+    The loops are only signalled before fn runs, and joined after it, so
+    the abort never waits behind a loop's last controller command.
+    """
+    loops = (tracker, flip_scheduler, satellite_streamer, focus_sweeper)
+    for loop in loops:
+        loop.stop(wait=False)
+    try:
+        return commands.run(EMERGENCY, fn)
+    finally:
+        for loop in loops:
+            loop.stop()
+
 @app.route("/api/park", methods=["POST"])
 def park():
     try:
-        controller.park()
+        run_emergency(controller.park)
         return jsonify({"status": "success", "message": "Telescope parked"})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
 @app.route("/api/unpark", methods=["POST"])
 def unpark():
     try:
-        controller.unpark()
+        commands.run(INTERACTIVE, controller.unpark)
         return jsonify({
             "status": "success",
             "message": "Unparked and synced to park position"
         })
 
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         app.logger.exception("Error in unpark()")
         return jsonify({"status": "error", "message": str(e)}), 400
@@ -267,6 +579,8 @@ def parking_status():
     try:
         status = controller.get_parking_status()
         return jsonify({"status": "success", "parking-status": status})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -277,20 +591,22 @@ def get_park_position():
 @app.route("/api/park-position", methods=["POST"])
 def post_park_position():
     data = request.get_json()
-    controller.set_park_position(float(data["ra"]), float(data["dec"]))
+    commands.run(BACKGROUND, controller.set_park_position, float(data["ra"]), float(data["dec"]))
     return jsonify({"status": "ok"})
 
 @app.route("/api/park-option", methods=["POST"])
 def set_park_option():
     data = request.get_json()
-    controller.set_park_option(data["option"])  # PARK_CURRENT or PARK_DEFAULT
+    commands.run(BACKGROUND, controller.set_park_option, data["option"])  # PARK_CURRENT or PARK_DEFAULT
     return jsonify({"status": "ok"})  
 
 @app.route("/api/abort", methods=["POST"])
 def abort():
     try:
-        controller.abort_motion()
+        run_emergency(controller.abort_motion)
         return jsonify({"status": "success", "message": "Motion aborted"})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -299,6 +615,8 @@ def get_utc_time():
     try:
         date, time, offset = controller.get_utc_time()
         return jsonify({"status": "success", "date": date, "time": time, "offset": offset})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -307,7 +625,9 @@ def set_utc_time():
     data = request.get_json()
     app.logger.debug(f"POST /time/utc received: {data}")
     try:
-        controller.set_utc_time(data["date"], data["time"], data["offset"])
+        commands.run(BACKGROUND, controller.set_utc_time, data["date"], data["time"], data["offset"])
+    except TelescopeDisconnectedError:
+        raise
     except Exception as error:
         app.logger.error(f"Error in set_utc_time: {error}")
         return jsonify({"status": "error", "message": str(error)}), 400
@@ -318,6 +638,8 @@ def get_time():
     try:
         current_time, current_offset = controller.get_time()
         return jsonify({'time': current_time, 'offset': current_offset})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         print(f"Error fetching time: {e}")
         return jsonify({'error': 'Failed to get time'}), 500
@@ -337,9 +659,11 @@ def set_time():
         if not -14 <= float(offset) <= 14:
             raise ValueError("Offset must be between -14 and +14")
 
-        controller.set_time(time_obj, offset)
+        commands.run(BACKGROUND, controller.set_time, time_obj, offset)
 
         return jsonify({"status": "success", "message": "Time set"})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -348,6 +672,8 @@ def get_date():
     try:
         current_date = controller.get_date()
         return jsonify({'date': current_date})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         print(f"Error fetching date: {e}")
         return jsonify({'error': 'Failed to get date'}), 500
@@ -358,8 +684,10 @@ def set_date():
         data = request.get_json()
         date_str = data["date"]
         date_datetime = datetime.strptime(date_str, "%Y-%m-%d")
-        controller.set_date(date_datetime)
+        commands.run(BACKGROUND, controller.set_date, date_datetime)
         return jsonify({"status": "success", "message": "Date set"})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -385,6 +713,8 @@ def get_coordinates():
             "alt": alt_az['altitude'],
             "az": alt_az['azimuth']
         })
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -412,16 +742,19 @@ def move_telescope():
         current_altitude = alt_az.get('altitude')
 
         if current_altitude < MIN_ALTITUDE and direction != "north":
-            controller.abort_motion()
+            commands.run(EMERGENCY, controller.abort_motion)
             return jsonify({"status": "error", "message": "Telescope has reached the minimum altitude limit"}), 400
         elif current_altitude > MAX_ALTITUDE and direction != "south":
-            controller.abort_motion()
+            commands.run(EMERGENCY, controller.abort_motion)
             return jsonify({"status": "error", "message": "Telescope has reached the maximum altitude limit"}), 400
 
-        result = controller.move(direction)
+        lane = EMERGENCY if direction == "stop" else INTERACTIVE
+        result = commands.run(lane, controller.move, direction)
         return jsonify({"status": "success", "message": result["status"]})
     except ValueError as ve:
         return jsonify({"status": "error", "message": str(ve)}), 400
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": f"Failed to move: {e}"}), 500
 
@@ -430,6 +763,8 @@ def get_track_state():
     try:
         is_tracking = controller.get_tracking_state()
         return jsonify({"status": "success", "isTracking": is_tracking})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -442,16 +777,432 @@ def set_track_state():
         return jsonify({"status": "error", "message": "Invalid state"}), 400
 
     try:
-        controller.set_tracking_state(state)
+        if not state:
+            tracker.stop()
+            flip_scheduler.stop()
+            satellite_streamer.stop()
+        commands.run(INTERACTIVE, controller.set_tracking_state, state)
         return jsonify({"status": "success", "message": f"Tracking turned {'on' if state == True else 'off'}"})
+    except TelescopeDisconnectedError:
+        raise
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@app.route("/api/tracking", methods=["GET"])
+def get_tracking_status():
+    try:
+        return jsonify({"status": "success", **tracker.status()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@app.route("/api/satellites", methods=["GET"])
+def get_satellites():
+    names = sorted(sat.name for sat in satellite_catalog.satellites.values() if sat.name)
+    return jsonify({"status": "success", "count": len(satellite_catalog.satellites), "names": names})
+
+@app.route("/api/satellites/reload", methods=["POST"])
+def reload_satellites():
+    try:
+        count = satellite_catalog.load_directory(TLE_DIRECTORY)
+        return jsonify({"status": "success", "count": count})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+def _pass_to_json(p):
+    return {**p, **{k: datetime.fromtimestamp(p[k], timezone.utc).isoformat() for k in ("rise", "culmination", "set")}}
+
+@app.route("/api/satellites/passes", methods=["POST"])
+def get_satellite_passes():
+    data = request.get_json(silent=True) or {}
+    try:
+        site = controller.get_site_coords()
+        mask = HorizonMask(default_altitude=float(data["minAltitude"])) if "minAltitude" in data else horizon_mask
+        passes = satellite_catalog.predict_passes(
+            site['latitude'], normalize_longitude(site['longitude']), site['elevation'], mask,
+            hours=float(data.get("hours", 24)), names=data.get("names"))
+        return jsonify({"status": "success", "passes": [_pass_to_json(p) for p in passes]})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
+@app.route("/api/satellites/track", methods=["POST"])
+def track_satellite():
+    data = request.get_json()
+    name = data.get("name", "")
+    sat = satellite_catalog.find(name)
+    if sat is None:
+        return jsonify({"status": "error", "message": f"Satellite '{name}' not loaded"}), 400
+
+    try:
+        site = controller.get_site_coords()
+        lat, lon, elev = site['latitude'], normalize_longitude(site['longitude']), site['elevation']
+        now = datetime.now(timezone.utc).timestamp()
+        upcoming = [p for p in satellite_catalog.predict_passes(lat, lon, elev, horizon_mask, start=now, names=[name]) if p["set"] > now]
+        if not upcoming:
+            return jsonify({"status": "error", "message": f"No pass of '{name}' in the next 24 h"}), 200
+
+        next_pass = upcoming[0]
+        full = satellite_catalog.trajectory(sat, lat, lon, elev, max(next_pass["rise"], now), next_pass["set"])
+        # Like every other slew, the stream stays under MAX_ALTITUDE: it ends where the pass climbs past it
+        trajectory = full.below(MAX_ALTITUDE)
+        if trajectory is None:
+            return jsonify({"status": "error", "message": f"'{name}' is above the {MAX_ALTITUDE}° altitude limit"}), 200
+
+        tracker.stop()
+        flip_scheduler.stop()
+        satellite_streamer.start(sat.name, trajectory)
+        message = f"Tracking {sat.name}"
+        if trajectory is not full:
+            message += f" until it climbs past {MAX_ALTITUDE}°"
+        return jsonify({"status": "success", "message": message, "pass": _pass_to_json(next_pass),
+                        "trackedUntil": datetime.fromtimestamp(trajectory.end, timezone.utc).isoformat()})
+    except TelescopeDisconnectedError:
+        raise
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@app.route("/api/satellites/track", methods=["GET"])
+def get_satellite_tracking_status():
+    return jsonify({"status": "success", **satellite_streamer.status()})
+
+@app.route("/api/minor-bodies", methods=["GET"])
+def get_minor_bodies():
+    return jsonify({"status": "success", "count": len(minor_bodies)})
+
+@app.route("/api/minor-bodies/cone", methods=["POST"])
+def minor_body_cone_search():
+    data = request.get_json()
+    try:
+        ra = float(data["ra"])
+        dec = float(data["dec"])
+        radius = float(data.get("radius", 1.0))
+        limit = int(data.get("limit", 100))
+        bodies = minor_bodies.cone_search(ra, dec, radius, datetime.now(timezone.utc).timestamp(), limit)
+        return jsonify({"status": "success", "bodies": bodies})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@app.route("/api/target-lists", methods=["GET"])
+def get_target_lists():
+    return jsonify({"status": "success", "lists": target_lists.names()})
+
+def _target_list_status(target_list):
+    site = controller.get_site_coords()
+    return target_list.evaluate(site['latitude'], normalize_longitude(site['longitude']), MIN_ALTITUDE, MAX_ALTITUDE)
+
+@app.route("/api/target-lists/<name>", methods=["POST"])
+def import_target_list(name):
+    """Body is the raw CSV/TSV/text list, or a multipart upload in the "file" field."""
+    try:
+        stream = request.files["file"].stream if "file" in request.files else request.stream
+        target_list = target_lists.import_stream(name, stream, request.args.get("raUnit", "auto"))
+        _, _, _, status = _target_list_status(target_list)
+        labels, counts = np.unique(status.astype(str), return_counts=True)
+        return jsonify({"status": "success", **target_list.summary(), "errors": target_list.errors,
+                        "visibility": dict(zip(labels.tolist(), counts.tolist()))})
+    except Exception as e:
+        app.logger.exception("Target list import failed")
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@app.route("/api/target-lists/<name>", methods=["GET"])
+def query_target_list(name):
+    """Query: offset, limit, status (comma-separated, e.g. "ok,low") and sort=altitude."""
+    try:
+        target_list = target_lists.get(name)
+        offset = int(request.args.get("offset", 0))
+        limit = min(int(request.args.get("limit", 100)), 10000)
+        alt, az, culmination, status = _target_list_status(target_list)
+
+        selected = np.arange(len(target_list))
+        if request.args.get("status"):
+            selected = selected[np.isin(status, request.args["status"].split(","))]
+        if request.args.get("sort") == "altitude":
+            selected = selected[np.argsort(-alt[selected], kind="stable")]
+        page = selected[offset:offset + limit]
+
+        targets = responses.columns(
+            index=page,
+            name=target_list.names[page],
+            ra=target_list.ra_hours[page],
+            dec=target_list.dec_deg[page],
+            alt=alt[page],
+            az=az[page],
+            culmination=culmination[page],
+            visibility=status[page],
+            line=target_list.rows[page],
+        )
+        return jsonify({"status": "success", **target_list.summary(), "total": int(len(selected)), "targets": targets})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@app.route("/api/target-lists/<name>", methods=["DELETE"])
+def delete_target_list(name):
+    try:
+        target_lists.delete(name)
+        return jsonify({"status": "success", "message": f"Target list '{name}' deleted"})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@app.route("/api/target-lists/<name>/slew", methods=["POST"])
+def slew_to_list_target(name):
+    data = request.get_json()
+    try:
+        target_list = target_lists.get(name)
+        index = target_list.find(data.get("target"))
+        if index is None:
+            raise RuntimeError(f"Target '{data.get('target')}' not found in '{name}'")
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return slew_with_limits(float(target_list.ra_hours[index]), float(target_list.dec_deg[index]),
+                            str(target_list.names[index]))
+
+@app.route("/api/target-lists/<name>/meridian", methods=["GET"])
+def target_list_meridian(name):
+    """Meridian transit and flip times of every target.
+
+    Query: offset, limit, within (minutes; only targets whose flip is due
+    by then) and sort=flip.
+    """
+    try:
+        target_list = target_lists.get(name)
+        offset = int(request.args.get("offset", 0))
+        limit = min(int(request.args.get("limit", 100)), 10000)
+        site = controller.get_site_coords()
+        now = time.time()
+        plan = meridian_planner.plan(("list", name, target_list.created), target_list.ra_hours, target_list.dec_deg,
+                                     site['latitude'], normalize_longitude(site['longitude']), now)
+        minutes_to_flip = (plan["flipAt"] - now) / 60.0
+
+        selected = np.arange(len(target_list))
+        if request.args.get("within"):
+            selected = selected[minutes_to_flip[selected] <= float(request.args["within"])]
+        if request.args.get("sort") == "flip":
+            selected = selected[np.argsort(plan["flipAt"][selected], kind="stable")]
+        page = selected[offset:offset + limit]
+
+        targets = responses.columns(
+            index=page,
+            name=target_list.names[page],
+            minutesToMeridian=(plan["transit"][page] - now) / 60.0,
+            minutesToFlipLimit=(plan["limit"][page] - now) / 60.0,
+            minutesToFlip=minutes_to_flip[page],
+            flipReason=plan["reason"][page],
+            culmination=plan["culmination"][page],
+        )
+        due = int(np.count_nonzero(minutes_to_flip <= config.MERIDIAN_WARN_MINUTES))
+        return jsonify({"status": "success", **target_list.summary(), "total": int(len(selected)),
+                        "flipsDueSoon": due, "targets": targets})
+    except TelescopeDisconnectedError:
+        raise
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+def _coordinate(value, sexagesimal):
+    return sexagesimal(value) if isinstance(value, str) and ":" in value else float(value)
+
+@app.route("/api/mosaic", methods=["POST"])
+def plan_mosaic():
+    """Tiles a region into pointings and checks them against tonight's limits.
+
+    Body: fov [width, height] in degrees, overlap (0.2), and either center
+    {ra (hours), dec} with width/height in degrees, or polygon [[ra, dec], ...].
+    filter (default true) drops pointings never usable tonight; with name,
+    the pointings are also stored as a target list to slew through.
+    """
+    data = request.get_json()
+    try:
+        start = time.perf_counter()
+        fov_width, fov_height = (float(v) for v in data["fov"])
+        overlap = float(data.get("overlap", 0.2))
+        if data.get("polygon"):
+            region = {"polygon": [(_coordinate(ra, hms_to_hours), _coordinate(dec, dms_to_degrees))
+                                  for ra, dec in data["polygon"]]}
+        elif data.get("center"):
+            center = data["center"]
+            region = {"center": (_coordinate(center["ra"], hms_to_hours), _coordinate(center["dec"], dms_to_degrees)),
+                      "width": float(data.get("width", 0)), "height": float(data.get("height", 0))}
+        else:
+            region = {}
+        ra, dec, row, column = mosaic.tile(fov_width, fov_height, overlap, **region)
+        total = len(ra)
+
+        site = controller.get_site_coords()
+        latitude, longitude = site['latitude'], normalize_longitude(site['longitude'])
+        now = time.time()
+        sun_ra, sun_dec, _ = ephemeris['earth'].at(ts.utc(1970, 1, 1, 0, 0, now)).observe(planets['sun']).radec()
+        observable, best_time, best_alt, night_start, night_end = mosaic.night_visibility(
+            ra, dec, latitude, longitude, horizon_mask, MAX_ALTITUDE, (sun_ra.hours, sun_dec.degrees), now)
+        if data.get("filter", True):
+            keep = observable > 0
+            ra, dec, row, column = ra[keep], dec[keep], row[keep], column[keep]
+            observable, best_time, best_alt = observable[keep], best_time[keep], best_alt[keep]
+        alt, az = sidereal.clock.altaz(ra, dec, latitude, longitude, now)
+
+        prefix = data.get("name") or "Mosaic"
+        names = [f"{prefix} {r + 1}-{c + 1}" for r, c in zip(row.tolist(), column.tolist())]
+        if data.get("name") and names:
+            target_lists.add(data["name"], names, ra, dec)
+
+        iso = lambda unix: datetime.fromtimestamp(unix, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        pointings = responses.columns(
+            index=np.arange(len(ra)),
+            name=names,
+            ra=ra,
+            dec=dec,
+            row=row,
+            column=column,
+            alt=alt,
+            az=az,
+            observableMinutes=observable,
+            bestTime=[iso(t) if t == t else None for t in best_time.tolist()],  # NaN: never usable tonight
+            bestAltitude=responses.nullable(best_alt),
+        )
+        return jsonify({"status": "success", "count": len(ra), "generated": total,
+                        "filtered": total - len(ra), "targetList": data.get("name") if names else None,
+                        "night": {"start": iso(night_start), "end": iso(night_end)} if night_start else None,
+                        "elapsedMs": (time.perf_counter() - start) * 1000.0, "pointings": pointings})
+    except TelescopeDisconnectedError:
+        raise
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@app.route("/api/sidereal-time", methods=["GET"])
+def get_sidereal_time():
+    try:
+        longitude = normalize_longitude(controller.get_site_coords()['longitude'])
+        lst = sidereal.clock.lst(longitude)
+        return jsonify({"status": "success", "lst": lst, "lstHms": sidereal.format_hours(lst),
+                        "gast": sidereal.clock.gast(), "longitude": longitude})
+    except TelescopeDisconnectedError:
+        raise
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@app.route("/api/skymap", methods=["GET"])
+def get_sky_map():
+    """All-sky Alt/Az grid for the site and current minute.
+
+    ?format=binary (default, see skymap.SkyFrame) or json; gzip when accepted.
+    Optional ?lat= and ?lon= override the mount's site.
+    """
+    fmt = request.args.get("format", "binary")
+    if fmt not in ("binary", "json"):
+        return jsonify({"status": "error", "message": f"Unknown format '{fmt}'"}), 400
+    try:
+        if "lat" in request.args and "lon" in request.args:
+            latitude, longitude = float(request.args["lat"]), float(request.args["lon"])
+        else:
+            site = controller.get_site_coords()
+            latitude, longitude = site['latitude'], site['longitude']
+        frame = sky_map.frame(latitude, normalize_longitude(longitude))
+    except TelescopeDisconnectedError:
+        raise
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    compressed = "gzip" in request.headers.get("Accept-Encoding", "")
+    response = Response(frame.payload(fmt, compressed),
+                        mimetype="application/octet-stream" if fmt == "binary" else "application/json")
+    if compressed:
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    response.cache_control.public = True
+    response.cache_control.max_age = frame.expires_in()
+    response.set_etag(f"{frame.etag}-{fmt}{'-gz' if compressed else ''}")
+    return response.make_conditional(request)
+
+@app.route("/api/hour-angle", methods=["GET"])
+def get_hour_angle():
+    """?ra= in hours, as decimal or HH:MM:SS."""
+    ra_str = request.args.get("ra")
+    if not ra_str:
+        return jsonify({"status": "error", "message": "RA required"}), 400
+    try:
+        ra = hms_to_hours(ra_str) if ":" in ra_str else float(ra_str)
+        longitude = normalize_longitude(controller.get_site_coords()['longitude'])
+        ha = sidereal.clock.hour_angle(ra, longitude)
+        return jsonify({"status": "success", "ra": ra, "ha": ha, "lst": sidereal.clock.lst(longitude),
+                        "side": "west" if ha >= 0 else "east"})
+    except TelescopeDisconnectedError:
+        raise
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@app.route("/api/connection", methods=["GET"])
+def get_connection_status():
+    return jsonify({"status": "success", **supervisor.status()})
+
+@app.route("/api/connection/reconnect", methods=["POST"])
+def reconnect_telescope():
+    supervisor.reconnect_now()
+    return jsonify({"status": "success", "message": "Reconnect requested"})
+
+@app.route("/api/commands/stats", methods=["GET"])
+def get_command_stats():
+    return jsonify({"status": "success", **commands.stats()})
+
+@app.route("/api/compute/stats", methods=["GET"])
+def get_compute_stats():
+    return jsonify({"status": "success", **compute.stats()})
+
+@app.route("/api/tracing", methods=["GET"])
+def get_tracing_status():
+    return jsonify({"status": "success", **tracing.stats()})
+
+@app.route("/api/admin/profile", methods=["POST"])
+def profile_server():
+    """Samples every thread's stack for ?seconds= (default 10) and returns the result.
+
+    ?format=svg (flamegraph, default), collapsed (flamegraph.pl / speedscope
+    input) or json; ?interval= seconds between samples; ?idle=1 keeps the
+    stacks of threads parked in waits.
+    """
+    fmt = request.args.get("format", "svg")
+    if fmt not in ("svg", "collapsed", "json"):
+        return jsonify({"status": "error", "message": f"Unknown format '{fmt}'"}), 400
+    try:
+        seconds = float(request.args.get("seconds", 10))
+        interval = float(request.args.get("interval", 0.01))
+        result = profiler.run(seconds, interval, idle=request.args.get("idle") == "1")
+    except RuntimeError as e:
+        return jsonify({"status": "error", "message": str(e)}), 409
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    if fmt == "svg":
+        return Response(result.svg(), mimetype="image/svg+xml")
+    if fmt == "collapsed":
+        return Response(result.collapsed(), mimetype="text/plain")
+    return jsonify({"status": "success", **result.summary(), "stacks": result.stacks})
+
+@app.route("/api/telemetry", methods=["GET"])
+def get_telemetry_status():
+    if telemetry_bus is None:
+        return jsonify({"status": "success", "enabled": False})
+    return jsonify({"status": "success", "enabled": True, **telemetry_bus.stats()})
+
+@app.route("/api/earth-orientation", methods=["GET"])
+def get_earth_orientation():
+    if earth_orientation_table is None:
+        return jsonify({"status": "success", "installed": False})
+    return jsonify({"status": "success", "installed": True, **earth_orientation_table.status()})
+
+@app.route("/api/state", methods=["GET"])
+def get_saved_state():
+    return jsonify({"status": "success", "settings": state_store.snapshot(), "lastRestore": last_restore})
+
+@app.route("/api/latency", methods=["GET"])
+def get_request_latency():
+    return jsonify({"status": "success", "deadlineSeconds": config.REQUEST_DEADLINE_SECONDS,
+                    "endpoints": request_latency.stats()})
+
 @app.route("/api/slew-rate", methods=["GET"])
 def get_slew_rate():
     try:
         data = controller.get_slew_rate()
         return jsonify({"status": "success", **data})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -462,8 +1213,10 @@ def set_slew_rate():
     if not rate_name:
         return jsonify({"status": "error", "message": "Missing rate name"}), 400
     try:
-        controller.set_slew_rate(rate_name)
+        commands.run(BACKGROUND, controller.set_slew_rate, rate_name)
         return jsonify({"status": "success", "message": f"Slew rate set to {rate_name}"})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -472,6 +1225,8 @@ def get_site_info():
     try:
         site_info = controller.get_site_coords()
         return jsonify({"status": "success", "site": site_info})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -486,16 +1241,22 @@ def set_site_info():
     app.logger.debug(f"[SERVER] Setting site coordinates: LAT={latitude}, LONG={longitude}, ELEV={elevation}")
 
     try:
-        controller.set_site_coords(latitude, longitude, elevation)
+        commands.run(BACKGROUND, controller.set_site_coords, latitude, longitude, elevation)
         return jsonify({"status": "success", "message": "Site information updated"})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
 @app.route("/api/config/load", methods=["GET"])
 def load_config():
     try:
-        controller.load_config()
+        result = commands.run(BACKGROUND, controller.load_config)
+        if result.get("status") == "timeout":
+            return jsonify({"status": "timeout", "message": "Configuration load not confirmed by the driver"}), 504
         return jsonify({"status": "success"})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -507,8 +1268,10 @@ def set_focuser_motion():
         return jsonify({"status": "error", "message": "Motion is required"}), 400
 
     try:
-        controller.set_focuser_motion(motion)
+        commands.run(INTERACTIVE, controller.set_focuser_motion, motion)
         return jsonify({"status": "success"}), 200
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -517,8 +1280,17 @@ def set_focuser_abort_motion():
     try:
         data = request.get_json()
         abort = data.get("abort")
-        controller.set_focuser_abort_motion(abort)
+        # As in run_emergency: signal the sweep, abort, and only then wait for it to wind down
+        if abort:
+            focus_sweeper.stop(wait=False)
+        try:
+            commands.run(EMERGENCY, controller.set_focuser_abort_motion, abort)
+        finally:
+            if abort:
+                focus_sweeper.stop()
         return jsonify({"status": "success"}), 200
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -527,6 +1299,8 @@ def get_focuser_speed():
     try:
         speed = controller.get_focuser_speed()
         return jsonify({"status": "success", **speed})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -538,8 +1312,10 @@ def set_focuser_speed():
         return jsonify({"status": "error", "message": "Speed is required"}), 400
 
     try:
-        controller.set_focuser_speed(speed)
+        commands.run(INTERACTIVE, controller.set_focuser_speed, speed)
         return jsonify({"status": "success"}), 200
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -549,6 +1325,8 @@ def get_focuser_timer():
         timer = controller.get_focuser_timer()
         app.logger.info(f"Server loaded timer: {timer}")
         return jsonify({"status": "success", **timer})
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
@@ -561,10 +1339,74 @@ def set_focuser_timer():
         return jsonify({"status": "error", "message": "Timer is required"}), 400
 
     try:
-        controller.set_focuser_timer(timer)
+        commands.run(INTERACTIVE, controller.set_focuser_timer, timer)
         return jsonify({"status": "success"}), 200
+    except TelescopeDisconnectedError:
+        raise
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
 
+@app.route("/api/focuser/sweep", methods=["POST"])
+def start_focus_sweep():
+    """Starts a focus sweep run by the server.
+
+    Body: direction (FOCUS_INWARD / FOCUS_OUTWARD), steps [ms, ...] or
+    duration (ms) and count, settle (seconds between steps, default 1) and
+    optionally speed. Progress is at GET /api/focuser/sweep/events.
+    """
+    try:
+        direction, durations, settle, speed = focus_sweep.parse_spec(request.get_json())
+        focus_sweeper.start(direction, durations, settle, speed)
+        return jsonify({"status": "success", **focus_sweeper.status()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@app.route("/api/focuser/sweep", methods=["GET"])
+def get_focus_sweep():
+    return jsonify({"status": "success", **focus_sweeper.status()})
+
+@app.route("/api/focuser/sweep", methods=["DELETE"])
+def stop_focus_sweep():
+    focus_sweeper.stop()
+    return jsonify({"status": "success", **focus_sweeper.status()})
+
+@app.route("/api/focuser/sweep/events", methods=["GET"])
+def stream_focus_sweep():
+    """Server-sent events: one per step as it completes, then completed, aborted or failed."""
+    def events():
+        sent = 0
+        while True:
+            new, finished = focus_sweeper.events(sent, timeout=15)
+            for event in new:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            sent += len(new)
+            if finished and not new:
+                return
+            if not new:
+                yield ": keep-alive\n\n"
+    return Response(events(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# Read endpoints mirrored to read_worker.py processes over the telemetry bus: path -> refresh period
+# (seconds). Started last, once every route exists.
+TELEMETRY_ENDPOINTS = {
+    "/api/coordinates": config.TELEMETRY_INTERVAL,
+    "/api/track-state": 1.0,
+    "/api/parking-status": 1.0,
+    "/api/tracking": 1.0,
+    "/api/satellites/track": 1.0,
+    "/api/connection": 1.0,
+    "/api/slew-rate": 5.0,
+    "/api/site": 5.0,
+    "/api/park-position": 5.0,
+    "/api/focuser/speed": 5.0,
+    "/api/focuser/timer": 5.0,
+    "/api/focuser/sweep": 1.0,
+    "/api/meridian": 5.0,
+}
+telemetry_bus = None
+if config.TELEMETRY_SOCKET:
+    telemetry_bus = TelemetryPublisher(app, TELEMETRY_ENDPOINTS, config.TELEMETRY_SOCKET, config.TELEMETRY_INTERVAL)
+    telemetry_bus.start()
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=7123)
@@ -0,0 +1,167 @@
+import logging
+import math
+import threading
+import time
+
+import erfa
+import numpy as np
+from astropy.time import Time
+
+import earth_orientation
+
+# Greenwich apparent sidereal time advances 1.0027379 sidereal seconds per UT1
+# second; in hours of sidereal time per second of unix time that is:
+SIDEREAL_HOURS_PER_SECOND = 1.002737909350795 / 3600.0
+ANCHOR_SECONDS = 3600  # how long one Earth-orientation snapshot is reused (error < 1 ms)
+
+
+class _Anchor:
+    __slots__ = ("unix", "gast", "rnpb")
+
+    def __init__(self, unix, gast, rnpb):
+        self.unix = unix
+        self.gast = gast    # Greenwich apparent sidereal time at unix, hours
+        self.rnpb = rnpb    # ICRS -> true equator and equinox of date
+
+
+class SiderealClock:
+    """Local sidereal time and hour angle from a cached Earth-rotation snapshot.
+
+    A full IAU 2006/2000A evaluation (erfa, with UT1 from the installed Earth
+    orientation table, or astropy's IERS data without one) is done once per
+    ANCHOR_SECONDS; in between, sidereal time is advanced linearly from the
+    snapshot, which costs a clock read and a multiply-add.
+    """
+
+    def __init__(self, anchor_seconds=ANCHOR_SECONDS):
+        self.anchor_seconds = anchor_seconds
+        self.logger = logging.getLogger('SiderealClock')
+        self._anchor = None
+        self._lock = threading.Lock()
+
+    def _compute_anchor(self, unix):
+        table = earth_orientation.installed()
+        if table is not None:
+            tt1, tt2, ut11, ut12 = table.julian_dates(unix)
+        else:
+            t = Time(unix, format='unix')
+            tt = t.tt
+            try:
+                ut1 = t.ut1
+            except Exception:  # no IERS table covering t: UT1 - UTC stays under a second
+                ut1 = t.utc
+            tt1, tt2, ut11, ut12 = tt.jd1, tt.jd2, ut1.jd1, ut1.jd2
+        gast = erfa.gst06a(ut11, ut12, tt1, tt2)
+        return _Anchor(unix, math.degrees(gast) / 15.0, erfa.pnm06a(tt1, tt2))
+
+    def _anchor_for(self, unix):
+        anchor = self._anchor
+        if anchor is not None and abs(unix - anchor.unix) <= self.anchor_seconds:
+            return anchor
+        anchor = self._compute_anchor(unix)
+        # Only snapshots near the present replace the cached one; planning queries get a one-off
+        if abs(unix - time.time()) <= self.anchor_seconds:
+            with self._lock:
+                self._anchor = anchor
+            self.logger.debug(f"Refreshed Earth-rotation anchor: GAST={anchor.gast:.6f} h")
+        return anchor
+
+    # gast, lst and hour_angle are called per request and per tracking tick, so
+    # each inlines the snapshot check instead of going through a helper
+
+    def gast(self, unix=None):
+        """Greenwich apparent sidereal time in hours."""
+        if unix is None:
+            unix = time.time()
+        anchor = self._anchor
+        if anchor is None or not -self.anchor_seconds <= unix - anchor.unix <= self.anchor_seconds:
+            anchor = self._anchor_for(unix)
+        return (anchor.gast + (unix - anchor.unix) * SIDEREAL_HOURS_PER_SECOND) % 24.0
+
+    def lst(self, longitude, unix=None):
+        """Local apparent sidereal time in hours; longitude in degrees east (0-360 or +-180)."""
+        if unix is None:
+            unix = time.time()
+        anchor = self._anchor
+        if anchor is None or not -self.anchor_seconds <= unix - anchor.unix <= self.anchor_seconds:
+            anchor = self._anchor_for(unix)
+        return (anchor.gast + (unix - anchor.unix) * SIDEREAL_HOURS_PER_SECOND + longitude / 15.0) % 24.0
+
+    def hour_angle(self, ra_hours, longitude, unix=None):
+        """Hour angle in hours, -12 (east) to +12 (west)."""
+        if unix is None:
+            unix = time.time()
+        anchor = self._anchor
+        if anchor is None or not -self.anchor_seconds <= unix - anchor.unix <= self.anchor_seconds:
+            anchor = self._anchor_for(unix)
+        lst = anchor.gast + (unix - anchor.unix) * SIDEREAL_HOURS_PER_SECOND + longitude / 15.0
+        return (lst - ra_hours + 12.0) % 24.0 - 12.0
+
+    def ra_from_hour_angle(self, ha_hours, longitude, unix=None):
+        return (self.lst(longitude, unix) - ha_hours) % 24.0
+
+    def gast_array(self, unix):
+        """Vectorized gast for an array of unix times (one snapshot, taken at the middle)."""
+        unix = np.asarray(unix, dtype=float)
+        anchor = self._anchor_for(float(unix.min() + unix.max()) / 2.0 if unix.size else time.time())
+        return (anchor.gast + (unix - anchor.unix) * SIDEREAL_HOURS_PER_SECOND) % 24.0
+
+    def of_date(self, ra_hours, dec_deg, unix=None):
+        """ICRS RA (hours) / Dec (degrees) to RA / Dec of the true equator and equinox of date, same units."""
+        ra, dec = _of_date(ra_hours, dec_deg, self._anchor_for(time.time() if unix is None else unix))
+        return np.degrees(ra) / 15.0 % 24.0, np.degrees(dec)
+
+    def altaz(self, ra_hours, dec_deg, latitude, longitude, unix=None):
+        """Alt/Az in degrees of ICRS positions (scalars or arrays) at one instant.
+
+        Uses the snapshot's precession-nutation matrix; aberration and
+        refraction are ignored, which is within a few tens of arcseconds.
+        """
+        unix = time.time() if unix is None else unix
+        anchor = self._anchor_for(unix)
+        gast = anchor.gast + (unix - anchor.unix) * SIDEREAL_HOURS_PER_SECOND
+        ra_date, dec_date = _of_date(ra_hours, dec_deg, anchor)
+        return _horizontal(np.radians(gast * 15.0 + longitude) - ra_date, dec_date, latitude)
+
+    def altaz_series(self, ra_hours, dec_deg, latitude, longitude, unix_times):
+        """Alt/Az in degrees of N positions at T instants, as (N, T) arrays.
+
+        Precession is taken once, at the middle of the series, so keep it
+        to a night or so.
+        """
+        unix_times = np.asarray(unix_times, dtype=float)
+        anchor = self._anchor_for(float(unix_times.min() + unix_times.max()) / 2.0)
+        gast = anchor.gast + (unix_times - anchor.unix) * SIDEREAL_HOURS_PER_SECOND
+        ra_date, dec_date = _of_date(ra_hours, dec_deg, anchor)
+        ha = np.radians(gast * 15.0 + longitude)[None, :] - np.atleast_1d(ra_date)[:, None]
+        return _horizontal(ha, np.atleast_1d(dec_date)[:, None], latitude)
+
+
+def _of_date(ra_hours, dec_deg, anchor):
+    """ICRS RA (hours) / Dec (degrees) to RA / Dec of date in radians, with the anchor's matrix."""
+    ra, dec = np.broadcast_arrays(np.radians(np.asarray(ra_hours, dtype=float) * 15.0), np.radians(dec_deg))
+    cos_dec = np.cos(dec)
+    v = np.stack((cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)), axis=-1) @ anchor.rnpb.T
+    return np.arctan2(v[..., 1], v[..., 0]), np.arcsin(np.clip(v[..., 2], -1.0, 1.0))
+
+
+def _horizontal(ha, dec, latitude):
+    """Hour angle and declination (radians) to altitude and azimuth (degrees)."""
+    lat = np.radians(latitude)
+    cos_dec, sin_dec, cos_ha = np.cos(dec), np.sin(dec), np.cos(ha)
+    sin_alt = np.sin(lat) * sin_dec + np.cos(lat) * cos_dec * cos_ha
+    az = np.arctan2(-cos_dec * np.sin(ha), sin_dec * np.cos(lat) - cos_dec * np.sin(lat) * cos_ha)
+    return np.degrees(np.arcsin(np.clip(sin_alt, -1.0, 1.0))), np.degrees(az) % 360.0
+
+
+def altaz_at_hour_angle(ha_hours, dec_deg, latitude):
+    """Alt/Az in degrees at hour angles (hours) and declinations of date (degrees), broadcast together."""
+    return _horizontal(np.radians(np.asarray(ha_hours, dtype=float) * 15.0), np.radians(dec_deg), latitude)
+
+
+def format_hours(hours):
+    total = int(round((hours % 24) * 3600)) % 86400
+    return f"{total // 3600:02d}:{total // 60 % 60:02d}:{total % 60:02d}"
+
+
+clock = SiderealClock()
@@ -0,0 +1,149 @@
+import gzip
+import json
+import logging
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from sidereal import clock
+
+BUCKET_SECONDS = 60       # one frame per site per minute, shared by every client
+CACHE_FRAMES = 8          # sites (and the previous minute) kept in memory
+RA_LINE_HOURS = 1         # meridians every hour of RA
+DEC_LINE_DEGREES = 15     # parallels every 15 degrees of Dec
+LINE_STEP_DEGREES = 1     # sampling along each grid line
+SCALE = 0.01              # degrees per unit of the packed int16/uint16 coordinates
+MAGIC = b"SKYM"
+
+
+class SkyFrame:
+    """Alt/Az of every catalog object and grid-line point for one site and minute.
+
+    Points are laid out as objects first, then the RA lines (raLinePoints
+    each, Dec -90 to +90), then the Dec lines (decLinePoints each, RA 0 to 24 h).
+    The encoded payloads are built once and reused for every client.
+    """
+
+    def __init__(self, header, alt, az):
+        self.header = header
+        self.alt = alt
+        self.az = az
+        self.etag = f"{header['bucket']}-{header['latitude']:.4f}-{header['longitude']:.4f}"
+        self._payloads = {}
+        self._lock = threading.Lock()
+
+    def expires_in(self):
+        return max(0, int(self.header["expires"] - time.time()))
+
+    def payload(self, fmt, compressed):
+        key = (fmt, compressed)
+        data = self._payloads.get(key)
+        if data is None:
+            with self._lock:
+                data = self._payloads.get(key)
+                if data is None:
+                    data = self._binary() if fmt == "binary" else self._json()
+                    if compressed:
+                        data = gzip.compress(data, compresslevel=6)
+                    self._payloads[key] = data
+        return data
+
+    def _binary(self):
+        """MAGIC, uint32 header length, JSON header padded to 4 bytes, int16 alt[], uint16 az[] (little-endian)."""
+        header = json.dumps(self.header, separators=(",", ":")).encode()
+        header += b" " * (-len(header) % 4)
+        alt = np.round(self.alt / SCALE).astype("<i2")
+        az = (np.round(self.az / SCALE).astype(np.int64) % round(360 / SCALE)).astype("<u2")
+        return MAGIC + struct.pack("<I", len(header)) + header + alt.tobytes() + az.tobytes()
+
+    def _json(self):
+        return json.dumps({
+            "status": "success", **self.header,
+            "alt": np.round(self.alt, 2).tolist(),
+            "az": np.round(self.az, 2).tolist(),
+        }, separators=(",", ":")).encode()
+
+
+class SkyMap:
+    """All-sky lookup grid for sky-map rendering.
+
+    Fixed catalog objects, the Sun, Moon and planets, and an RA/Dec grid are
+    projected to Alt/Az in one vectorized pass through the sidereal clock.
+    Frames are cached per BUCKET_SECONDS and site, and only one thread builds
+    a missing frame, so any number of clients costs one computation per minute.
+    """
+
+    def __init__(self, catalog, planets, ephemeris, ts, bucket_seconds=BUCKET_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self.planets = planets
+        self.earth = ephemeris['earth']
+        self.ts = ts
+        self.logger = logging.getLogger('SkyMap')
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+        fixed = [o for o in catalog if o.get("type") != "planet" and "ra" in o and "dec" in o]
+        self._fixed_names = [o["name"] for o in fixed]
+        self._fixed_ra = np.array([o["ra"] / 15.0 for o in fixed], dtype=float)
+        self._fixed_dec = np.array([o["dec"] for o in fixed], dtype=float)
+
+        ra_lines = np.arange(0, 24, RA_LINE_HOURS, dtype=float)
+        dec_lines = np.arange(-90 + DEC_LINE_DEGREES, 90, DEC_LINE_DEGREES, dtype=float)
+        dec_samples = np.arange(-90, 90 + LINE_STEP_DEGREES, LINE_STEP_DEGREES, dtype=float)
+        ra_samples = np.arange(0, 360 + LINE_STEP_DEGREES, LINE_STEP_DEGREES, dtype=float) / 15.0
+        self._grid = {"raLines": ra_lines.tolist(), "decLines": dec_lines.tolist(),
+                      "raLinePoints": len(dec_samples), "decLinePoints": len(ra_samples)}
+        self._grid_ra = np.concatenate((np.repeat(ra_lines, len(dec_samples)), np.tile(ra_samples, len(dec_lines))))
+        self._grid_dec = np.concatenate((np.tile(dec_samples, len(ra_lines)), np.repeat(dec_lines, len(ra_samples))))
+
+    def frame(self, latitude, longitude, unix_time=None):
+        unix_time = time.time() if unix_time is None else unix_time
+        key = (int(unix_time // self.bucket_seconds), round(latitude, 4), round(longitude, 4))
+        frame = self._cached(key)
+        if frame is None:
+            with self._build_lock:
+                frame = self._cached(key)
+                if frame is None:
+                    frame = self._build(*key)
+                    with self._lock:
+                        self._frames[key] = frame
+                        while len(self._frames) > CACHE_FRAMES:
+                            self._frames.popitem(last=False)
+        return frame
+
+    def _cached(self, key):
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+            return frame
+
+    def _build(self, bucket, latitude, longitude):
+        start = time.perf_counter()
+        unix_time = (bucket + 0.5) * self.bucket_seconds
+        t = self.ts.utc(1970, 1, 1, 0, 0, unix_time)
+
+        names, kinds = list(self._fixed_names), ["fixed"] * len(self._fixed_names)
+        ra, dec = [self._fixed_ra], [self._fixed_dec]
+        for name, body in self.planets.items():
+            body_ra, body_dec, _ = self.earth.at(t).observe(body).radec()
+            names.append(name.capitalize())
+            kinds.append("planet")
+            ra.append([body_ra.hours])
+            dec.append([body_dec.degrees])
+        ra.append(self._grid_ra)
+        dec.append(self._grid_dec)
+
+        alt, az = clock.altaz(np.concatenate(ra), np.concatenate(dec), latitude, longitude, unix_time)
+        header = {
+            "time": unix_time, "bucket": bucket, "expires": (bucket + 1) * self.bucket_seconds,
+            "latitude": latitude, "longitude": longitude, "lst": clock.lst(longitude, unix_time),
+            "scale": SCALE, "objects": [{"name": n, "type": k} for n, k in zip(names, kinds)],
+            "points": int(alt.size), **self._grid,
+        }
+        self.logger.debug(f"Built sky frame with {alt.size} points in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return SkyFrame(header, alt, az)
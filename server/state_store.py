@@ -0,0 +1,105 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from base_controller import SETTINGS, UNSAVED_VALUES
+
+FLOAT_TOLERANCE = 0.01   # values closer than this count as unchanged (mounts round what they store)
+
+
+def _same(a, b):
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)) and not isinstance(a, bool):
+        return abs(a - b) <= FLOAT_TOLERANCE
+    return a == b
+
+
+class StateStore:
+    """Last known mount and site settings, kept in SQLite across restarts.
+
+    Controllers report every setting the mount confirmed (see
+    BaseTelescopeController.add_state_listener); only real changes reach the
+    disk. Recording is paused from a link drop until restore() has brought
+    the mount back in line, so the defaults a restarted driver comes up with
+    never overwrite what was stored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.logger = logging.getLogger('StateStore')
+        self._lock = threading.Lock()
+        self._paused = True
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated REAL NOT NULL)")
+        self._values = {}
+        for key, value, updated in self._db.execute("SELECT key, value, updated FROM state"):
+            self._values[key] = (json.loads(value), updated)
+        self.logger.info(f"Loaded {len(self._values)} saved settings from {path}")
+
+    def get(self, key, default=None):
+        entry = self._values.get(key)
+        return default if entry is None else entry[0]
+
+    def snapshot(self):
+        with self._lock:
+            return {key: {"value": value, "updated": updated} for key, (value, updated) in self._values.items()}
+
+    def put(self, key, value, force=False):
+        """Stores a confirmed value; returns True if it changed what was stored."""
+        if value in UNSAVED_VALUES.get(key, ()):
+            return False
+        with self._lock:
+            if self._paused and not force:
+                return False
+            entry = self._values.get(key)
+            if entry is not None and _same(entry[0], value):
+                return False
+            now = time.time()
+            self._db.execute("INSERT OR REPLACE INTO state (key, value, updated) VALUES (?, ?, ?)",
+                             (key, json.dumps(value), now))
+            self._values[key] = (value, now)
+        self.logger.debug(f"Saved {key} = {value}")
+        return True
+
+    def pause(self):
+        with self._lock:
+            self._paused = True
+
+    def restore(self, controller, run=None):
+        """Re-applies saved settings the mount lost, then resumes recording.
+
+        Each setting is read back first and only written if it differs; settings
+        never saved are recorded from the mount instead. run(fn, *args) can route
+        the calls through the command scheduler. Returns what was done.
+        """
+        run = run or (lambda fn, *args: fn(*args))
+        start = time.perf_counter()
+        report = {"applied": [], "unchanged": [], "recorded": [], "failed": {}}
+        for key in SETTINGS:
+            try:
+                current = run(controller.read_setting, key)
+                saved = self.get(key)
+                if saved in UNSAVED_VALUES.get(key, ()):
+                    saved = None  # stored before such values were left out; the mount's current one replaces it
+                if saved is None:
+                    if current is not None and self.put(key, current, force=True):
+                        report["recorded"].append(key)
+                elif current is not None and _same(saved, current):
+                    report["unchanged"].append(key)
+                else:
+                    run(controller.apply_setting, key, saved)
+                    report["applied"].append(key)
+            except Exception as e:  # unsupported on this mount, or the link dropped again
+                report["failed"][key] = str(e)
+        if controller.link_status()["connected"]:  # otherwise the next link-up restores again
+            with self._lock:
+                self._paused = False
+        report["seconds"] = round(time.perf_counter() - start, 3)
+        self.logger.info(f"Restored settings in {report['seconds']} s: re-applied {report['applied'] or 'none'}, "
+                         f"{len(report['unchanged'])} unchanged, {len(report['failed'])} unavailable")
+        return report
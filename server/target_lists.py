@@ -0,0 +1,258 @@
+import codecs
+import csv
+import logging
+import re
+import threading
+import time
+
+import numpy as np
+
+from sidereal import clock
+
+READ_BLOCK_BYTES = 1 << 20   # bytes pulled from the request stream at a time
+CHUNK_LINES = 20000          # rows parsed per vectorized pass
+MAX_TARGETS = 1000000        # hard cap per list, keeps an import's memory bounded
+MAX_ERRORS_REPORTED = 100
+LOW_ALTITUDE = 15            # degrees, same warning threshold as single slews
+
+NAME_COLUMNS = ("name", "object", "target", "id")
+RA_COLUMNS = ("ra", "raj2000", "ra_j2000", "ra2000", "alpha")
+DEC_COLUMNS = ("dec", "de", "decj2000", "dec_j2000", "dej2000", "dec2000", "delta")
+
+# One match per line: sign, up to three numeric fields with any of the usual
+# separators ("12:30:45", "12h30m45s", "-05 12 30", "+41°16'09\"", "187.25"),
+# and whatever is left over, which must be empty for the value to be valid.
+_COORDINATE = re.compile(
+    r"^[ \t]*([+-]?)[ \t]*(\d+(?:\.\d*)?|\.\d+)?"
+    r"(?:[ \t]*[:hHdD°][ \t]*|[ \t]+)?(\d+(?:\.\d*)?)?"
+    r"(?:[ \t]*[:mM'′][ \t]*|[ \t]+)?(\d+(?:\.\d*)?)?"
+    r"[ \t]*[sS\"″]?[ \t]*(.*)$",
+    re.M,
+)
+
+
+def parse_coordinates(values):
+    """Parses a sequence of sexagesimal or decimal strings in one pass.
+
+    Returns (value, sexagesimal, valid) arrays; value is d + m/60 + s/3600
+    with the sign applied, and NaN where the string could not be parsed.
+    """
+    n = len(values)
+    if n == 0:
+        empty = np.zeros(0)
+        return empty, empty.astype(bool), empty.astype(bool)
+
+    text = "\n".join(v.replace("\n", " ") for v in values)
+    fields = np.array(_COORDINATE.findall(text), dtype=str).reshape(-1, 5)
+    if len(fields) != n:  # cannot happen with the pattern above, but never misalign rows
+        raise ValueError("Coordinate parser lost track of rows")
+
+    numbers = np.where(fields[:, 1:4] == "", "0", fields[:, 1:4]).astype(float)
+    valid = (fields[:, 1] != "") & (fields[:, 4] == "") & (numbers[:, 1] < 60) & (numbers[:, 2] < 60)
+    sexagesimal = fields[:, 2] != ""
+
+    value = numbers[:, 0] + numbers[:, 1] / 60.0 + numbers[:, 2] / 3600.0
+    value = np.where(fields[:, 0] == "-", -value, value)
+    return np.where(valid, value, np.nan), sexagesimal, valid
+
+
+class TargetList:
+    """An imported observing list, stored column-wise."""
+
+    def __init__(self, name, names, ra_hours, dec_deg, rows, errors, skipped):
+        self.name = name
+        self.names = names
+        self.ra_hours = ra_hours
+        self.dec_deg = dec_deg
+        self.rows = rows          # source line number of each target
+        self.errors = errors      # first MAX_ERRORS_REPORTED rejected lines
+        self.skipped = skipped    # total rejected lines
+        self.created = time.time()
+
+    def __len__(self):
+        return len(self.names)
+
+    def find(self, target):
+        """Index of a target by name (case-insensitive) or position in the list."""
+        if isinstance(target, int) or (isinstance(target, str) and target.isdigit()):
+            index = int(target)
+            return index if 0 <= index < len(self) else None
+        matches = np.nonzero(np.char.lower(self.names.astype(str)) == str(target).strip().lower())[0]
+        return int(matches[0]) if len(matches) else None
+
+    def evaluate(self, latitude, longitude, min_altitude, max_altitude, unix_time=None):
+        """Altitude, azimuth, culmination and a limit status for every target."""
+        alt, az = clock.altaz(self.ra_hours, self.dec_deg, latitude, longitude, unix_time)
+        culmination = 90.0 - np.abs(latitude - self.dec_deg)
+        status = np.full(len(self), "ok", dtype=object)
+        status[alt < LOW_ALTITUDE] = "low"
+        status[alt > max_altitude] = "aboveMaxAltitude"
+        status[alt <= min_altitude] = "belowHorizon"
+        status[culmination <= min_altitude] = "neverRises"
+        return alt, az, culmination, status
+
+    def summary(self):
+        return {
+            "name": self.name,
+            "count": len(self),
+            "skipped": self.skipped,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.created)),
+        }
+
+
+class _Columns:
+    """Works out the delimiter and which columns hold name, RA and Dec."""
+
+    def __init__(self, first_line):
+        if "\t" in first_line:
+            self.delimiter = "\t"
+        elif "," in first_line:
+            self.delimiter = ","
+        elif ";" in first_line:
+            self.delimiter = ";"
+        else:
+            self.delimiter = None  # whitespace: "name ra dec", coordinates as single tokens
+        self.indexes = (0, 1, 2)
+        self.header = False
+
+    def split(self, lines):
+        if self.delimiter is None:
+            return [line.rsplit(None, 2) for line in lines]
+        return list(csv.reader(lines, delimiter=self.delimiter, skipinitialspace=True))
+
+    def detect_header(self, row):
+        keys = [c.strip().lower().replace(" ", "_").replace("(", "").replace(")", "") for c in row]
+
+        def index(candidates, default):
+            return next((i for i, k in enumerate(keys) if k in candidates), default)
+
+        named = any(k in NAME_COLUMNS + RA_COLUMNS + DEC_COLUMNS for k in keys)
+        _, _, valid = parse_coordinates([row[1] if len(row) > 1 else "", row[2] if len(row) > 2 else ""])
+        if named or not valid.any():
+            self.header = True
+            self.indexes = (index(NAME_COLUMNS, 0), index(RA_COLUMNS, 1), index(DEC_COLUMNS, 2))
+        return self.header
+
+
+class TargetListStore:
+    """Named target lists imported from CSV, TSV or plain text streams."""
+
+    def __init__(self):
+        self.lists = {}
+        self.logger = logging.getLogger('TargetListStore')
+        self._lock = threading.Lock()
+
+    def names(self):
+        with self._lock:
+            return [target_list.summary() for target_list in self.lists.values()]
+
+    def get(self, name):
+        with self._lock:
+            target_list = self.lists.get(name)
+        if target_list is None:
+            raise RuntimeError(f"Target list '{name}' not found")
+        return target_list
+
+    def add(self, name, names, ra_hours, dec_deg):
+        """Stores a generated list (e.g. mosaic pointings) under name, replacing any list of that name."""
+        target_list = TargetList(name, np.asarray(names, dtype=object), np.asarray(ra_hours, dtype=float),
+                                 np.asarray(dec_deg, dtype=float), np.arange(1, len(names) + 1), [], 0)
+        with self._lock:
+            self.lists[name] = target_list
+        return target_list
+
+    def delete(self, name):
+        with self._lock:
+            if self.lists.pop(name, None) is None:
+                raise RuntimeError(f"Target list '{name}' not found")
+
+    def import_stream(self, name, stream, ra_unit="auto"):
+        """Reads a target list from a binary stream and stores it under name.
+
+        The stream is consumed in READ_BLOCK_BYTES blocks and parsed CHUNK_LINES
+        rows at a time, so memory grows with the targets kept, not the upload.
+        ra_unit is "hours", "degrees", or "auto" (sexagesimal RA in hours,
+        decimal RA in degrees).
+        """
+        start = time.perf_counter()
+        if ra_unit not in ("auto", "hours", "degrees"):
+            raise ValueError(f"Invalid ra_unit: {ra_unit}")
+
+        state = {"columns": None, "line": 0, "errors": [], "skipped": 0, "count": 0}
+        parts = {"names": [], "ra": [], "dec": [], "rows": []}
+
+        decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        pending = ""
+        while True:
+            block = stream.read(READ_BLOCK_BYTES)
+            text = pending + decoder.decode(block or b"", final=not block)
+            lines = text.split("\n")
+            pending = lines.pop() if block else ""
+            for i in range(0, len(lines), CHUNK_LINES):
+                self._parse_chunk(lines[i:i + CHUNK_LINES], ra_unit, state, parts)
+            if not block:
+                break
+
+        target_list = TargetList(
+            name,
+            np.concatenate(parts["names"]) if parts["names"] else np.zeros(0, dtype=object),
+            np.concatenate(parts["ra"]) if parts["ra"] else np.zeros(0),
+            np.concatenate(parts["dec"]) if parts["dec"] else np.zeros(0),
+            np.concatenate(parts["rows"]) if parts["rows"] else np.zeros(0, dtype=np.int64),
+            state["errors"],
+            state["skipped"],
+        )
+        with self._lock:
+            self.lists[name] = target_list
+        self.logger.info(f"Imported {len(target_list)} targets into '{name}' ({target_list.skipped} skipped) "
+                         f"in {time.perf_counter() - start:.2f} s")
+        return target_list
+
+    def _parse_chunk(self, lines, ra_unit, state, parts):
+        first_line = state["line"] + 1
+        state["line"] += len(lines)
+
+        numbered = [(first_line + i, line.rstrip("\r")) for i, line in enumerate(lines)]
+        numbered = [(n, line) for n, line in numbered if line.strip() and not line.lstrip().startswith("#")]
+        if not numbered:
+            return
+
+        columns = state["columns"]
+        if columns is None:
+            columns = state["columns"] = _Columns(numbered[0][1])
+            if columns.detect_header(columns.split([numbered[0][1]])[0]):
+                numbered = numbered[1:]
+
+        rows = columns.split([line for _, line in numbered])
+        name_i, ra_i, dec_i = columns.indexes
+        width = max(columns.indexes) + 1
+
+        complete = np.array([len(r) >= width for r in rows], dtype=bool)
+        names = np.array([r[name_i].strip() if len(r) >= width else "" for r in rows], dtype=object)
+        ra, ra_sexagesimal, ra_valid = parse_coordinates([r[ra_i] if len(r) >= width else "" for r in rows])
+        dec, _, dec_valid = parse_coordinates([r[dec_i] if len(r) >= width else "" for r in rows])
+
+        if ra_unit == "degrees":
+            ra = ra / 15.0
+        elif ra_unit == "auto":
+            ra = np.where(ra_sexagesimal, ra, ra / 15.0)
+
+        valid = complete & ra_valid & dec_valid & (ra >= 0) & (ra < 24) & (np.abs(dec) <= 90)
+        room = MAX_TARGETS - state["count"]
+        if valid.sum() > room:
+            valid[np.nonzero(valid)[0][room:]] = False
+
+        line_numbers = np.array([n for n, _ in numbered], dtype=np.int64)
+        rejected = np.nonzero(~valid)[0]
+        state["skipped"] += len(rejected)
+        for i in rejected[:max(0, MAX_ERRORS_REPORTED - len(state["errors"]))]:
+            state["errors"].append({"line": int(line_numbers[i]), "text": numbered[i][1][:120]})
+
+        names = names[valid]
+        unnamed = names == ""
+        names[unnamed] = [f"target-{n}" for n in line_numbers[valid][unnamed]]
+        parts["names"].append(names)
+        parts["ra"].append(ra[valid])
+        parts["dec"].append(dec[valid])
+        parts["rows"].append(line_numbers[valid])
+        state["count"] += int(valid.sum())
@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+MAX_FRAME_BYTES = 1 << 20          # larger snapshots are not sent (a SEQPACKET message must fit the socket buffer)
+SEND_BUFFER_BYTES = 4 << 20
+RECONNECT_SECONDS = 1.0
+INTERNAL_REQUEST = "telemetry.internal"  # WSGI environ key marking the publisher's own polls
+
+
+class TelemetryPublisher:
+    """Owner side of the telemetry bus: mirrors read endpoints to read_worker.py processes.
+
+    A background thread answers each endpoint through the app itself, with
+    the same hooks as a real request (so a dropped link gives the same 503 or
+    cached reply), no more often than its refresh period, and sends every
+    subscriber the latest responses as one snapshot over a Unix SEQPACKET
+    socket. Read traffic on the workers therefore costs this process a fixed
+    number of calls per second however many clients there are, and nothing
+    at all while no worker is connected. A subscriber that falls behind
+    misses snapshots instead of holding up the others.
+    """
+
+    def __init__(self, app, endpoints, path, interval):
+        self.app = app
+        self.endpoints = dict(endpoints)   # path -> refresh period in seconds
+        self.path = path
+        self.interval = interval
+        self.logger = logging.getLogger('TelemetryPublisher')
+        self._client = app.test_client()
+        self._client.environ_base[INTERNAL_REQUEST] = True  # kept out of the request latencies and traces
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._due = dict.fromkeys(self.endpoints, 0.0)
+        self._responses = {}               # path -> [status code, JSON body]
+        self._frame = None
+        self.sequence = 0
+        self.sent = 0
+        self.skipped = 0
+
+    def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # left over from a previous run
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self._socket.bind(self.path)
+        self._socket.listen(64)
+        threading.Thread(target=self._accept, name="TelemetryAccept", daemon=True).start()
+        threading.Thread(target=self._run, name="TelemetryPublisher", daemon=True).start()
+        self.logger.info(f"Publishing {len(self.endpoints)} endpoints on {self.path}")
+
+    def refresh(self):
+        """Re-reads every endpoint at the next tick, e.g. after a write changed the mount's state."""
+        with self._lock:
+            self._due = dict.fromkeys(self.endpoints, 0.0)
+        self._wake.set()
+
+    def stats(self):
+        with self._lock:
+            subscribers = len(self._subscribers)
+        return {"socket": self.path, "subscribers": subscribers, "sequence": self.sequence,
+                "sent": self.sent, "skipped": self.skipped, "endpoints": sorted(self.endpoints)}
+
+    def _accept(self):
+        while True:
+            connection, _ = self._socket.accept()
+            connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_BYTES)
+            connection.setblocking(False)
+            with self._lock:
+                self._subscribers.append(connection)
+                frame = self._frame
+            self.logger.info(f"Read worker subscribed ({len(self._subscribers)} connected)")
+            if frame is not None:
+                self._send(connection, frame)
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            with self._lock:
+                if not self._subscribers:
+                    continue
+                now = time.monotonic()
+                due = [path for path, at in self._due.items() if at <= now]
+                for path in due:
+                    self._due[path] = now + self.endpoints[path]
+            for path in due:
+                try:
+                    response = self._client.get(path)
+                    self._responses[path] = [response.status_code, response.get_data(as_text=True)]
+                except Exception as e:  # the route itself crashed; workers report it like the server would
+                    self._responses[path] = [500, json.dumps({"status": "error", "message": str(e)})]
+            # Sent every tick, even unchanged, so workers can tell a live owner from a stale snapshot
+            self.sequence += 1
+            frame = json.dumps({"sequence": self.sequence, "time": time.time(),
+                                "responses": self._responses}).encode()
+            if len(frame) > MAX_FRAME_BYTES:
+                self.logger.error(f"Snapshot of {len(frame)} bytes is too large to publish")
+                continue
+            with self._lock:
+                self._frame = frame
+                subscribers = list(self._subscribers)
+            for connection in subscribers:
+                self._send(connection, frame)
+
+    def _send(self, connection, frame):
+        try:
+            connection.send(frame)
+            self.sent += 1
+        except BlockingIOError:
+            self.skipped += 1  # its buffer is full; it gets the next snapshot instead
+        except OSError:
+            with self._lock:
+                if connection in self._subscribers:
+                    self._subscribers.remove(connection)
+            connection.close()
+            self.logger.info(f"Read worker unsubscribed ({len(self._subscribers)} connected)")
+
+
+class TelemetrySubscriber:
+    """Worker side of the telemetry bus: keeps the latest snapshot, reconnecting whenever the owner restarts."""
+
+    def __init__(self, path):
+        self.path = path
+        self.logger = logging.getLogger('TelemetrySubscriber')
+        self._snapshot = None   # (monotonic time received, decoded snapshot)
+        self.connected = False
+        self.received = 0
+
+    def start(self):
+        threading.Thread(target=self._run, name="TelemetrySubscriber", daemon=True).start()
+
+    def get(self, path):
+        """(status code, JSON body, seconds since the last snapshot arrived), or None if the owner does not publish path."""
+        snapshot = self._snapshot
+        if snapshot is None or path not in snapshot[1]["responses"]:
+            return None
+        received, data = snapshot
+        status, body = data["responses"][path]
+        return status, body, time.monotonic() - received
+
+    def age(self):
+        snapshot = self._snapshot
+        return None if snapshot is None else time.monotonic() - snapshot[0]
+
+    def status(self):
+        snapshot = self._snapshot
+        return {"socket": self.path, "connected": self.connected, "received": self.received,
+                "sequence": snapshot[1]["sequence"] if snapshot else None, "age": self.age()}
+
+    def _run(self):
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET) as connection:
+                    connection.connect(self.path)
+                    self.connected = True
+                    self.logger.info(f"Subscribed to {self.path}")
+                    while True:
+                        frame = connection.recv(MAX_FRAME_BYTES)
+                        if not frame:
+                            break
+                        self._snapshot = (time.monotonic(), json.loads(frame))
+                        self.received += 1
+                reason = "owner closed the connection"
+            except OSError as e:
+                reason = str(e)
+            if self.connected:
+                self.logger.warning(f"Telemetry bus lost ({reason}), reconnecting")
+            self.connected = False
+            time.sleep(RECONNECT_SECONDS)
@@ -0,0 +1,204 @@
+import contextvars
+import itertools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+FLUSH_SECONDS = 1.0
+MAX_QUEUED_EVENTS = 100000           # events waiting for the writer; beyond that they are dropped
+MAX_FILE_BYTES = 100 * 1024 * 1024   # the trace file is rotated to <file>.1 past this size
+
+logger = logging.getLogger('Tracing')
+
+_trace = contextvars.ContextVar("trace", default=None)
+_writer = None
+_sample_ratio = 0.0
+
+
+class Trace:
+    """One sampled request; spans opened in its context (and contexts copied from it) belong to it."""
+    __slots__ = ("id", "name")
+    _ids = itertools.count(1)
+
+    def __init__(self, name):
+        self.id = next(Trace._ids)
+        self.name = name
+
+
+class _Span:
+    __slots__ = ("trace", "name", "args", "start")
+
+    def __init__(self, trace, name, args):
+        self.trace = trace
+        self.name = name
+        self.args = args
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        _emit({"name": self.name, "cat": self.trace.name, "ph": "X", "ts": self.start // 1000,
+               "dur": (end - self.start) // 1000, "tid": threading.get_ident(),
+               "args": {"trace": self.trace.id, **self.args}})
+        return False
+
+
+class _NoSpan:
+    """Returned when the current request is not sampled; costs nothing to enter."""
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Writer:
+    """Appends events to a Chrome trace-event file (JSON array format) from a background thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.SimpleQueue()
+        self._threads = {}
+        self._file = None
+        self._thread = threading.Thread(target=self._run, name="TraceWriter", daemon=True)
+        self._thread.start()
+
+    def put(self, event):
+        if self._queue.qsize() >= MAX_QUEUED_EVENTS:
+            self.dropped += 1
+            return
+        self._queue.put(event)
+
+    def _open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() == 0:
+            self._file.write("[\n")  # chrome://tracing and Perfetto accept the array left unterminated
+        self._threads.clear()  # thread names are repeated in every file
+
+    def _run(self):
+        pid = os.getpid()
+        while True:
+            events = [self._queue.get()]
+            deadline = time.monotonic() + FLUSH_SECONDS
+            while (left := deadline - time.monotonic()) > 0:
+                try:
+                    events.append(self._queue.get(timeout=left))
+                except queue.Empty:
+                    break
+            try:
+                self._write(events, pid)
+            except OSError as e:
+                logger.error(f"Could not write trace events to {self.path}: {e}")
+                self._file = None
+
+    def _write(self, events, pid):
+        if self._file is None:
+            self._open()
+        lines = []
+        for event in events:
+            tid = event["tid"]
+            if tid not in self._threads:
+                self._threads[tid] = event.pop("thread")
+                lines.append(json.dumps({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                                         "args": {"name": self._threads[tid]}}))
+            event.pop("thread", None)
+            event["pid"] = pid
+            lines.append(json.dumps(event, default=str, separators=(",", ":")))
+        self._file.write(",\n".join(lines) + ",\n")
+        self._file.flush()
+        self.written += len(events)
+        if self._file.tell() > MAX_FILE_BYTES:
+            self._file.close()
+            os.replace(self.path, self.path + ".1")
+            self._open()
+
+
+def _emit(event):
+    writer = _writer
+    if writer is not None:
+        event["thread"] = threading.current_thread().name
+        writer.put(event)
+
+
+def configure(path, sample_ratio):
+    """Turns tracing on, writing sampled requests to path; an empty path leaves it off."""
+    global _writer, _sample_ratio
+    if not path:
+        return
+    _sample_ratio = min(max(float(sample_ratio), 0.0), 1.0)
+    _writer = _Writer(path)
+    logger.info(f"Tracing {_sample_ratio:.0%} of requests to {path}")
+
+
+def start(name, force=False):
+    """Starts a trace for the request running in this context if it is sampled; returns a token for finish()."""
+    if _writer is None or not (force or random.random() < _sample_ratio):
+        return None
+    return _trace.set(Trace(name))
+
+
+def finish(token):
+    if token is not None:
+        _trace.reset(token)
+
+
+def active():
+    return _trace.get() is not None
+
+
+def span(name, **args):
+    """A timed span in the current trace; a no-op outside a sampled request."""
+    trace = _trace.get()
+    if trace is None:
+        return _NO_SPAN
+    return _Span(trace, name, args)
+
+
+def begin_async(name, **args):
+    """Starts a span that ends on another thread (e.g. an INDI reply); returns a handle for end_async()."""
+    trace = _trace.get()
+    if trace is None:
+        return None
+    return (trace, name, args, time.perf_counter_ns())
+
+
+def end_async(handle, **args):
+    if handle is None:
+        return
+    trace, name, start_args, start = handle
+    # Nestable async events share an id, so they get their own row beside the thread's spans
+    common = {"name": name, "cat": trace.name, "id": trace.id, "tid": threading.get_ident()}
+    _emit({**common, "ph": "b", "ts": start // 1000, "args": {"trace": trace.id, **start_args}})
+    _emit({**common, "ph": "e", "ts": time.perf_counter_ns() // 1000, "args": args})
+
+
+def stats():
+    writer = _writer
+    return {
+        "enabled": writer is not None,
+        "sampleRatio": _sample_ratio,
+        "file": writer.path if writer else None,
+        "written": writer.written if writer else 0,
+        "dropped": writer.dropped if writer else 0,
+    }
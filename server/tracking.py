@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+
+import numpy as np
+from skyfield.api import wgs84
+
+from base_controller import TrackRateUnsupportedError
+
+SIDEREAL_RATE = 15.041067  # arcsec/s, INDI TRACK_RATE_RA for sidereal tracking
+TABLE_HOURS = 6            # how far ahead each rate table reaches
+TABLE_STEP_SECONDS = 60    # spacing of the precomputed samples
+REFRESH_MARGIN_SECONDS = 1800  # rebuild the table this long before it runs out
+TICK_SECONDS = 5           # background loop period
+RATE_EPSILON = 0.001       # arcsec/s, smallest rate change worth sending
+CORRECTION_THRESHOLD = 30  # arcsec, drift that triggers a goto when custom rates are unsupported
+
+
+def skyfield_source(ephemeris, ts, body, latitude, longitude, elevation):
+    """Returns a position function for a Skyfield body seen from the site.
+
+    The function maps an array of unix timestamps to topocentric apparent
+    RA (hours) and Dec (degrees) of date, evaluated in a single call.
+    """
+    observer = ephemeris['earth'] + wgs84.latlon(latitude, longitude, elevation_m=elevation)
+
+    def radec(unix_times):
+        t = ts.utc(1970, 1, 1, 0, 0, unix_times)
+        ra, dec, _ = observer.at(t).observe(body).apparent().radec(epoch='date')
+        return ra.hours, dec.degrees
+
+    return radec
+
+
+class RateTable:
+    """Positions and track rates of one target sampled on a regular time grid."""
+
+    def __init__(self, source, start, hours=TABLE_HOURS, step=TABLE_STEP_SECONDS):
+        self.start = start
+        self.step = step
+        self.times = start + np.arange(0, hours * 3600 + step, step, dtype=float)
+        ra_hours, dec_deg = source(self.times)
+
+        # Unwrap so RA stays continuous across 0h/24h
+        ra_rad = np.unwrap(np.radians(np.asarray(ra_hours) * 15.0))
+        self.ra_deg = np.degrees(ra_rad)
+        self.dec_deg = np.asarray(dec_deg, dtype=float)
+
+        # Apparent motion in arcsec/s; INDI wants the RA axis rate, so subtract
+        # the target's own RA motion from the sidereal rate
+        self.ra_rate = SIDEREAL_RATE - np.gradient(self.ra_deg * 3600.0, self.times)
+        self.dec_rate = np.gradient(self.dec_deg * 3600.0, self.times)
+        self.end = float(self.times[-1])
+
+    def sample(self, t):
+        """Interpolates the table at unix time t without touching the ephemeris."""
+        i = min(max(int((t - self.start) // self.step), 0), len(self.times) - 2)
+        f = (t - self.times[i]) / self.step
+
+        def lerp(a):
+            return a[i] + (a[i + 1] - a[i]) * f
+
+        return {
+            "ra": (lerp(self.ra_deg) / 15.0) % 24.0,
+            "dec": lerp(self.dec_deg),
+            "ra_rate": lerp(self.ra_rate),
+            "dec_rate": lerp(self.dec_rate),
+        }
+
+
+class NonSiderealTracker:
+    """Keeps the mount on a moving target from a background loop.
+
+    Custom TELESCOPE_TRACK_RATE values are pushed when the mount supports
+    them; otherwise the loop re-points the mount once the drift exceeds
+    CORRECTION_THRESHOLD.
+    """
+
+    def __init__(self, controller, tick=TICK_SECONDS, run=None):
+        self.controller = controller
+        self.tick = tick
+        self.run = run or (lambda fn, *args, **kwargs: fn(*args, **kwargs))  # e.g. a scheduler lane
+        self.logger = logging.getLogger('NonSiderealTracker')
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._target = None
+        self._source = None
+        self._table = None
+        self._mode = None
+        self._last_rates = None
+        self._corrections = 0
+
+    def start(self, target, source):
+        """Starts tracking target, positions coming from source(unix_times)."""
+        self.stop()
+        table = RateTable(source, time.time())
+        with self._lock:
+            self._target = target
+            self._source = source
+            self._table = table
+            self._mode = "custom_rate"
+            self._last_rates = None
+            self._corrections = 0
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="non-sidereal-tracker", daemon=True)
+            self._thread.start()
+        self.logger.info(f"Tracking {target} with a {TABLE_HOURS} h rate table")
+
+    def stop(self, wait=True):
+        """Ends tracking; wait=False only signals the loop, and a later stop() joins it."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        if not wait:
+            return
+        if thread is not threading.current_thread():
+            thread.join(timeout=self.tick + 1)
+        with self._lock:
+            self._thread = None
+            self._target = None
+            self._table = None
+        self.logger.info("Non-sidereal tracking stopped")
+
+    def resend_rates(self):
+        """Sends the rates again at the next tick, e.g. after a reconnect put the saved track mode back."""
+        with self._lock:
+            self._last_rates = None
+
+    def is_active(self):
+        return self._thread is not None
+
+    def status(self):
+        with self._lock:
+            if self._table is None:
+                return {"active": False}
+            sample = self._table.sample(time.time())
+            return {
+                "active": True,
+                "target": self._target,
+                "mode": self._mode,
+                "ra": sample["ra"],
+                "dec": sample["dec"],
+                "raRate": sample["ra_rate"],
+                "decRate": sample["dec_rate"],
+                "tableEnd": self._table.end,
+                "corrections": self._corrections,
+            }
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._step(time.time())
+            except Exception as e:
+                self.logger.error(f"Tracking step failed: {e}")
+            self._stop.wait(self.tick)
+
+    def _step(self, now):
+        table = self._table
+        if table is None:
+            return
+
+        # Rebuild ahead of time so the loop never samples past the table
+        if now > table.end - REFRESH_MARGIN_SECONDS:
+            table = RateTable(self._source, now)
+            with self._lock:
+                self._table = table
+            self.logger.info(f"Rate table for {self._target} refreshed")
+
+        sample = table.sample(now)
+
+        if self._mode == "custom_rate":
+            rates = (sample["ra_rate"], sample["dec_rate"])
+            if self._last_rates is None or max(abs(a - b) for a, b in zip(rates, self._last_rates)) > RATE_EPSILON:
+                try:
+                    self.run(self.controller.set_track_rate, *rates)
+                    self._last_rates = rates
+                except TrackRateUnsupportedError as e:  # not a dropped link or a timeout: those retry next tick
+                    self.logger.warning(f"Custom track rates unavailable ({e}), falling back to periodic corrections")
+                    with self._lock:
+                        self._mode = "correction"
+            return
+
+        position = self.controller.get_coordinates()
+        dra = ((sample["ra"] - position["ra"] + 12) % 24 - 12) * 15 * 3600 * np.cos(np.radians(sample["dec"]))
+        ddec = (sample["dec"] - position["dec"]) * 3600
+        if np.hypot(dra, ddec) > CORRECTION_THRESHOLD:
+            self.logger.debug(f"Drift {np.hypot(dra, ddec):.1f}\" on {self._target}, correcting")
+            self.run(self.controller.slew_to, sample["ra"], sample["dec"], wait=False)
+            with self._lock:
+                self._corrections += 1